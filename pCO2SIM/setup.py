@@ -217,6 +217,9 @@ setup(
             'matplotlib',
             'schedula[plot]',
         ],
+        'jit': [
+            'numba',                    # for the 'kernel' prediction backend
+        ],
         'test': test_requirements,
         # Not working yet, due to: https://github.com/pypa/pip/pull/3878
         'pindeps': pindeps,
@@ -32,6 +32,13 @@ USAGE:
                       (--list | [--graph-depth=<levels>] [<models> ...])
   co2mpas modelconf   [-v | -q | --logconf=<conf-file>] [-f]
                       [--modelconf=<yaml-file>] [-O=<output-folder>]
+  co2mpas models      export [-v | -q | --logconf=<conf-file>] [-f]
+                      [--use-cache] [--modelconf=<yaml-file>] [--allow-pickle]
+                      [-D=<key=value>]... <input-path> <models-file>
+  co2mpas models      import [-v | -q | --logconf=<conf-file>] [-f]
+                      [--use-cache] [-O=<output-folder>]
+                      [--modelconf=<yaml-file>] [--allow-pickle]
+                      [-D=<key=value>]... <models-file> [<input-path>]...
   co2mpas             [-v | -q | --logconf=<conf-file>] (--version | -V)
   co2mpas             --help
 
@@ -46,8 +53,12 @@ OPTIONS:
   -O=<output-folder>          Output folder or file [default: .].
   --download                  Download latest demo files from ALLINONE GitHub project.
   <excel-file-path>           Output file [default: co2mpas_template.xlsx].
+  <models-file>               File of the calibrated prediction models.
   --modelconf=<yaml-file>     Path to a model-configuration YAML file.
   --use-cache                 Use the cached input file.
+  --allow-pickle              Pickle the models that cannot be encoded into the <models-file>
+                              (and unpickle them). Use it only with trusted files, because
+                              unpickling can execute arbitrary code.
   --co2mparable=<old-yaml>    (internal) Enable co2parable generation in tmp-folder and
                               optionally provide an <old-yaml> file to compare with while executing.
                               Overrides CO2MPARE_ENABLED and CO2MPARE_WITH_FPATH env-vars
@@ -107,6 +118,9 @@ SUB-COMMANDS:
                       jupyter --notebook-dir=<output-folder>
     modelgraph      List or plot available models. If no model(s) specified, all assumed.
     modelconf       Save a copy of all model defaults in yaml format.
+    models          Export the prediction models calibrated from <input-path>
+                    into the compact <models-file>, or import them to predict
+                    the <input-path> files without calibrating the models.
 
 
 EXAMPLES::
@@ -137,6 +151,10 @@ EXAMPLES::
 
     # View all model defaults in yaml format:
     co2mpas modelconf -O output
+
+    # Calibrate once the vehicle models and predict later with them:
+    co2mpas  models  export  input/co2mpas_demo-1.xlsx  vehicle_1.npz
+    co2mpas  models  import  vehicle_1.npz  input  -O output
 """
 
 from co2mpas import (__version__ as proj_ver, __file__ as proj_file,
@@ -598,6 +616,36 @@ def _cmd_modelconf(opts):
     log.info('Default model config written into yaml-file(%s)...', fname)
 
 
+def _cmd_models(opts):
+    models_fpath = opts['<models-file>']
+    if opts['import']:
+        if not osp.isfile(models_fpath):
+            raise CmdException("Cannot find models-file '%s'!" % models_fpath)
+        opts['--override'].append('flag.prediction_models=%s' % models_fpath)
+        if opts['--allow-pickle']:
+            opts['--override'].append('flag.allow_pickle_models=True')
+        return _run_batch(opts)
+
+    input_paths = opts['<input-path>']
+    if len(input_paths) != 1 or not osp.isfile(input_paths[0]):
+        raise CmdException(
+            "Expecting one <input-path> file instead of %r!" % input_paths)
+    if osp.exists(models_fpath) and not opts['--force']:
+        raise CmdException(
+            "Writing file '%s' skipped, already exists! "
+            "Use --force to overwrite it." % models_fpath)
+
+    _init_defaults(opts['--modelconf'])
+    from co2mpas.batch import export_prediction_models
+    log.info("Exporting models of %r --> %r...", input_paths[0], models_fpath)
+    export_prediction_models(
+        input_paths[0], models_fpath,
+        variation=parse_overrides(opts['--override']),
+        overwrite_cache=not opts['--use-cache'], modelconf=opts['--modelconf'],
+        allow_pickle=opts['--allow-pickle']
+    )
+
+
 def _check_if_old_co2mpas_is_still_installed():
     try:
         import pkg_resources as pr
@@ -672,6 +720,8 @@ def _main(*args):
         _cmd_modelgraph(opts)
     elif opts['modelconf']:
         _cmd_modelconf(opts)
+    elif opts['models']:
+        _cmd_models(opts)
     elif opts['ta']:
         _run_batch(opts, type_approval_mode=True, overwrite_cache=True)
     else:
@@ -13,12 +13,14 @@ import functools
 import logging
 import re
 import threading
+import time
 from tqdm import tqdm
 
 import schedula as sh
 import co2mpas.io.excel as excel
 import co2mpas.io.schema as schema
 import co2mpas.utils as co2_utl
+import co2mpas.utils.parallel as co2_par
 import os.path as osp
 
 log = logging.getLogger(__name__)
@@ -99,16 +101,22 @@ def process_folder_files(input_files, output_folder,
                 (<filepath>, <contents>)
     :type result_listener: callable
 
+    The batch summary and the resource metrics of each vehicle are saved
+    respectively into ``<timestamp>-summary.xlsx`` and
+    ``<timestamp>-metrics.json``.
     """
 
-    summary, start_time = _process_folder_files(input_files, output_folder,
-                                                result_listener=result_listener,
-                                                **kwds)
+    summary, start_time, metrics = _process_folder_files(
+        input_files, output_folder, result_listener=result_listener, **kwds
+    )
 
     timestamp = start_time.strftime('%Y%m%d_%H%M%S')
 
     summary_xl_file = osp.join(output_folder, '%s-summary.xlsx' % timestamp)
-    _save_summary(summary_xl_file, start_time, summary)
+    _save_summary(summary_xl_file, start_time, summary, metrics)
+
+    metrics_file = osp.join(output_folder, '%s-metrics.json' % timestamp)
+    _save_metrics(metrics_file, metrics)
 
     time_elapsed = (datetime.datetime.today() - start_time).total_seconds()
     log.info('Done! [%s sec]', time_elapsed)
@@ -144,7 +152,10 @@ def _yield_folder_files_results(
     _process_vehicle = sh.SubDispatch(model)
 
     for fpath in _custom_tqdm(input_files, bar_format='{l_bar}{bar}{r_bar}'):
-        yield _process_vehicle({'input_file_name': fpath}, kw)
+        co2_par.reset_peak_rss()
+        start = time.time()
+        res = _process_vehicle({'input_file_name': fpath}, kw)
+        yield res, _vehicle_metrics(fpath, res, start)
 
 
 def _process_folder_files(*args, result_listener=None, **kwargs):
@@ -174,13 +185,124 @@ def _process_folder_files(*args, result_listener=None, **kwargs):
     """
     start_time = datetime.datetime.today()
 
-    summary, n = {}, ('solution', 'summary')
-    for res in _yield_folder_files_results(start_time, *args, **kwargs):
+    summary, metrics, n = {}, [], ('solution', 'summary')
+    it = _yield_folder_files_results(start_time, *args, **kwargs)
+    for res, vehicle_metrics in it:
         if sh.are_in_nested_dicts(res, *n):
             _add2summary(summary, sh.get_nested_dicts(res, *n))
             notify_result_listener(result_listener, res)
+        metrics.append(vehicle_metrics)
+
+    return summary, start_time, metrics
+
+
+#: Function nodes of the CO2MPAS model that belong to each stage.
+_MODEL_STAGES = {
+    'calibration': (
+        'calculate_precondition_output', 'output.precondition.wltp_p',
+        'calibrate_with_wltp_h', 'output.calibration.wltp_h',
+        'calibrate_with_wltp_l', 'output.calibration.wltp_l',
+        'extract_calibrated_models'
+    ),
+    'prediction': (
+        'predict_wltp_h', 'output.prediction.wltp_h',
+        'predict_wltp_l', 'output.prediction.wltp_l',
+        'predict_nedc_h', 'output.prediction.nedc_h',
+        'predict_nedc_l', 'output.prediction.nedc_l'
+    )
+}
+
+
+def _get_sub_solution(solution, *node_ids):
+    try:
+        for k in node_ids:
+            solution = solution.workflow.node[k]['solution']
+        return solution
+    except (KeyError, AttributeError):
+        return None
+
+
+def _get_nodes_span(solution, node_ids):
+    # Returns the start and end times of the evaluated nodes.
+    span = []
+    if solution is not None:
+        nodes = solution.workflow.node
+        for k in node_ids:
+            attr = nodes[k] if k in nodes else {}
+            if 'duration' in attr:
+                start = attr['started']
+                span.append((start, start + attr['duration']))
+    if span:
+        return min(v[0] for v in span), max(v[1] for v in span)
+    return None
+
+
+def _get_nodes_duration(solution, node_ids):
+    span = _get_nodes_span(solution, node_ids)
+    return span[1] - span[0] if span else 0.0
+
+
+def _vehicle_metrics(fpath, solution, start_time):
+    """
+    Returns the resource metrics of a processed vehicle.
+
+    The stage times [s] are extracted from the workflow of the vehicle
+    solution. The peak resident set size [MB] is the maximum of the process and
+    of the worker processes that have executed the vehicle functions (see
+    :func:`co2mpas.utils.parallel.get_peak_rss`). It is the one of the vehicle
+    if the platform allows to reset it (i.e., Linux), otherwise it is the peak
+    since the processes have started.
+
+    :param fpath:
+        Input file path.
+    :type fpath: str
+
+    :param solution:
+        Vehicle processing model solution.
+    :type solution: schedula.Solution
 
-    return summary, start_time
+    :param start_time:
+        Time when the vehicle processing has started [s].
+    :type start_time: float
+
+    :return:
+        Vehicle resource metrics.
+    :rtype: dict
+    """
+    total_time = time.time() - start_time
+    base = _get_sub_solution(solution, 'run_base')
+    model = _get_sub_solution(base, 'CO2MPAS model')
+
+    span = _get_nodes_span(solution, ('prepare_data',))
+    parse_time = (span[1] - start_time) if span else total_time
+    parse_time += _get_nodes_duration(base, ('validate_meta',))
+    parse_time += _get_nodes_duration(base, ('validate_base',))
+
+    write_time = sum(_get_nodes_duration(base, (k,)) for k in (
+        'parse_dsp_solution', 'make_report', 'write_ta_output',
+        'write_outputs'
+    ))
+
+    cache_hits = 0
+    for sol in getattr(solution, 'sub_sol', {}).values():
+        if _get_nodes_span(sol, ('load_data_from_cache',)):
+            cache_hits += 1
+
+    metrics = {
+        'vehicle_name': default_vehicle_name(fpath),
+        'parse_time': parse_time,
+        'calibration_time': _get_nodes_duration(
+            model, _MODEL_STAGES['calibration']
+        ),
+        'prediction_time': _get_nodes_duration(
+            model, _MODEL_STAGES['prediction']
+        ),
+        'write_time': write_time,
+        'total_time': total_time,
+        'peak_rss': co2_par.get_peak_rss(),
+        'cache_hits': cache_hits
+    }
+    return metrics
 
 
 SITES = set()
@@ -322,7 +444,7 @@ def _get_contain(d, *keys, default=None):
         return _get_contain(d, *keys[:-1], default=default)
 
 
-def _save_summary(fpath, start_time, summary):
+def _save_summary(fpath, start_time, summary, metrics=()):
     if summary:
         from co2mpas.io.excel import _df2excel
         from co2mpas.io import _dd2df, _sort_key, _co2mpas_info2df, _add_units
@@ -342,10 +464,32 @@ def _save_summary(fpath, start_time, summary):
 
         _df2excel(writer, 'proc_info', _co2mpas_info2df(start_time))
 
+        if metrics:
+            _df2excel(writer, 'proc_info', _metrics2df(metrics), startcol=3,
+                      named_ranges=())
+
         writer.save()
         log.info('Written into xl-file(%s)...', fpath)
 
 
+def _metrics2df(metrics):
+    import pandas as pd
+    from co2mpas.io import _add_units
+    df = pd.DataFrame(list(metrics))
+    df.set_index(['vehicle_name'], inplace=True)
+    df.columns = pd.MultiIndex.from_tuples(_add_units((k,) for k in df.columns))
+    setattr(df, 'name', 'metrics')
+    return df
+
+
+def _save_metrics(fpath, metrics):
+    if metrics:
+        import json
+        with open(fpath, 'w') as f:
+            json.dump(list(metrics), f, indent=2, sort_keys=True)
+        log.info('Written into json-file(%s)...', fpath)
+
+
 def get_template_file_name(template_output, input_file_name):
     """
     Returns the template file name.
@@ -504,6 +648,93 @@ def prepare_data(raw_data, variation, input_file_name, overwrite_cache,
     return base, plan
 
 
+def merge_prediction_models(validated_base, prediction_models,
+                            allow_pickle_models=False):
+    """
+    Replaces the calibration of the vehicle with the prediction models saved
+    by :func:`export_prediction_models`.
+
+    :param validated_base:
+        Validated base data.
+    :type validated_base: dict
+
+    :param prediction_models:
+        File path of the prediction models (skipped if empty).
+    :type prediction_models: str
+
+    :param allow_pickle_models:
+        Load also the pickled models (it can execute arbitrary code)?
+    :type allow_pickle_models: bool
+
+    :return:
+        Inputs of the CO2MPAS model.
+    :rtype: dict
+    """
+    if not prediction_models:
+        return validated_base
+    from .io.models import load_models
+    skip = 'input.calibration.', 'input.precondition.'
+    inputs = {k: v for k, v in validated_base.items()
+              if not k.startswith(skip)}
+    models = load_models(prediction_models, allow_pickle_models)
+    for k, v in models.items():
+        inputs['data.prediction.models_%s' % k] = v
+    return inputs
+
+
+def export_prediction_models(input_file_name, models_file_name,
+                             variation=None, overwrite_cache=True,
+                             modelconf=None, allow_pickle=False):
+    """
+    Calibrates the models of a vehicle and saves the prediction models of each
+    cycle (see :mod:`co2mpas.io.models`).
+
+    :param input_file_name:
+        Input file name.
+    :type input_file_name: str
+
+    :param models_file_name:
+        File path of the prediction models.
+    :type models_file_name: str
+
+    :param variation:
+        Variations to be applied.
+    :type variation: dict
+
+    :param overwrite_cache:
+        Overwrite saved cache?
+    :type overwrite_cache: bool
+
+    :param modelconf:
+        Path of modelconf that has modified the defaults.
+    :type modelconf: str
+
+    :param allow_pickle:
+        Pickle the models that cannot be encoded, instead of raising?
+    :type allow_pickle: bool
+
+    :return:
+        Prediction models of each cycle.
+    :rtype: dict
+    """
+    variation = sh.combine_dicts(variation or {}, {'flag.only_summary': True})
+    sol = vehicle_processing_model().dispatch(inputs={
+        'input_file_name': input_file_name,
+        'variation': variation,
+        'overwrite_cache': overwrite_cache,
+        'modelconf': modelconf
+    })
+    sol = sol.get('solution', {}).get('dsp_solution', {})
+    n = len('data.prediction.models_')
+    models = {k[n:]: v for k, v in sol.items()
+              if k.startswith('data.prediction.models_')}
+    if not models:
+        raise ValueError('No models calibrated from %s!' % input_file_name)
+    from .io.models import save_models
+    save_models(models, models_file_name, allow_pickle)
+    return models
+
+
 def check_run_base(data):
     return not data.get('run_plan', False)
 
@@ -690,10 +921,28 @@ def run_base():
         outputs=['output_file_name']
     )
 
-    from .model import model
+    d.add_data(
+        data_id='prediction_models',
+        default_value=''
+    )
+
+    d.add_data(
+        data_id='allow_pickle_models',
+        default_value=False
+    )
+
+    d.add_function(
+        function=merge_prediction_models,
+        inputs=['validated_base', 'prediction_models', 'allow_pickle_models'],
+        outputs=['model_inputs']
+    )
+
+    from .model.registry import get_model, SharedSubDispatch
     d.add_function(
-        function=sh.add_args(sh.SubDispatch(model())),
-        inputs=['validated_meta', 'validated_base'],
+        function=sh.add_args(
+            SharedSubDispatch(get_model('co2mpas.model.model'))
+        ),
+        inputs=['validated_meta', 'model_inputs'],
         outputs=['dsp_solution']
     )
 
@@ -18,6 +18,7 @@ Modules:
     :toctree: io/
 
     dill
+    models
     excel
     schema
     ta
@@ -387,6 +388,13 @@ def _param_units():
         'co2_params l2': '[bar*(s/m)^2]',
         'co2_params t': '[-]',
         'co2_params trg': '[°C]',
+        'parse_time': '[s]',
+        'calibration_time': '[s]',
+        'prediction_time': '[s]',
+        'write_time': '[s]',
+        'total_time': '[s]',
+        'peak_rss': '[MB]',
+        'cache_hits': '[-]',
         'fuel_consumption': '[l/100km]',
         'co2_emission': '[CO2g/km]',
         'av_velocities': '[kw/h]',
@@ -523,11 +531,11 @@ _re_units = regex.compile(r'(\[.*\])')
 
 @functools.lru_cache(None)
 def get_doc_description():
-    from ..model.physical import physical
+    from ..model.registry import get_model
 
     doc_descriptions = {}
 
-    d = physical()
+    d = get_model('co2mpas.model.physical.physical')
     for k, v in d.data_nodes.items():
         if k in doc_descriptions or v['type'] != 'data':
             continue
@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+
+"""
+It contains functions to read/write the calibrated models from/on a compact
+and versioned file.
+
+The calibrated models are usually stored (e.g., in the cache files) pickled
+as they are, with their `sklearn`/`xgboost` estimators. Instead, this format
+stores the tree ensembles as flat arrays (see
+:mod:`co2mpas.model.physical.trees`) and the parameters as plain numbers. The
+file is a `numpy` archive (`.npz`) that contains a `json` header, with the
+format version and the structure of the models, and the referenced arrays.
+Hence, it is loaded without unpickling any estimator.
+
+.. note:: The objects without a codec, or that cannot be compiled (e.g., the
+   default models that are not calibrated), are refused. They are stored
+   pickled as byte arrays only when `allow_pickle` is set, and such a file can
+   be loaded only with `allow_pickle` too. Loading a pickle can execute
+   arbitrary code: enable it only for trusted files.
+"""
+
+import collections
+import functools
+import json
+import logging
+import numpy as np
+import lmfit
+import dill
+from .. import __version__
+from ..utils import ret_v
+from ..model.physical.trees import TreeEnsemble, TreeClassifier, \
+    compile_xgboost, compile_decision_tree
+from ..model.physical.engine.thermal import ThermalModel, NoDelta
+from ..model.physical.engine.start_stop import StartStopModel
+from ..model.physical.engine.cold_start import ColdStartModel
+from ..model.physical.electrics import AlternatorCurrentModel, \
+    Alternator_status_model
+from ..model.physical.clutch_tc.torque_converter import TorqueConverter
+from ..model.physical.clutch_tc.clutch import ClutchModel
+from ..model.physical.gear_box.at_gear import CMV, GSPV, MVL, DTGS, \
+    GSMColdHot
+
+log = logging.getLogger(__name__)
+
+__all__ = ['load_models', 'save_models']
+
+#: Version of the file format.
+VERSION = 1
+
+
+def _trees(trees):
+    return {
+        'feature': trees.feature.astype(np.int32),
+        'threshold': trees.threshold,
+        'left': trees.left.astype(np.int32),
+        'right': trees.right.astype(np.int32),
+        'missing': trees.missing.astype(np.int32),
+        'value': trees.value
+    }
+
+
+def _encode_tree_ensemble(obj):
+    return dict(
+        _trees(obj), roots=obj.roots.astype(np.int32),
+        base_score=float(obj.base_score), base_last=obj.base_last
+    )
+
+
+def _encode_tree_classifier(obj):
+    return dict(_trees(obj), classes=obj.classes)
+
+
+def _compile(model, mask, trees, compile_model=compile_xgboost):
+    # Compiled trees of a calibrated regressor.
+    if trees is None and isinstance(model, TreeEnsemble):
+        trees = model
+    elif trees is None:
+        trees = compile_model(model, mask)
+        if trees is None:
+            raise ValueError('Model %r cannot be compiled.' % model)
+    return trees
+
+
+def _encode_thermal_model(obj):
+    res = {'thermostat': obj.thermostat, 'min_temp': obj.min_temp}
+    cold, hot = obj._models()
+    for k, (model, mask, trees) in (('cold', cold), ('model', hot)):
+        if isinstance(model, NoDelta):
+            res[k] = None
+        else:
+            res[k] = _compile(model, mask, trees)
+    res['mask'], res['mask_cold'] = obj.mask, obj.mask_cold
+    return res
+
+
+def _decode_thermal_model(thermostat, min_temp, model, mask, cold, mask_cold):
+    obj = ThermalModel(thermostat=thermostat)
+    obj.min_temp, obj.mask, obj.mask_cold = min_temp, mask, mask_cold
+    if model is not None:
+        obj.model = obj.trees = model
+    if cold is not None:
+        obj.cold = obj.cold_trees = cold
+    return obj
+
+
+def _encode_alternator_current_model(obj):
+    res = {'alternator_charging_currents': obj.alternator_charging_currents}
+    init, normal = obj._models()
+    for k, (model, mask, trees) in (('init_model', init), ('model', normal)):
+        if model == obj.default_model:
+            model = 'default'
+        elif model is obj.zero_model:
+            model = 'zero'
+        else:
+            model = _compile(getattr(model, '__self__', model), mask, trees)
+        res[k], res[k.replace('model', 'mask')] = model, mask
+    return res
+
+
+def _decode_alternator_current_model(alternator_charging_currents, model,
+                                     mask, init_model, init_mask):
+    obj = AlternatorCurrentModel(alternator_charging_currents)
+    obj.mask, obj.init_mask = mask, init_mask
+    for k, model in (('', model), ('init_', init_model)):
+        if isinstance(model, TreeEnsemble):
+            setattr(obj, '%strees' % k, model)
+            model = model.predict
+        elif model == 'zero':
+            model = obj.zero_model
+        else:
+            model = obj.default_model
+        setattr(obj, '%smodel' % k, model)
+    return obj
+
+
+def _encode_alternator_status_model(obj):
+    res = {'min_soc': obj.min, 'max_soc': obj.max,
+           'current_threshold': obj.current_threshold, 'charge_pred': None}
+    if obj.charge is not obj.no_charge:
+        res['charge_pred'] = _compile(
+            getattr(obj.charge, '__self__', None), None, None,
+            compile_decision_tree
+        )
+    bers = obj.bers
+    if isinstance(bers, functools.partial) and bers.func is np.greater:
+        res['bers_pred'] = bers.args[0]  # Threshold.
+    else:
+        res['bers_pred'] = _compile(
+            getattr(bers, '__self__', None), None, None, compile_decision_tree
+        )
+    return res
+
+
+def _decode_alternator_status_model(bers_pred, charge_pred, **kwargs):
+    obj = Alternator_status_model(**kwargs)
+    if isinstance(bers_pred, TreeClassifier):
+        obj.bers = bers_pred.predict
+    else:
+        obj.bers = functools.partial(np.greater, bers_pred)
+    if charge_pred is None:
+        obj.charge = obj.no_charge
+    else:
+        obj.charge = charge_pred.predict
+    return obj
+
+
+def _encode_start_stop_model(obj):
+    res = {}
+    for k in ('simple', 'complex'):
+        if getattr(obj, k) == obj.base:
+            res[k] = None
+        else:
+            res[k] = _compile(None, None, getattr(obj, '_%s' % k, None))
+    return res
+
+
+def _decode_start_stop_model(simple, complex):
+    obj = StartStopModel()
+    if simple is not None:
+        obj.set_simple(simple)
+    if complex is not None:
+        obj.set_complex(complex)
+    return obj
+
+
+def _encode_torque_converter(obj):
+    res = {'regressor': None, 'use_model': obj.predict == obj.model}
+    if obj.regressor is not None:
+        res['regressor'] = _compile(obj.regressor, None, None)
+    if isinstance(obj, ClutchModel):
+        res['prev_dt'] = obj.prev_dt
+    return res
+
+
+def _decode_torque_converter(regressor, use_model, **kwargs):
+    obj = (ClutchModel if kwargs else TorqueConverter)(**kwargs)
+    obj.regressor = regressor
+    if use_model:
+        obj.predict = obj.model
+    return obj
+
+
+def _encode_dtgs(obj):
+    return {
+        'velocity_speed_ratios': obj.velocity_speed_ratios,
+        'model': _compile(obj.model, None, None, compile_decision_tree),
+        'gears': obj.gears
+    }
+
+
+def _decode_dtgs(velocity_speed_ratios, model, gears):
+    obj = DTGS(velocity_speed_ratios)
+    obj.model, obj.gears = model, gears
+    return obj
+
+
+def _encode_parameters(obj):
+    keys = 'name', 'value', 'vary', 'min', 'max', 'expr', 'brute_step'
+    return {'params': [{k: getattr(p, k) for k in keys}
+                       for p in obj.values()]}
+
+
+def _decode_parameters(params):
+    obj = lmfit.Parameters()
+    for p in params:
+        obj.add(**p)
+    return obj
+
+
+#: Codecs of the calibrated models (i.e., encode and decode functions).
+_codecs = collections.OrderedDict([
+    (TreeEnsemble, (_encode_tree_ensemble, TreeEnsemble)),
+    (TreeClassifier, (_encode_tree_classifier, TreeClassifier)),
+    (ThermalModel, (_encode_thermal_model, _decode_thermal_model)),
+    (AlternatorCurrentModel, (
+        _encode_alternator_current_model, _decode_alternator_current_model
+    )),
+    (Alternator_status_model, (
+        _encode_alternator_status_model, _decode_alternator_status_model
+    )),
+    (StartStopModel, (_encode_start_stop_model, _decode_start_stop_model)),
+    (ColdStartModel, (
+        lambda obj: {'ds': obj.ds, 'm': obj.m, 'temp_limit': obj.temp_limit},
+        ColdStartModel
+    )),
+    (TorqueConverter, (_encode_torque_converter, _decode_torque_converter)),
+    (ClutchModel, (_encode_torque_converter, _decode_torque_converter)),
+    (CMV, (
+        lambda obj: {
+            'items': list(obj.items()),
+            'velocity_speed_ratios': obj.velocity_speed_ratios
+        },
+        lambda items, velocity_speed_ratios: CMV(
+            items, velocity_speed_ratios=velocity_speed_ratios
+        )
+    )),
+    (MVL, (
+        lambda obj: {
+            'items': list(obj.items()),
+            'velocity_speed_ratios': obj.velocity_speed_ratios,
+            'plateau_acceleration': obj.plateau_acceleration
+        },
+        lambda items, **kw: MVL(items, **kw)
+    )),
+    (GSPV, (
+        lambda obj: {
+            'cloud': obj.cloud,
+            'velocity_speed_ratios': obj.velocity_speed_ratios
+        },
+        GSPV
+    )),
+    (GSMColdHot, (
+        lambda obj: {
+            'items': list(obj.items()),
+            'time_cold_hot_transition': obj.time_cold_hot_transition
+        },
+        lambda items, **kw: GSMColdHot(items, **kw)
+    )),
+    (DTGS, (_encode_dtgs, _decode_dtgs)),
+    (lmfit.Parameters, (_encode_parameters, _decode_parameters))
+])
+
+_decoders = {k.__name__: v[1] for k, v in _codecs.items()}
+
+
+class _Encoder(object):
+    def __init__(self, allow_pickle=False):
+        self.arrays = {}
+        self.allow_pickle = allow_pickle
+
+    def array(self, value):
+        key = 'a%d' % len(self.arrays)
+        self.arrays[key] = value
+        return {'__array__': key}
+
+    def __call__(self, obj):
+        if obj is None or isinstance(obj, (bool, int, float, str)):
+            return obj
+        elif isinstance(obj, np.generic):
+            return obj.item()
+        elif isinstance(obj, np.ndarray):
+            return self.array(obj)
+        elif isinstance(obj, list):
+            return [self(v) for v in obj]
+        elif isinstance(obj, tuple):
+            return {'__tuple__': [self(v) for v in obj]}
+        elif isinstance(obj, collections.defaultdict):
+            return {
+                '__defaultdict__': self(list(obj.items())),
+                'default': self(obj.default_factory())
+            }
+        elif type(obj) is dict:
+            if all(isinstance(k, str) and k[:2] != '__' for k in obj):
+                return {k: self(v) for k, v in obj.items()}
+            return {'__dict__': self(list(obj.items()))}
+
+        codec = _codecs.get(type(obj))
+        if codec is not None:
+            try:
+                res = codec[0](obj)
+                return dict({k: self(v) for k, v in res.items()},
+                            __model__=type(obj).__name__)
+            except (ValueError, AttributeError) as ex:
+                msg = 'Model %r cannot be encoded due to: %s' % (obj, ex)
+        else:
+            msg = 'Model %r has no codec' % obj
+        if not self.allow_pickle:
+            raise ValueError('%s! Set `allow_pickle` to pickle it.' % msg)
+        log.debug('%s, hence it is pickled.', msg)
+        data = dill.dumps(obj, recurse=False)
+        return {'__pickle__': self.array(np.frombuffer(data, np.uint8))}
+
+
+def _decode(obj, arrays, allow_pickle=False):
+    if isinstance(obj, list):
+        return [_decode(v, arrays, allow_pickle) for v in obj]
+    elif not isinstance(obj, dict):
+        return obj
+    elif '__array__' in obj:
+        return arrays[obj['__array__']]
+    elif '__tuple__' in obj:
+        return tuple(_decode(obj['__tuple__'], arrays, allow_pickle))
+    elif '__dict__' in obj:
+        return dict(_decode(obj['__dict__'], arrays, allow_pickle))
+    elif '__defaultdict__' in obj:
+        default = _decode(obj['default'], arrays, allow_pickle)
+        items = _decode(obj['__defaultdict__'], arrays, allow_pickle)
+        return collections.defaultdict(ret_v(default), items)
+    elif '__pickle__' in obj:
+        if not allow_pickle:
+            raise ValueError(
+                'Models-file contains pickled objects! Set `allow_pickle` to '
+                'load them, only if the file is trusted.'
+            )
+        return dill.loads(arrays[obj['__pickle__']['__array__']].tobytes())
+    obj = {k: _decode(v, arrays, allow_pickle) for k, v in obj.items()}
+    if '__model__' in obj:
+        return _decoders[obj.pop('__model__')](**obj)
+    return obj
+
+
+def save_models(models, fpath, allow_pickle=False):
+    """
+    Saves the calibrated models into a compact and versioned file.
+
+    :param models:
+        Calibrated models (e.g., the prediction models of each cycle).
+    :type models: dict
+
+    :param fpath:
+        File path (`.npz` is appended if missing).
+    :type fpath: str
+
+    :param allow_pickle:
+        Pickle the objects that cannot be encoded, instead of raising?
+    :type allow_pickle: bool
+    """
+    log.debug('Writing models-file: %s', fpath)
+    encoder = _Encoder(allow_pickle)
+    header = json.dumps({
+        'version': VERSION, 'co2mpas_version': __version__,
+        'models': encoder(models)
+    })
+    with open(fpath, 'wb') as f:
+        np.savez_compressed(f, header=np.array(header), **encoder.arrays)
+
+
+def load_models(fpath, allow_pickle=False):
+    """
+    Loads the calibrated models from a file written by :func:`save_models`.
+
+    :param fpath:
+        File path.
+    :type fpath: str
+
+    :param allow_pickle:
+        Unpickle the objects that are stored pickled, instead of raising?
+
+        .. warning:: Unpickling can execute arbitrary code.
+    :type allow_pickle: bool
+
+    :return:
+        Calibrated models.
+    :rtype: dict
+    """
+    log.debug('Reading models-file: %s', fpath)
+    with np.load(fpath, allow_pickle=False) as f:
+        arrays = dict(f.items())
+    header = json.loads(str(arrays.pop('header')))
+    if header['version'] > VERSION:
+        raise ValueError(
+            'Models-file version %s of %s is not supported (max %d)!' % (
+                header['version'], fpath, VERSION
+            )
+        )
+    return _decode(header['models'], arrays, allow_pickle)
@@ -903,6 +903,8 @@ def define_flags_schema(read=True):
         _compare_str('vehicle_name'): string,
 
         _compare_str('output_template'): isfile,
+        _compare_str('prediction_models'): isfile,
+        _compare_str('allow_pickle_models'): _bool,
         _compare_str('output_file_name'): string,
         _compare_str('output_folder'): isdir,
 
@@ -17,9 +17,11 @@ It contains a comprehensive list of all CO2MPAS software models and sub-models:
 
     physical
     selector
+    registry
 """
 
 import schedula as sh
+from .registry import get_model, SharedSubDispatch
 
 _prediction_data = [
     'angle_slope', 'alternator_nominal_voltage', 'alternator_efficiency',
@@ -113,6 +115,37 @@ def select_calibration_data(cycle_inputs, precondition_outputs):
     return cycle_inputs
 
 
+def _dispatch_cycle(*input_dicts):
+    model = SharedSubDispatch(get_model('co2mpas.model.physical.physical'))
+    return dict(model(*input_dicts))
+
+
+class CycleModel(SharedSubDispatch):
+    """
+    Sub-dispatch of a cycle that can be executed in a worker process.
+
+    The executor is defined by `dfl.functions.model.executor`:
+
+        - 'sync': the cycle is dispatched in the current process,
+        - 'parallel': the cycle is dispatched in a worker process and an
+          :class:`co2mpas.utils.parallel.AsyncResult` is returned.
+
+    Hence, independent cycles (e.g., `calibrate_with_wltp_h` and
+    `calibrate_with_wltp_l`) are dispatched concurrently, until their outputs
+    are required.
+    """
+
+    def __call__(self, *input_dicts, **kwargs):
+        from .physical.defaults import dfl
+        import co2mpas.utils.parallel as co2_par
+        cfg = dfl.functions.model
+        if cfg.executor == 'parallel':
+            executor = co2_par.get_executor(cfg.n_workers)
+            if executor is not None:
+                return co2_par.submit(executor, _dispatch_cycle, *input_dicts)
+        return super(CycleModel, self).__call__(*input_dicts, **kwargs)
+
+
 def model():
     """
     Defines the CO2MPAS model.
@@ -126,14 +159,20 @@ def model():
     :rtype: schedula.Dispatcher
     """
 
-    from .physical import physical
-    ph = sh.SubDispatch(physical())
+    ph = CycleModel(get_model('co2mpas.model.physical.physical'))
     d = sh.Dispatcher(
         name='CO2MPAS model',
         description='Calibrates the models with WLTP data and predicts NEDC '
                     'cycle.'
     )
 
+    # Outputs of the cycles are waited (if asynchronous) only when required.
+    from co2mpas.utils.parallel import get_estimation_result
+    for k in ('precondition.wltp_p', 'calibration.wltp_h',
+              'calibration.wltp_l', 'prediction.wltp_h', 'prediction.wltp_l',
+              'prediction.nedc_h', 'prediction.nedc_l'):
+        d.add_data(data_id='output.%s' % k, function=get_estimation_result)
+
     ############################################################################
     #                          PRECONDITIONING CYCLE
     ############################################################################
@@ -246,10 +285,11 @@ def model():
     #                            MODEL SELECTOR
     ############################################################################
 
-    from .selector import selector
-
     pred_cyl_ids = ('nedc_h', 'nedc_l', 'wltp_h', 'wltp_l')
-    sel = selector('wltp_h', 'wltp_l', pred_cyl_ids=pred_cyl_ids)
+    sel = get_model(
+        'co2mpas.model.selector.selector', 'wltp_h', 'wltp_l',
+        pred_cyl_ids=pred_cyl_ids
+    )
 
     d.add_data(
         data_id='config.selector.all',
@@ -26,9 +26,15 @@ Modules:
     electrics
     engine
     defaults
+    kernels
+    variations
+    buffers
+    trees
 """
 
+import functools
 import schedula as sh
+from . import defaults, variations, buffers
 
 OUTPUTS_PREDICTION_LOOP = [
     'alternator_currents',
@@ -58,6 +64,106 @@ OUTPUTS_PREDICTION_LOOP = [
 ]
 
 
+def _prediction_stages(models, outputs, times, velocities, accelerations,
+                       motive_powers, vectorize=True, kernel=False,
+                       thermal=True):
+    # Returns the recurrent stages (i.e., generators advancing one time step),
+    # the stages to compute after them, and if the final drive ratios have to
+    # be checked against the predicted gears.
+    whl_mdl, fd_mdl, gb_mdl, eng_mdl, ele_mdl = models
+
+    # The stateless stages are computed as whole arrays. Only the recurrent ones
+    # (i.e., gears, temperatures, start/stop, and state of charges) are advanced
+    # one time step at a time.
+    # The fake models (i.e., with all outputs given) are skipped, since their
+    # given arrays are already adopted as outputs (see `set_outputs`).
+    loops, post = [], []
+    if vectorize:
+        whl_mdl.calculate_results(velocities, motive_powers)
+    elif not whl_mdl.is_fake():
+        loops.append(whl_mdl.yield_results(velocities, motive_powers))
+
+    gears = gb_mdl.get_gears()
+    whl = outputs['wheel_speeds'], outputs['wheel_torques'], \
+        outputs['wheel_powers']
+    fd_vct = vectorize and fd_mdl.calculate_results(gears, *whl)
+    if not (fd_vct or fd_mdl.is_fake()):
+        loops.append(fd_mdl.yield_results(outputs['gears'], *whl))
+
+    if not gb_mdl.is_fake():
+        loops.append(gb_mdl.yield_results(
+            times, velocities, accelerations, motive_powers,
+            outputs['final_drive_speeds_in'], outputs['final_drive_powers_in']
+        ))
+
+    # With the kernel backend, the start/stop is computed beforehand when it
+    # does not depend on the other recurrences. Hence, the electrics do not
+    # feed back into the loop and they are computed afterwards.
+    on_start = not (kernel and eng_mdl.calculate_on_start(
+        times, velocities, accelerations, gears
+    ))
+    # The engine speeds are computed as a whole array, when the gear box
+    # speeds, the engine temperatures, and the engine status are known.
+    gb_s = outputs['gear_box_speeds_in']
+    eng_vct = vectorize and gb_mdl.is_fake()
+    if eng_mdl.is_fake():
+        pass
+    elif not (eng_vct and eng_mdl.calculate_results(gb_s, on_start)):
+        loops.append(eng_mdl.yield_results(
+            times, velocities, accelerations, outputs['final_drive_powers_in'],
+            outputs['gears'], gb_s, on_start=on_start, thermal=thermal
+        ))
+
+    ele = times, accelerations, outputs['on_engine'], \
+        outputs['engine_starts'], outputs['gear_box_powers_in']
+    if ele_mdl.is_fake():
+        pass
+    elif on_start:
+        loops.append(ele_mdl.yield_results(*ele))
+    else:
+        post.append(functools.partial(ele_mdl.calculate_results, *ele))
+
+    return loops, post, fd_vct and gears is None
+
+
+def _output_types(models):
+    # Types of the outputs to allocate of all models.
+    types = {}
+    for model in models:
+        types.update(model.output_types())
+    return types
+
+
+def _prediction_loop(models, times, velocities, accelerations, motive_powers,
+                     vectorize=True, kernel=False):
+    n = times.shape[0]
+    outputs = buffers.OutputsBuffer(_output_types(models), n)
+    for model in models:
+        model.set_outputs(n, outputs)
+
+    loops, post, check = _prediction_stages(
+        models, outputs, times, velocities, accelerations, motive_powers,
+        vectorize, kernel
+    )
+    for _ in zip(*loops):
+        pass
+
+    for func in post:
+        func()
+
+    if check and not models[1].check_ratio_vector(outputs['gears']):
+        return None
+    return outputs
+
+
+def _predict(models, *args):
+    kernel = defaults.dfl.functions.prediction_loop.backend == 'kernel'
+    outputs = _prediction_loop(models, *args, kernel=kernel)
+    if outputs is None:  # The final drive ratios depend on the gears.
+        outputs = _prediction_loop(models, *args, False, kernel)
+    return outputs
+
+
 def prediction_loop(
         wheels_prediction_model, final_drive_prediction_model,
         gear_box_prediction_model, engine_prediction_model,
@@ -106,38 +212,17 @@ def prediction_loop(
         Vehicle time-series
     :rtype: tuple[numpy.array]
     """
-    outputs = {}
-    n = times.shape[0]
-    wheels_prediction_model.set_outputs(n, outputs)
-    final_drive_prediction_model.set_outputs(n, outputs)
-    gear_box_prediction_model.set_outputs(n, outputs)
-    engine_prediction_model.set_outputs(n, outputs)
-    electrics_prediction_model.set_outputs(n, outputs)
-
-    whl = wheels_prediction_model.yield_results(velocities, motive_powers)
-
-    fd = final_drive_prediction_model.yield_results(
-        outputs['gears'], outputs['wheel_speeds'], outputs['wheel_torques'],
-        outputs['wheel_powers']
-    )
-
-    gb = gear_box_prediction_model.yield_results(
-        times, velocities, accelerations, motive_powers,
-        outputs['final_drive_speeds_in'], outputs['final_drive_powers_in']
-    )
-
-    eng = engine_prediction_model.yield_results(
-        times, velocities, accelerations, outputs['final_drive_powers_in'],
-        outputs['gears'], outputs['gear_box_speeds_in']
-    )
-
-    ele = electrics_prediction_model.yield_results(
-        times, accelerations, outputs['on_engine'], outputs['engine_starts'],
-        outputs['gear_box_powers_in']
+    models = (
+        wheels_prediction_model, final_drive_prediction_model,
+        gear_box_prediction_model, engine_prediction_model,
+        electrics_prediction_model
     )
-
-    for _ in zip(whl, fd, gb, eng, ele):
-        pass
+    args = times, velocities, accelerations, motive_powers
+    batcher = variations.get_batcher()
+    if batcher is None:
+        outputs = _predict(models, *args)
+    else:  # Predicted together with the other variations.
+        outputs = batcher.predict(models, *args)
 
     return sh.selector(OUTPUTS_PREDICTION_LOOP, outputs, output_type='list')
 
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+"""
+It contains the preallocated buffer of the prediction models outputs.
+
+All outputs of a cycle are stored in a single contiguous structured array,
+allocated once. Each output is a field of the array, hence the buffer is column
+oriented and the models receive zero-copy views of their outputs (see
+:func:`allocate_outputs`).
+
+The whole buffer is reachable from any of its views (i.e., `view.base`), thus
+the time-series can be exported as they are, e.g.::
+
+    >>> np.save(fpath, outputs.buffer)  # doctest: +SKIP
+    >>> ts = np.load(fpath, mmap_mode='r')  # doctest: +SKIP
+    >>> ts['gears']  # doctest: +SKIP
+
+.. note:: The outputs given to the models (e.g., by the fake models) are
+   adopted as they are, hence they are not stored in the buffer.
+"""
+
+import numpy as np
+
+
+class OutputsBuffer(dict):
+    """
+    Outputs of the prediction models, stored in a single preallocated buffer.
+
+    :param types:
+        Type of each output.
+    :type types: dict[str, type]
+
+    :param n:
+        Number of time steps.
+    :type n: int
+
+    :param size:
+        Number of variations (see :mod:`co2mpas.model.physical.variations`). If
+        given, each field has shape (size, n).
+    :type size: int, optional
+    """
+
+    def __init__(self, types, n, size=None):
+        super(OutputsBuffer, self).__init__()
+        shape = (n,) if size is None else (size, n)
+        dtype = np.dtype([(k, t, shape) for k, t in sorted(types.items())])
+        #: Contiguous structured array with all outputs.
+        self.buffer = np.empty((), dtype)
+        #: Named views of the buffer.
+        self.fields = {k: self.buffer[k] for k in dtype.names}
+
+    def __reduce__(self):
+        # Pickled as a plain dict (i.e., without the buffer), since the models
+        # keep a reference to their outputs.
+        return dict, (dict(self),)
+
+    def row(self, i):
+        """
+        Returns the outputs of the `i`-th variation.
+
+        :param i:
+            Variation index.
+        :type i: int
+
+        :return:
+            Outputs whose views are the `i`-th rows of the buffer.
+        :rtype: OutputsBuffer
+        """
+        outputs = dict.__new__(OutputsBuffer)
+        outputs.buffer = self.buffer
+        outputs.fields = {k: v[i] for k, v in self.fields.items()}
+        return outputs
+
+    def views(self, names, n, dtype):
+        """
+        Returns the views of the outputs.
+
+        :param names:
+            Output names.
+        :type names: collections.Iterable[str]
+
+        :param n:
+            Number of time steps.
+        :type n: int
+
+        :param dtype:
+            Output type.
+        :type dtype: type
+
+        :return:
+            Views of the outputs (new arrays if they are not in the buffer).
+        :rtype: list[numpy.array]
+        """
+        views, dtype = [], np.dtype(dtype)
+        for k in names:
+            v = self.fields.get(k)
+            if v is None or v.shape != (n,) or v.dtype != dtype:
+                v = np.empty(n, dtype)
+            views.append(v)
+        return views
+
+
+# noinspection PyMissingOrEmptyDocstring,PyUnresolvedReferences
+class OutputsMixin:
+    """
+    Outputs of a prediction model that can be partially given.
+
+    The model defines its `key_outputs` and their `types`, and it keeps the
+    given outputs in `_outputs`.
+    """
+
+    def is_fake(self):
+        # Are all outputs given (i.e., nothing to predict)?
+        return not set(self.key_outputs) - set(self._outputs or {})
+
+    def output_types(self):
+        # Types of the outputs to allocate (i.e., not given).
+        given = set(self._outputs or {})
+        return {k: t for t, names in self.types.items()
+                for k in names - given}
+
+
+def allocate_outputs(outputs, names, n, dtype):
+    """
+    Allocates the outputs of a prediction model.
+
+    :param outputs:
+        Outputs of the prediction models.
+    :type outputs: dict | OutputsBuffer
+
+    :param names:
+        Output names.
+    :type names: set[str]
+
+    :param n:
+        Number of time steps.
+    :type n: int
+
+    :param dtype:
+        Output type.
+    :type dtype: type
+    """
+    names = sorted(names)
+    if isinstance(outputs, OutputsBuffer):
+        views = outputs.views(names, n, dtype)
+    else:
+        views = np.empty((len(names), n), dtype=dtype)
+    outputs.update(zip(names, views))
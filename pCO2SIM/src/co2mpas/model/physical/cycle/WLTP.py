@@ -15,12 +15,20 @@ import wltp.experiment as wltp_exp
 import wltp.model as wltp_mdl
 import schedula as sh
 import logging
+import collections
 import copy
+import hashlib
+import pickle
+import threading
 import numpy as np
 logging.getLogger('wltp.experiment').setLevel(logging.WARNING)
 
 log = logging.getLogger(__name__)
 
+#: Gear shifting profiles computed by `wltp_gears` (content key --> gears).
+_WLTP_GEARS = collections.OrderedDict()
+_WLTP_GEARS_LOCK = threading.Lock()  # The variations run on threads.
+
 
 def calculate_max_speed_velocity_ratio(speed_velocity_ratios):
     """
@@ -211,6 +219,23 @@ def wltp_velocities(
     return v
 
 
+def _content_key(*args):
+    # Digest of the values (arrays are hashed by dtype, shape, and data).
+    h = hashlib.sha1()
+    for v in args:
+        if isinstance(v, np.ndarray):
+            h.update(repr((v.dtype.str, v.shape)).encode())
+            h.update(np.ascontiguousarray(v).tobytes())
+        elif isinstance(v, dict):
+            h.update(b'dict')
+            for k, i in v.items():
+                h.update(pickle.dumps(k, 2))
+                h.update(_content_key(i).encode())
+        else:
+            h.update(pickle.dumps(v, 2))
+    return h.hexdigest()
+
+
 def wltp_gears(
         full_load_curve, velocities, accelerations, motive_powers,
         speed_velocity_ratios, idle_engine_speed, engine_speed_at_max_power,
@@ -292,22 +317,44 @@ def wltp_gears(
     else:
         vel = velocities
 
-    res = wltp_exp.run_cycle(
-        vel, accelerations, motive_powers, svr, idle_engine_speed[0],
-        n_min_drive, engine_speed_at_max_power, engine_max_power,
-        load_curve, wltp_base_model)
-
-    if initial_gears:
-        gears = initial_gears.copy()
-    else:
+    from ..defaults import dfl
+    cache_size = dfl.functions.wltp_gears.cache_size
+    key = cache_size and _content_key(
+        vel, accelerations, motive_powers, svr, idle, n_min_drive,
+        engine_speed_at_max_power, engine_max_power, load_curve,
+        wltp_base_model, initial_gears
+    )
+    with _WLTP_GEARS_LOCK:
+        gears = _WLTP_GEARS.get(key)
+        if gears is not None:
+            _WLTP_GEARS.move_to_end(key)
+            gears = gears.copy()
+
+    if gears is None:
+        res = wltp_exp.run_cycle(
+            vel, accelerations, motive_powers, svr, idle, n_min_drive,
+            engine_speed_at_max_power, engine_max_power, load_curve,
+            wltp_base_model)
+
+        if initial_gears:
+            gears = initial_gears.copy()
+        else:
+            # noinspection PyUnresolvedReferences
+            gears = res[0]
+
+        # Apply Driveability-rules.
         # noinspection PyUnresolvedReferences
-        gears = res[0]
+        wltp_exp.applyDriveabilityRules(
+            vel, accelerations, gears, res[1], res[-1]
+        )
 
-    # Apply Driveability-rules.
-    # noinspection PyUnresolvedReferences
-    wltp_exp.applyDriveabilityRules(vel, accelerations, gears, res[1], res[-1])
+        gears[gears < 0] = 0
+        if cache_size:
+            with _WLTP_GEARS_LOCK:
+                _WLTP_GEARS[key] = gears.copy()
+                while len(_WLTP_GEARS) > cache_size:
+                    _WLTP_GEARS.popitem(last=False)
 
-    gears[gears < 0] = 0
     log.warning('The WLTP gear-shift profile generation is for engineering '
                 'purposes and the results are by no means valid according to '
                 'the legislation.\nActually they are calculated based on a pre '
@@ -289,6 +289,12 @@ class Functions(co2_utl.Constants):
         #: Enable optimization loop?
         ENABLE_OPT_LOOP = False
 
+        #: Evaluate the optimization loop on whole arrays when the gear
+        #: corrections are stateless? It calibrates the same limits, on the
+        #: demo vehicle (wltp_l) in 0.44 s instead of 9.4 s with the full
+        #: load correction, and in 0.27 s instead of 1.3 s without it [-].
+        VECTORIZE_OPT_LOOP = True
+
     class default_start_stop_activation_time(co2_utl.Constants):
         #: Enable function?
         ENABLE = False
@@ -432,6 +438,35 @@ class Functions(co2_utl.Constants):
         #: Projection factor from the row frontal area (h * w) [-].
         projection_factor = 0.84
 
+    class model(co2_utl.Constants):
+        #: Executor of the independent cycle sub-models: 'sync' (in the
+        #: current process) or 'parallel' (in worker processes) [-].
+        executor = 'sync'
+
+        #: Maximum number of worker processes of the 'parallel' executor. If
+        #: None, it is the number of processors [-].
+        n_workers = None
+
+    class prediction_loop(co2_utl.Constants):
+        #: Backend of the recurrent stages of the prediction loop: 'generator'
+        #: (nested Python generators) or 'kernel' (compiled kernels on the
+        #: preallocated arrays, see :mod:`co2mpas.model.physical.kernels`) [-].
+        backend = 'generator'
+
+    class make_simulation_plan(co2_utl.Constants):
+        #: Maximum number of plan variations (of the same base) that change
+        #: only scalar parameters to simulate together. Their prediction loops
+        #: on the same cycle are computed together (see
+        #: :mod:`co2mpas.model.physical.variations`). If 1, the variations are
+        #: simulated one by one [-].
+        batch_size = 1
+
+    class wltp_gears(co2_utl.Constants):
+        #: Maximum number of WLTP gear shifting profiles cached by content of
+        #: the inputs (velocities, powers, gear box, and engine data). If 0,
+        #: the cache is disabled [-].
+        cache_size = 32
+
     class select_prediction_data(co2_utl.Constants):
         #: If True the theoretical WLTP will be predicted, otherwise the driven.
         theoretical = True
@@ -549,6 +584,29 @@ class Functions(co2_utl.Constants):
         #: Max standard deviation percentage of median value [-].
         MAX_STD_PERC = 0.3
 
+    class XGBRegressor(co2_utl.Constants):
+        #: Number of threads of the boosted trees calibrations (i.e., engine
+        #: temperature and alternator current models). If None, they use all
+        #: processors. The samples are few, hence set it to 1 when several
+        #: vehicles run per node (on a single processor 1 is ~10% faster) [-].
+        n_jobs = None
+
+        #: Fraction of the calibration samples held out to stop early the
+        #: boosting. If 0, all samples are used and the boosting is not
+        #: stopped. With 0.2, the demo vehicle calibrates these models ~3x
+        #: faster, with CO2 emission errors within ±0.05 g/km [-].
+        validation_fraction = 0
+
+        #: Number of boosting rounds without improvement on the held out
+        #: samples that stops the boosting [-].
+        n_iter_no_change = 10
+
+    class ThermalModel(co2_utl.Constants):
+        #: Maximum number of RANSAC trials to calibrate the engine temperature
+        #: regression model. With 3, the demo vehicle calibrates it ~30%
+        #: faster, with CO2 emission errors within ±0.03 g/km [-].
+        max_trials = 10
+
     class StartStopModel(co2_utl.Constants):
         #: Maximum allowed velocity to stop the engine [km/h].
         stop_velocity = 2.0
@@ -635,6 +693,22 @@ class Functions(co2_utl.Constants):
         #: Specific gear shifting model.
         SPECIFIC_GEAR_SHIFTING = 'ALL'
 
+    class at_gear(co2_utl.Constants):
+        #: Executor of the calibrations of the competing gear shifting models
+        #: (CMV, CMV_Cold_Hot, DTGS, GSPV, GSPV_Cold_Hot): 'sync' (in the
+        #: current process) or 'parallel' (in worker processes). On a single
+        #: processor the calibrations cannot overlap: on the demo vehicle
+        #: (wltp_l) 'parallel' takes 1.02 s instead of 0.85 s [-].
+        executor = 'sync'
+
+        #: Maximum number of worker processes of the 'parallel' executor. If
+        #: None, it is the number of processors [-].
+        n_workers = None
+
+        #: Gear shifting models that are not calibrated when the specific gear
+        #: shifting model is 'ALL' [-].
+        disabled_models = ()
+
     class default_clutch_k_factor_curve(co2_utl.Constants):
         #: Torque ratio when speed ratio==0 for clutch model.
         STAND_STILL_TORQUE_RATIO = 1.0
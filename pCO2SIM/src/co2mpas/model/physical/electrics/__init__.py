@@ -32,6 +32,8 @@ import sklearn.metrics as sk_met
 import sklearn.cluster as sk_clu
 import schedula as sh
 import co2mpas.utils as co2_utl
+from ..buffers import allocate_outputs, OutputsMixin
+from ..trees import compile_xgboost, xgb_regressor
 
 
 def calculate_engine_start_demand(
@@ -461,27 +463,44 @@ def define_alternator_current_model(alternator_charging_currents):
 # noinspection PyMissingOrEmptyDocstring,PyPep8Naming
 class AlternatorCurrentModel(object):
     def __init__(self, alternator_charging_currents=(0, 0)):
-        def default_model(X):
-            time, prev_soc, alt_status, gb_power, acc = X.T
-            b = gb_power > 0 or (gb_power == 0 and acc >= 0)
-
-            return np.where(b, *alternator_charging_currents)
-
-        self.model = default_model
+        self.alternator_charging_currents = alternator_charging_currents
+        self.model = self.default_model
         self.mask = None
-        self.init_model = default_model
+        self.init_model = self.default_model
         self.init_mask = None
-        self.base_model = xgb.XGBRegressor
-
-    def predict(self, X, init_time=0.0):
-        X = np.asarray(X)
-        times = X[:, 0]
-        b = times < (times[0] + init_time)
-        curr = np.zeros_like(times, dtype=float)
-        curr[b] = self.init_model(X[b][:, self.init_mask])
-        b = ~b
-        curr[b] = self.model(X[b][:, self.model])
-        return curr
+        self.trees = self.init_trees = None  # Compiled models.
+        self.base_model = xgb_regressor
+
+    def default_model(self, X):
+        time, prev_soc, alt_status, gb_power, acc = X.T
+        b = (gb_power > 0) | ((gb_power == 0) & (acc >= 0))
+
+        return np.where(b, *self.alternator_charging_currents)
+
+    # noinspection PyUnusedLocal
+    @staticmethod
+    def zero_model(*args, **kwargs):
+        return [0.0]
+
+    def _models(self):
+        # Initialization and normal models, with their compiled trees (if any).
+        init, trees = getattr(self, 'init_trees', None), \
+            getattr(self, 'trees', None)
+        return (self.init_model, self.init_mask, init), \
+               (self.model, self.mask, trees)
+
+    def predict(self, X):
+        # Vectorized `__call__` of several samples (time, soc, status, *args).
+        X = np.asarray(X, dtype=float)
+        curr, init = np.empty(X.shape[0]), X[:, 2] == 3
+        for b, (model, mask, trees) in zip((init, ~init), self._models()):
+            if not b.any():
+                continue
+            elif trees is None:
+                curr[b] = model(X[b] if mask is None else X[b][:, mask])
+            else:
+                curr[b] = trees.predict(X[b])
+        return np.minimum(curr, 0.0)
 
     # noinspection PyShadowingNames
     def fit(self, currents, on_engine, times, soc, statuses, *args,
@@ -495,7 +514,7 @@ class AlternatorCurrentModel(object):
         elif b[:i].any():
             self.model, self.mask = self._fit_model(spl[b])
         else:
-            self.model = lambda *args, **kwargs: [0.0]
+            self.model = self.zero_model
             self.mask = np.array((0,))
         self.mask += 1
 
@@ -507,6 +526,13 @@ class AlternatorCurrentModel(object):
         else:
             self.init_model, self.init_mask = self.model, self.mask
 
+        # The models are the `predict` methods of the regressors.
+        self.trees = compile_xgboost(
+            getattr(self.model, '__self__', None), self.mask
+        )
+        self.init_trees = compile_xgboost(
+            getattr(self.init_model, '__self__', None), self.init_mask
+        )
         return self
 
     def _fit_model(self, spl, in_mask=(), out_mask=()):
@@ -528,10 +554,12 @@ class AlternatorCurrentModel(object):
         return model.steps[-1][-1].predict, mask
 
     def __call__(self, time, soc, status, *args):
+        init, normal = self._models()
+        model, mask, trees = init if status == 3 else normal
+        if trees is not None:
+            return min(0.0, trees.predict_one(time, soc, status, *args))
         arr = np.array([(time, soc, status) + args])
-        if status == 3:
-            return min(0.0, self.init_model(arr[:, self.init_mask])[0])
-        return min(0.0, self.model(arr[:, self.mask])[0])
+        return min(0.0, model(arr if mask is None else arr[:, mask])[0])
 
 
 def calibrate_alternator_current_model(
@@ -844,7 +872,7 @@ class Alternator_status_model(object):
 
                 threshold = min(threshold, np.percentile(gb_p_s, q))
 
-        self.bers = lambda x: np.asarray(x) < threshold
+        self.bers = functools.partial(np.greater, threshold)  # x < threshold.
         return self.bers
 
     # noinspection PyShadowingNames
@@ -858,7 +886,11 @@ class Alternator_status_model(object):
             charge.fit(X, b)
             self.charge = charge.predict
         else:
-            self.charge = lambda X: np.zeros(len(X), dtype=bool)
+            self.charge = self.no_charge
+
+    @staticmethod
+    def no_charge(X):
+        return np.zeros(len(X), dtype=bool)
 
     def _fit_boundaries(self, alternator_statuses, state_of_charges, times):
         n, b = len(alternator_statuses), alternator_statuses == 1
@@ -1067,7 +1099,7 @@ def identify_state_of_charge_balance_and_window(alternator_status_model):
 
 
 # noinspection PyMissingOrEmptyDocstring
-class ElectricModel(object):
+class ElectricModel(OutputsMixin):
     key_outputs = [
         'alternator_currents', 'alternator_statuses', 'battery_currents',
         'state_of_charges'
@@ -1114,7 +1146,7 @@ class ElectricModel(object):
         for t, names in self.types.items():
             names = names - set(outputs)
             if names:
-                outputs.update(zip(names, np.empty((len(names), n), dtype=t)))
+                allocate_outputs(outputs, names, n, t)
             if 'state_of_charges' in names:
                 outputs['state_of_charges'][0] = self.initial_state_of_charge
             if 'alternator_statuses' in names:
@@ -1213,6 +1245,60 @@ class ElectricModel(object):
                 pass
             yield alt_current, alt_status, bat_current, soc
 
+    def calculate_results(self, times, accelerations, on_engine, engine_starts,
+                          gear_box_powers_in):
+        # Advances the recurrence on the preallocated arrays (no generators),
+        # when the engine status and starts are known for the whole cycle.
+        args = times, accelerations, on_engine, engine_starts, \
+            gear_box_powers_in
+        if set(self.key_outputs).intersection(self._outputs or {}):
+            for _ in self.yield_results(*args):
+                pass
+            return
+
+        from .electrics_prediction import (
+            calculate_alternator_current, calculate_battery_current,
+            calculate_battery_state_of_charge
+        )
+        from ..kernels import calculate_engine_start_currents
+        outputs, dts = self.outputs, np.ediff1d(times, to_begin=[0])
+        statuses = outputs['alternator_statuses']
+        alt_currents = outputs['alternator_currents']
+        bat_currents = outputs['battery_currents']
+        socs = outputs['state_of_charges']
+        start_currents = calculate_engine_start_currents(
+            engine_starts, dts, self.start_demand,
+            self.alternator_nominal_voltage
+        )
+        alt_st_mdl = functools.partial(
+            self.alternator_status_model, self.has_energy_recuperation,
+            self.alternator_initialization_time
+        )
+        alt_mdl, max_alt_c = self.alternator_current_model, \
+            self.max_alternator_current
+        load, nom_v, cap = self.electric_load, \
+            self.alternator_nominal_voltage, self.battery_capacity
+        max_bat_c, n = self.max_battery_charging_current, times.shape[0]
+        for i in range(n):
+            t, on_eng, gbp, soc = times[i], on_engine[i], \
+                gear_box_powers_in[i], socs[i]
+            alt_status = alt_st_mdl(t, statuses[max(i - 1, 0)], soc, gbp)
+            alt_currents[i] = calculate_alternator_current(
+                alt_status, on_eng, gbp, max_alt_c, alt_mdl,
+                start_currents[i], soc, accelerations[i], t
+            )
+            statuses[i] = int(alt_status)
+
+            bc = calculate_battery_current(
+                load, alt_currents[i], nom_v, on_eng, max_bat_c
+            )
+            soc = calculate_battery_state_of_charge(
+                soc, cap, dts[i], bc, bat_currents[i - 1] if i else None
+            )
+            bat_currents[i] = bc
+            if i + 1 < n:
+                socs[i + 1] = soc
+
 
 def define_electrics_prediction_model(
         battery_capacity, alternator_status_model, max_alternator_current,
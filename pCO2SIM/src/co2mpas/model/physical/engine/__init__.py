@@ -31,6 +31,7 @@ import schedula as sh
 import co2mpas.utils as co2_utl
 import functools
 import scipy.interpolate as sci_itp
+from ..buffers import allocate_outputs, OutputsMixin
 
 
 def calculate_engine_mass(ignition_type, engine_max_power):
@@ -1069,7 +1070,7 @@ def identify_idle_engine_speed():
 
 
 # noinspection PyMissingOrEmptyDocstring
-class EngineModel:
+class EngineModel(OutputsMixin):
     key_outputs = [
         'on_engine', 'engine_starts', 'engine_speeds_out_hot',
         'engine_coolant_temperatures'
@@ -1103,6 +1104,11 @@ class EngineModel:
             state_of_charges, gears
         )
 
+    def calculate_on_start(self, times, velocities, accelerations, gears=None):
+        return self.start_stop_prediction_model.calculate_results(
+            times, velocities, accelerations, gears
+        )
+
     def yield_speed(self, on_engine, gear_box_speeds_in):
         key = 'engine_speeds_out_hot'
         if self._outputs is not None and key in self._outputs:
@@ -1118,6 +1124,40 @@ class EngineModel:
             times, accelerations, final_drive_powers_in, engine_speeds_out_hot
         )
 
+    def is_fake(self):
+        # Are all outputs given (i.e., nothing to predict)?
+        given = set(self._outputs or {})
+        for mdl in (self.start_stop_prediction_model,
+                    self.engine_temperature_prediction_model):
+            given.update(mdl._outputs or {})
+        return not set(self.key_outputs) - given
+
+    def output_types(self):
+        # Types of the outputs to allocate (i.e., not given).
+        types = self.engine_temperature_prediction_model.output_types()
+        types.update(self.start_stop_prediction_model.output_types())
+        for t, names in self.types.items():
+            for k in names - set(self._outputs or {}):
+                types.setdefault(k, t)
+        return types
+
+    def calculate_results(self, gear_box_speeds_in, on_start=True):
+        # Whole array version of `yield_results`, when the engine temperatures
+        # are given and the engine status is given or already computed (i.e.,
+        # `on_start` is False). Then, nothing is recurrent.
+        ss_mdl = self.start_stop_prediction_model
+        if not self.engine_temperature_prediction_model.is_fake() or \
+                (on_start and not ss_mdl.is_fake()):
+            return False
+
+        if 'engine_speeds_out_hot' not in (self._outputs or {}):
+            s, idle = gear_box_speeds_in, self.idle_engine_speed[0]
+            # Same as `max(idle, s)` of `calculate_engine_speeds_out_hot`.
+            self.outputs['engine_speeds_out_hot'][:] = np.where(
+                self.outputs['on_engine'], np.where(s > idle, s, idle), 0
+            )
+        return True
+
     def set_outputs(self, n, outputs=None):
         if outputs is None:
             outputs = {}
@@ -1127,28 +1167,36 @@ class EngineModel:
         for t, names in self.types.items():
             names = names - set(outputs)
             if names:
-                outputs.update(zip(names, np.empty((len(names), n), dtype=t)))
+                allocate_outputs(outputs, names, n, t)
 
         self.outputs = outputs
 
     def yield_results(self, times, velocities, accelerations,
-                      final_drive_powers_in, gears, gear_box_speeds_in):
+                      final_drive_powers_in, gears, gear_box_speeds_in,
+                      on_start=True, thermal=True):
         outputs = self.outputs
 
-        ss_gen = self.yield_on_start(
-            times, velocities, accelerations,
-            outputs['engine_coolant_temperatures'], outputs['state_of_charges'],
-            gears
-        )
+        if on_start:
+            ss_gen = self.yield_on_start(
+                times, velocities, accelerations,
+                outputs['engine_coolant_temperatures'],
+                outputs['state_of_charges'], gears
+            )
+        else:  # Already computed (see `calculate_on_start`).
+            ss_gen = zip(outputs['on_engine'], outputs['engine_starts'])
 
         s_gen = self.yield_speed(outputs['on_engine'], gear_box_speeds_in)
 
-        t_gen = self.yield_thermal(
-            times, accelerations, final_drive_powers_in,
-            outputs['engine_speeds_out_hot']
-        )
         eng_temp = outputs['engine_coolant_temperatures']
-        eng_temp[0] = next(t_gen)
+        if thermal:
+            t_gen = self.yield_thermal(
+                times, accelerations, final_drive_powers_in,
+                outputs['engine_speeds_out_hot']
+            )
+            eng_temp[0] = next(t_gen)
+        else:  # Advanced by the caller (see `batch_prediction_loop`).
+            t_gen = None
+
         for i, on_eng in enumerate(ss_gen):
             # if e[-1] < min_soc and not on_eng[0]:
             #    on_eng[0], on_eng[1] = True, not eng[0]
@@ -1156,10 +1204,11 @@ class EngineModel:
             outputs['on_engine'][i], outputs['engine_starts'][i] = on_eng
 
             outputs['engine_speeds_out_hot'][i] = eng_s = next(s_gen)
-            try:
-                eng_temp[i + 1] = next(t_gen)
-            except IndexError:
-                pass
+            if t_gen is not None:
+                try:
+                    eng_temp[i + 1] = next(t_gen)
+                except (IndexError, StopIteration):  # Last time step.
+                    pass
             yield on_eng[0], on_eng[1], eng_s, eng_temp[i]
 
 
@@ -15,6 +15,8 @@ import sklearn.feature_selection as sk_fsel
 import numpy as np
 import co2mpas.model.physical.defaults as defaults
 import schedula as sh
+from ..buffers import allocate_outputs, OutputsMixin
+from ..trees import compile_decision_tree
 
 
 def identify_on_engine(
@@ -138,6 +140,17 @@ def calibrate_start_stop_model(
     return model
 
 
+def _predict_one(tree, model):
+    # Predicts one sample with the compiled tree, otherwise with the model.
+    if tree is not None:
+        return tree.predict_one
+
+    def predict(*x):
+        return model.predict([x])[0]
+
+    return predict
+
+
 # noinspection PyShadowingBuiltins,PyUnusedLocal,PyMissingOrEmptyDocstring
 class StartStopModel(object):
     VEL = defaults.dfl.functions.StartStopModel.stop_velocity
@@ -157,10 +170,15 @@ class StartStopModel(object):
             random_state=0, max_depth=3
         )
         model.fit(np.column_stack((velocities, accelerations)), on_engine)
-        predict = model.predict
+        self.set_simple(compile_decision_tree(model), model)
+
+    def set_simple(self, tree, model=None):
+        # Sets the compiled tree of the simple model (or the model, if the tree
+        # is None).
+        self._simple, predict = tree, _predict_one(tree, model)
 
         def simple(velocity, acceleration, *a):
-            return predict([[velocity, acceleration]])[0]
+            return predict(velocity, acceleration)
 
         self.simple = simple
 
@@ -176,10 +194,15 @@ class StartStopModel(object):
             velocities, accelerations, engine_coolant_temperatures,
             state_of_charges
         )), on_engine)
-        predict = model.predict
+        self.set_complex(compile_decision_tree(model), model)
+
+    def set_complex(self, tree, model=None):
+        # Sets the compiled tree of the complex model (or the model, if the
+        # tree is None).
+        self._complex, predict = tree, _predict_one(tree, model)
 
         def complex(velocity, acceleration, temperature, prev_soc):
-            return predict([[velocity, acceleration, temperature, prev_soc]])[0]
+            return predict(velocity, acceleration, temperature, prev_soc)
 
         self.complex = complex
 
@@ -193,9 +216,18 @@ class StartStopModel(object):
                              engine_coolant_temperatures, state_of_charges)
         return self
 
+    def predictions(self, velocities, accelerations, basic=True):
+        # Predictions of the (basic) model as a whole array, None if unknown.
+        predict = self.simple if basic else self.complex
+        if predict == self.base:
+            return self.base(velocities, accelerations)
+        model = getattr(self, '_simple', None) if basic else None
+        if model is not None:
+            return model.predict(np.column_stack((velocities, accelerations)))
+
 
 # noinspection PyMissingOrEmptyDocstring
-class EngineStartStopModel:
+class EngineStartStopModel(OutputsMixin):
     key_outputs = ['on_engine', 'engine_starts']
     types = {bool: {'on_engine', 'engine_starts'}}
 
@@ -226,9 +258,43 @@ class EngineStartStopModel:
         for t, names in self.types.items():
             names = names - set(outputs)
             if names:
-                outputs.update(zip(names, np.empty((len(names), n), dtype=t)))
+                allocate_outputs(outputs, names, n, t)
         self.outputs = outputs
 
+    def calculate_results(self, times, velocities, accelerations, gears=None):
+        # Computes the whole start/stop with a compiled kernel, when it does
+        # not depend on the engine temperatures and the state of charges.
+        keys = ['on_engine', 'engine_starts']
+        if self._outputs is not None and not (set(keys) - set(self._outputs)):
+            return True
+        outputs = self.outputs
+        if not self.has_start_stop:
+            outputs['on_engine'][:], outputs['engine_starts'][:] = True, False
+            return True
+
+        if not self.correct_start_stop_with_gears:
+            forced_on = np.zeros_like(times, dtype=bool)
+        elif gears is None:
+            return False
+        else:
+            forced_on = gears > 0
+
+        mdl = self.start_stop_model
+        predictions = mdl.predictions(
+            velocities, accelerations, self.use_basic_start_stop
+        )
+        if predictions is None:
+            return False
+
+        from ..kernels import calculate_start_stop_states
+        calculate_start_stop_states(
+            times, mdl.base(velocities, accelerations), predictions, forced_on,
+            self.start_stop_activation_time,
+            self.min_time_engine_on_after_start, outputs['on_engine'],
+            outputs['engine_starts']
+        )
+        return True
+
     def yield_results(self, times, velocities, accelerations,
                       engine_coolant_temperatures, state_of_charges,
                       gears=None):
@@ -246,12 +312,18 @@ class EngineStartStopModel:
                 yield True, start
         else:
             outputs, t_switch_on, can_off = self.outputs, times[0], False
-            base = self.start_stop_model.base
-
+            mdl = self.start_stop_model
+
+            # The models that do not depend on the engine temperatures and the
+            # state of charges are computed on the whole cycle.
+            base = mdl.base(velocities, accelerations)
+            predictions = mdl.predictions(
+                velocities, accelerations, self.use_basic_start_stop
+            )
             if self.use_basic_start_stop:
-                predict = self.start_stop_model.simple
+                predict = mdl.simple
             else:
-                predict = self.start_stop_model.complex
+                predict = mdl.complex
 
             it = enumerate(zip(times, zip(
                 velocities, accelerations, engine_coolant_temperatures,
@@ -265,7 +337,7 @@ class EngineStartStopModel:
                         can_off = False
 
                     if not can_off:
-                        can_off = base(*v)
+                        can_off = base[i]
 
                     prev = outputs['on_engine'].take(i - 1, mode='clip')
 
@@ -276,7 +348,9 @@ class EngineStartStopModel:
                      or \
                      not (can_off and t >= t_switch_on) \
                      or \
-                     ((prev or base(*v)) and predict(*v))
+                     ((prev or base[i]) and (
+                         predict(*v) if predictions is None else predictions[i]
+                     ))
                 outputs['on_engine'][i] = on
                 outputs['engine_starts'][i] = start = on and prev != on
                 yield on, start
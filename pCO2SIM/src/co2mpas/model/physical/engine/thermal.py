@@ -14,13 +14,14 @@ import itertools
 from sklearn.linear_model import RANSACRegressor
 
 import co2mpas.utils as co2_utl
-import xgboost as xgb
 import numpy as np
 import schedula as sh
 # noinspection SpellCheckingInspection
 import sklearn.feature_selection as sk_fsel
 import sklearn.pipeline as sk_pip
 from ..defaults import dfl
+from ..buffers import allocate_outputs, OutputsMixin
+from ..trees import compile_xgboost, xgb_regressor
 
 
 def calculate_engine_temperature_derivatives(
@@ -161,7 +162,8 @@ class ThermalModel(object):
         self.mask = None
         self.cold = default_model
         self.mask_cold = None
-        self.base_model = xgb.XGBRegressor
+        self.trees = self.cold_trees = None  # Compiled models.
+        self.base_model = xgb_regressor
         self.thermostat = thermostat
         self.min_temp = -float('inf')
 
@@ -212,7 +214,7 @@ class ThermalModel(object):
             base_estimator=self.base_model(**opt),
             random_state=0,
             min_samples=0.85,
-            max_trials=10
+            max_trials=dfl.functions.ThermalModel.max_trials
         )
 
         model = sk_pip.Pipeline([
@@ -224,6 +226,7 @@ class ThermalModel(object):
 
         self.model = model.steps[-1][-1]
         self.mask = np.where(model.steps[0][-1]._get_support_mask())[0]
+        self.trees = compile_xgboost(self.model, self.mask)
 
         self.min_temp = spl[:, 0].min()
         spl = spl[:co2_utl.argmax(self.thermostat <= spl[:, 0])]
@@ -246,6 +249,7 @@ class ThermalModel(object):
         model.fit(spl[:, 1:-1], spl[:, -1])
         self.cold = model.steps[-1][-1]
         self.mask_cold = np.where(model.steps[0][-1]._get_support_mask())[0] + 1
+        self.cold_trees = compile_xgboost(self.cold, self.mask_cold)
 
         return self
 
@@ -254,7 +258,7 @@ class ThermalModel(object):
         t_max, t_min = spl[:, -1].max(), spl[:, -1].min()
         spl = spl[(t_max - (t_max - t_min) / 3) <= spl[:, -1]]
 
-        model = xgb.XGBRegressor(random_state=0)
+        model = self.base_model(random_state=0)
         model.fit(spl[:, :-1], spl[:, -1])
         ratio = np.arange(1, 1.5, 0.1) * idle_engine_speed[0]
         spl = np.zeros((len(ratio), 4))
@@ -271,18 +275,37 @@ class ThermalModel(object):
 
         return temp
 
-    def delta(self, dt, *args, prev_temperature=23, max_temp=100.0):
-        if prev_temperature < self.min_temp:
-            model, mask = self.cold, self.mask_cold
-        else:
-            model, mask = self.model, self.mask
+    def _models(self):
+        # Cold and hot models, with their compiled trees (if any).
+        cold, hot = getattr(self, 'cold_trees', None), \
+            getattr(self, 'trees', None)
+        return (self.cold, self.mask_cold, cold), (self.model, self.mask, hot)
 
-        delta_temp = self._derivative(model, mask, prev_temperature, *args) * dt
+    def delta(self, dt, *args, prev_temperature=23, max_temp=100.0):
+        cold, hot = self._models()
+        model = cold if prev_temperature < self.min_temp else hot
+        delta_temp = self._derivative(*model, prev_temperature, *args) * dt
         return min(delta_temp, max_temp - prev_temperature)
 
+    def deltas(self, dt, *args, prev_temperatures=23, max_temp=100.0):
+        # Vectorized `delta` of several engines (e.g., variations of a plan).
+        prev = np.asarray(prev_temperatures, dtype=float)
+        x = np.column_stack(np.broadcast_arrays(prev, *args))
+        delta_temp, cold = np.empty_like(prev), prev < self.min_temp
+        for b, (model, mask, trees) in zip((cold, ~cold), self._models()):
+            if not b.any():
+                continue
+            elif trees is None:
+                delta_temp[b] = model.predict(x[b][:, mask])
+            else:
+                delta_temp[b] = trees.predict(x[b])
+        return np.minimum(delta_temp * dt, max_temp - prev)
+
     @staticmethod
-    def _derivative(model, mask, *args):
-        return model.predict(np.array([args])[:, mask])[0]
+    def _derivative(model, mask, trees, *args):
+        if trees is None:
+            return model.predict(np.array([args])[:, mask])[0]
+        return trees.predict_one(*args)
 
 
 def calibrate_engine_temperature_regression_model(
@@ -340,7 +363,7 @@ def calibrate_engine_temperature_regression_model(
 
 
 # noinspection PyMissingOrEmptyDocstring
-class EngineTemperatureModel:
+class EngineTemperatureModel(OutputsMixin):
     key_outputs = ['engine_coolant_temperatures']
     types = {float: {'engine_coolant_temperatures'}}
 
@@ -368,7 +391,7 @@ class EngineTemperatureModel:
         for t, names in self.types.items():
             names = names - set(outputs)
             if names:
-                outputs.update(zip(names, np.empty((len(names), n), dtype=t)))
+                allocate_outputs(outputs, names, n, t)
             if 'engine_coolant_temperatures' in names:
                 eng_t = self.initial_engine_temperature
                 outputs['engine_coolant_temperatures'][0] = eng_t
@@ -13,6 +13,7 @@ import schedula as sh
 import logging
 import collections
 import numpy as np
+from .buffers import allocate_outputs, OutputsMixin
 
 log = logging.getLogger(__name__)
 
@@ -255,7 +256,7 @@ def is_cvt(gear_box_type, *args):
 
 
 # noinspection PyMissingOrEmptyDocstring
-class FinalDriveModel:
+class FinalDriveModel(OutputsMixin):
     key_outputs = [
         'final_drive_ratio_vector',
         'final_drive_speeds_in',
@@ -304,6 +305,17 @@ class FinalDriveModel:
             for v in zip(final_drive_speeds_out, final_drive_ratio_vector):
                 yield calculate_final_drive_speeds_in(*v)
 
+    def _torque_losses_function(self):
+        if self.final_drive_torque_loss:
+            # noinspection PyUnusedLocal
+            def t_loss(*args):
+                return self.final_drive_torque_loss
+        else:
+            t_loss = _compile_torque_losses_function(
+                self.n_wheel_drive, self.final_drive_efficiency
+            )
+        return t_loss
+
     def yield_torque(self, final_drive_torques_out, final_drive_ratio_vector):
         keys = ['final_drive_torque_losses', 'final_drive_torques_in']
 
@@ -312,14 +324,7 @@ class FinalDriveModel:
                 keys, self._outputs, output_type='list'
             ))
         else:
-            if self.final_drive_torque_loss:
-                # noinspection PyUnusedLocal
-                def t_loss(*args):
-                    return self.final_drive_torque_loss
-            else:
-                t_loss = _compile_torque_losses_function(
-                    self.n_wheel_drive, self.final_drive_efficiency
-                )
+            t_loss = self._torque_losses_function()
             for r, t in zip(final_drive_ratio_vector, final_drive_torques_out):
                 loss = t_loss(r, t)
                 yield loss, calculate_final_drive_torques_in(t, r, loss)
@@ -349,10 +354,59 @@ class FinalDriveModel:
         for t, names in self.types.items():
             names = names - set(outputs)
             if names:
-                outputs.update(zip(names, np.empty((len(names), n), dtype=t)))
+                allocate_outputs(outputs, names, n, t)
 
         self.outputs = outputs
 
+    def check_ratio_vector(self, gears):
+        # Has the ratio vector computed without gears the same values of the
+        # one computed with the given `gears`?
+        if 'final_drive_ratio_vector' in (self._outputs or {}):
+            return True
+        gears = np.append([0], gears[:-1])
+        return bool(np.isin(gears, tuple(self.final_drive_ratios)).all())
+
+    def calculate_results(self, gears, final_drive_speeds_out,
+                          final_drive_torques_out, final_drive_powers_out):
+        # Whole array version of `yield_results`.
+        # If `gears` is None (i.e., not yet predicted), it is applicable only
+        # when the final drive ratio does not depend on the gear. Then, the
+        # caller has to verify the predicted gears with `check_ratio_vector`.
+        outputs, given = self.outputs, self._outputs or {}
+        n = final_drive_speeds_out.shape[0]
+        r = outputs['final_drive_ratio_vector']
+        if 'final_drive_ratio_vector' not in given:
+            if gears is None:
+                if len(set(self.final_drive_ratios.values())) != 1:
+                    return False
+                gears = np.zeros(n, dtype=int)
+            get = self.final_drive_ratios.get
+            g = np.append([0], gears[:n - 1])
+            g, i = np.unique(g, return_inverse=True)
+            r[:] = np.array([get(k) for k in g], dtype=float)[i]
+
+        if 'final_drive_speeds_in' not in given:
+            outputs['final_drive_speeds_in'][:] = \
+                calculate_final_drive_speeds_in(final_drive_speeds_out, r)
+
+        keys = {'final_drive_torque_losses', 'final_drive_torques_in'}
+        if keys - set(given):
+            t = final_drive_torques_out
+            loss = self._torque_losses_function()(r, t)
+            outputs['final_drive_torque_losses'][:] = loss
+            outputs['final_drive_torques_in'][:] = \
+                calculate_final_drive_torques_in(t, r, loss)
+
+        keys = {'final_drive_efficiencies', 'final_drive_powers_in'}
+        if keys - set(given):
+            eff = calculate_final_drive_efficiencies(
+                final_drive_torques_out, r, outputs['final_drive_torques_in']
+            )
+            outputs['final_drive_efficiencies'][:] = eff
+            outputs['final_drive_powers_in'][:] = \
+                calculate_final_drive_powers_in(final_drive_powers_out, eff)
+        return True
+
     def yield_results(self, gears, final_drive_speeds_out,
                       final_drive_torques_out, final_drive_powers_out):
         outputs = self.outputs
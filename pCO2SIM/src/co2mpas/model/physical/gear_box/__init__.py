@@ -28,6 +28,7 @@ import co2mpas.model.physical.defaults as defaults
 import functools
 import numpy as np
 import collections
+from ..buffers import allocate_outputs, OutputsMixin
 
 
 def calculate_gear_shifts(gears):
@@ -626,7 +627,7 @@ def not_cvt(kwargs):
 
 
 # noinspection PyMissingOrEmptyDocstring
-class GearBoxModel:
+class GearBoxModel(OutputsMixin):
     key_outputs = [
         'gears',
         'gear_box_speeds_in',
@@ -723,11 +724,15 @@ class GearBoxModel:
         for t, names in self.types.items():
             names = names - set(outputs)
             if names:
-                outputs.update(zip(names, np.empty((len(names), n), dtype=t)))
+                allocate_outputs(outputs, names, n, t)
             if 'gears' in names:
                 outputs['gears'][0] = 0
         self.outputs = outputs
 
+    def get_gears(self):
+        # Returns the given gear vector (None if it has to be predicted).
+        return (self._outputs or {}).get('gears')
+
     def yield_results(self, times, velocities, accelerations, motive_powers,
                       final_drive_speeds_in, final_drive_powers_in):
         outputs = self.outputs
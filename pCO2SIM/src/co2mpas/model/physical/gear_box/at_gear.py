@@ -11,6 +11,7 @@ It contains functions to predict the A/T gear shifting.
 
 import collections
 import copy
+import functools
 import itertools
 import pprint
 import scipy.interpolate as sci_itp
@@ -121,6 +122,21 @@ class CorrectGear(object):
                 gear += 1
         return gear
 
+    def array_correct_gear_mvl(
+            self, gears, velocities, accelerations, motive_powers):
+        b = velocities[:, None] > self.vl_dn
+        k = b.shape[1] - 1 - b[:, ::-1].argmax(1)
+        b = b.any(1) & (np.abs(accelerations) < self.mvl_acc)
+        g = np.where(b, self.gears[k], 0)
+        res = gears.copy()
+        for gear in np.unique(gears[gears > 0]):
+            b = (gears == gear) & (velocities > self.mvl[gear][1])
+            while b.any():
+                gear += 1
+                res[b] = gear
+                b &= velocities > self.mvl[gear][1]
+        return np.where(g > gears, g, res)
+
     def fit_correct_gear_full_load(
             self, full_load_curve, max_velocity_full_load_correction):
         self.max_velocity_full_load_corr = max_velocity_full_load_correction
@@ -164,6 +180,24 @@ class CorrectGear(object):
             return self.gears[np.argmax(delta)]
         return self.gears[j - k]
 
+    def array_correct_gear_full_load(
+            self, gears, velocities, accelerations, motive_powers):
+        delta = self.flc(velocities[:, None] / self.np_vsr)
+        delta -= motive_powers[:, None]
+        valid = delta >= 0
+        res = gears.copy()
+        b = (velocities <= self.max_velocity_full_load_corr)
+        b &= gears > self.min_gear
+        for gear in np.unique(gears[b]):
+            i = b & (gears == gear)
+            j = np.searchsorted(self.gears, gear)
+            v = valid[i, :j + 1]
+            res[i] = np.where(
+                v.any(1), self.gears[j - v[:, ::-1].argmax(1)],
+                self.gears[delta[i].argmax(1)]
+            )
+        return res
+
     def fit_correct_driveability_rules(self, engine_speed_at_max_power):
         idle = self.idle_engine_speed[0]
         n_min_drive = idle + 0.125 * (engine_speed_at_max_power - idle)
@@ -171,16 +205,56 @@ class CorrectGear(object):
         self.min_gear_vel = {
             g: idle.get(g, n_min_drive) * self.vsr[g] for g in self.gears
         }
+        self.prepare_pipe.append(self.prepare_driveability_rules)
         self.pipe.append(self.correct_driveability_rules)
         self.next_gears = []
 
+    def prepare_driveability_rules(
+            self, matrix, times, velocities, accelerations, motive_powers,
+            engine_coolant_temperatures):
+        n, p, ss = times.shape[0], motive_powers, np.searchsorted
+
+        def _next(b):  # First index >= i where `b` is True (n if none).
+            i = np.append(np.where(b, np.arange(n), n), n)
+            return np.minimum.accumulate(i[::-1])[::-1]
+
+        # Cycle as lists and lookahead indexes, for the per-step rules.
+        self._lookahead = tuple(v.tolist() for v in (
+            times, velocities, p, _next(p <= 0), _next(p > 0), _next(p >= 0),
+            ss(times, times - 3), ss(times, times - 2), ss(times, times + 1),
+            ss(times, times + 5.01, 'right'), ss(times, times + 10, 'right')
+        ))
+        self._run = None
+        return matrix
+
+    def _run_start(self, gears, i):
+        # Start of the run of equal gears that ends at `i`.
+        run = self._run
+        if run is not None and run[0] == i - 1:
+            s = run[1] if gears[i] == gears[i - 1] else i
+        else:
+            s, g = i, gears[i]
+            while s and gears[s - 1] == g:
+                s -= 1
+        self._run = i, s
+        return s
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_lookahead', None)
+        state.pop('_run', None)
+        return state
+
     # noinspection PyUnresolvedReferences
     def correct_driveability_rules(
             self, gear, i, gears, times, velocities, accelerations,
             motive_powers, engine_coolant_temperatures, matrix):
+        T, V, P, p_le0, p_gt0, p_ge0, i_3, i_2, i1, i5, i10 = self._lookahead
+        n = len(T)
         pg = gears.take(i - 1, mode='clip')  # Previous gear.
-        power = motive_powers[i]  # Current power.
-        t0 = times[i]
+        s = i and self._run_start(gears, i - 1)  # Start of previous gear.
+        power = P[i]  # Current power.
+        t0 = T[i]
         for j, (g, t) in enumerate(self.next_gears):
             if t0 <= t:
                 gear = g
@@ -191,7 +265,7 @@ class CorrectGear(object):
 
         # noinspection PyShadowingNames
         def get_next(k, g):
-            t0 = times[k]
+            t0 = T[k]
             for j, v in enumerate(self.next_gears):
                 if t0 <= v[0]:
                     g = v[1]
@@ -199,43 +273,29 @@ class CorrectGear(object):
             else:
                 g = matrix[g][k]
             # 4.3
-            if g and motive_powers[k] < 0 and \
-                    self.min_gear_vel[g] > velocities[k]:
+            if g and P[k] < 0 and self.min_gear_vel[g] > V[k]:
                 return 0
             return g
 
         # 4.a During accelerations a gear have to last at least 2 seconds.
-        if power > 0 or velocities.take(i + 1, mode='clip') > velocities[i]:
-            j = np.searchsorted(times, times[i] - 2)
-            gear = min(gear, pg + int((gears[j:i] == pg).all()))
+        if power > 0 or V[min(i + 1, n - 1)] > V[i]:
+            gear = min(gear, pg + int(i_2[i] >= s))
 
         # 4.b
         if gear > 1 and power > 0:
-            if pg < gear or motive_powers.take(i - 1, mode='clip') <= 0:
-                g = gear
-                t0 = times[i] + 10
-                j = i + 1
-                gen = enumerate(zip(times[j:], motive_powers[j:]), j)
-                while True:
-                    try:
-                        k, (t, p) = next(gen)
-                    except StopIteration:
-                        break
-                    if p <= 0:
-                        break
+            if pg < gear or P[max(i - 1, 0)] <= 0:
+                g, j = gear, i + 1
+                for k in range(j, p_le0[j]):
                     g = get_next(k, g)
                     if g < gear:
-                        if t <= t0:
+                        if k < i10[i]:
                             gear = g
                         else:
-                            t0 += 10
-                            while True:
-                                try:
-                                    k, (t, p) = next(gen)
-                                except StopIteration:
-                                    break
-                                if t > t0 or p <= 0:
-                                    break
+                            t0 = T[i] + 10 + 10
+                            j = min(p_le0[k + 1], times.searchsorted(
+                                t0, 'right'
+                            ))
+                            for k in range(k + 1, j):
                                 g = get_next(k, g)
                                 if g < gear:
                                     gear = g
@@ -243,64 +303,51 @@ class CorrectGear(object):
                         break
 
             if pg > gear:
-                g = gear
-                t0 = times[i] + 10
-                j = i + 1
-                gen = enumerate(zip(times[j:], motive_powers[j:]), j)
-                while True:
-                    try:
-                        k, (t, p) = next(gen)
-                    except StopIteration:
-                        break
+                g, j = gear, i + 1
+                e = min(i10[i], p_le0[j])  # Index of the end of the window.
+                for k in range(j, min(e + 1, n)):
                     g = get_next(k, g)
                     if g < pg:
                         break
-                    if t > t0 or p <= 0:
+                else:
+                    if e < n:
                         gear = pg
-                        break
 
         # 4.c, 4.d
         if pg and pg < gear:
-            if power < 0 or motive_powers.take(i + 1, mode='clip') < 0:  # 4.d
+            if power < 0 or P[min(i + 1, n - 1)] < 0:  # 4.d
                 gear = pg
             else:  # 4.c
                 g = gear
-                t0 = times[i] + 5.01
-                j = i + 1
-                gen = enumerate(times[j:], j)
-                while True:
-                    try:
-                        k, t = next(gen)
-                    except StopIteration:
-                        break
-                    if t > t0:
-                        break
+                for k in range(i + 1, i5[i]):
                     g = get_next(k, g)
                     if g < gear:
                         gear = max(pg, g)
                         break
         # 4.e
         if gear == 1 and pg == 2 and power < 0:
-            for k, p in enumerate(motive_powers[i + 1:], i + 1):
-                if p >= 0:
-                    if velocities[k] <= 1:
-                        gear = 2
-                    break
+            k = p_ge0[i + 1]
+            if k < n and V[k] <= 1:
+                gear = 2
 
         # 4.e
-        if gear and power < 0 and self.min_gear_vel[gear] > velocities[i]:
+        if gear and power < 0 and self.min_gear_vel[gear] > V[i]:
             gear = 0
 
         # 4.f
         if gear and power < 0 and pg > gear:
             j, g = i - 1, gear
-            t0 = times.take(j, mode='clip')
-            if (gears[np.searchsorted(times[:j], t0 - 3):j] == pg).all():
-                t1, t2, t3 = times[i], t0 + 2, t0 + 5
+            t0 = T[max(j, 0)]
+            if i:
+                b = i_3[j] >= s
+            else:
+                b = (gears[np.searchsorted(times[:j], t0 - 3):j] == pg).all()
+            if b:
+                t1, t2, t3 = T[i], t0 + 2, t0 + 5
                 flag = gear, t1 + 3
-                j = i + 1
-                gen = enumerate(zip(times[j:], motive_powers[j:]), j)
-                for k, (t, p) in gen:
+                gen = iter(range(i + 1, n))
+                for k in gen:
+                    t, p = T[k], P[k]
                     if not (p <= 0 or t <= t2):
                         break
                     g = get_next(k, g)
@@ -322,7 +369,8 @@ class CorrectGear(object):
                 if not gear and pg > flag[0] + 1:
                     v, g0, r = None, g, flag[0] - 1
                     t1, t2 = t0 + 2, t0 + 5
-                    for k, (t, p) in gen:
+                    for k in gen:
+                        t, p = T[k], P[k]
                         g = get_next(k, g)
                         if p > 0 or g > g0:
                             break
@@ -340,17 +388,14 @@ class CorrectGear(object):
         # 4.f
         if power < 0 and gear and (pg > gear or pg == 0):
             j, g0 = i + 1, gear
-            t0 = times.take(i - 1, mode='clip') + 2
-            gen = enumerate(zip(times[j:], motive_powers[j:]), j)
-            for k, (t, p) in gen:
-                if p > 0:
-                    break
+            t0 = T[max(i - 1, 0)] + 2
+            for k in range(j, p_gt0[j]):
                 g1 = get_next(k, g0)
-                if g1 == g0 and (g0 == 1 or t <= t0):
+                if g1 == g0 and (g0 == 1 or T[k] <= t0):
                     g0 = g1
                     continue
-                if velocities[k] < 1:
-                    self.next_gears = [(0, t)]
+                if V[k] < 1:
+                    self.next_gears = [(0, T[k])]
                     gear = 0
                 elif not g1 and gear == 1:
                     g0 = g1
@@ -358,8 +403,8 @@ class CorrectGear(object):
                 break
 
         # 3.2
-        j = i + np.searchsorted(times[i:], times[i] + 1)
-        if not gear and np.diff(velocities.take([j, j + 1], mode='clip')) > 0:
+        j = i1[i]
+        if not gear and V[min(j + 1, n - 1)] > V[min(j, n - 1)]:
             gear = self.min_gear
 
         return gear
@@ -374,6 +419,29 @@ class CorrectGear(object):
             )
         return matrix
 
+    def tabulate(self, gears, velocities, accelerations, motive_powers):
+        """
+        Tabulates the corrections of each input gear along the cycle.
+
+        It is available only if all correction rules are stateless (i.e., they
+        have an `array_` version).
+
+        :return:
+            Corrected gears of each input gear and time step, or None.
+        :rtype: numpy.array | None
+        """
+        try:
+            pipe = [getattr(self, 'array_%s' % f.__name__) for f in self.pipe]
+        except AttributeError:  # Rules that depend on the previous gears.
+            return None
+        table = []
+        for g in gears:
+            g = np.tile(g, velocities.shape[0])
+            for f in pipe:
+                g = f(g, velocities, accelerations, motive_powers)
+            table.append(g)
+        return np.array(table, int)
+
     def __call__(self, gear, i, gears, times, velocities, accelerations,
                  motive_powers, engine_coolant_temperatures, matrix):
         for f in self.pipe:
@@ -686,16 +754,23 @@ class CMV(collections.OrderedDict):
 
     def fit(self, correct_gear, gears, engine_speeds_out, times, velocities,
             accelerations, motive_powers, velocity_speed_ratios, stop_velocity):
-        from .mechanical import calculate_gear_box_speeds_in
         self.clear()
         self.velocity_speed_ratios = velocity_speed_ratios
         self.update(identify_gear_shifting_velocity_limits(
             gears, velocities, stop_velocity
         ))
-        if defaults.dfl.functions.CMV.ENABLE_OPT_LOOP:
+        dfl = defaults.dfl.functions.CMV
+        if dfl.ENABLE_OPT_LOOP:
             gear_id, velocity_limits = zip(*list(sorted(self.items()))[1:])
             max_gear, _inf, grp = gear_id[-1], float('inf'), co2_utl.grouper
-            update, predict = self.update, self.predict
+            update = self.update
+            args = (
+                correct_gear, engine_speeds_out, times, velocities,
+                accelerations, motive_powers, velocity_speed_ratios,
+                stop_velocity
+            )
+            error = dfl.VECTORIZE_OPT_LOOP and self._array_speed_error(*args)
+            error = error or self._speed_error(*args)
 
             def _update_gvs(vel_limits):
                 self[0] = (0, vel_limits[0])
@@ -704,18 +779,7 @@ class CMV(collections.OrderedDict):
 
             def _error_fun(vel_limits):
                 _update_gvs(vel_limits)
-
-                g_pre = predict(
-                    times, velocities, accelerations, motive_powers,
-                    correct_gear=correct_gear
-                )
-
-                speed_pred = calculate_gear_box_speeds_in(
-                    g_pre, velocities, velocity_speed_ratios, stop_velocity)
-
-                return np.float32(np.mean(np.abs(
-                    speed_pred - engine_speeds_out
-                )))
+                return error()
 
             x0 = [self[0][1]].__add__(
                 list(itertools.chain(*velocity_limits))[:-1]
@@ -727,6 +791,66 @@ class CMV(collections.OrderedDict):
 
         return self
 
+    def _speed_error(self, correct_gear, engine_speeds_out, times, velocities,
+                     accelerations, motive_powers, velocity_speed_ratios,
+                     stop_velocity):
+        from .mechanical import calculate_gear_box_speeds_in
+
+        def _error():
+            g_pre = self.predict(
+                times, velocities, accelerations, motive_powers,
+                correct_gear=correct_gear
+            )
+
+            speed_pred = calculate_gear_box_speeds_in(
+                g_pre, velocities, velocity_speed_ratios, stop_velocity)
+
+            return np.float32(np.mean(np.abs(speed_pred - engine_speeds_out)))
+
+        return _error
+
+    def _array_speed_error(
+            self, correct_gear, engine_speeds_out, times, velocities,
+            accelerations, motive_powers, velocity_speed_ratios,
+            stop_velocity):
+        # Same error of `_speed_error`, but everything that does not depend on
+        # the velocity limits (i.e., gear corrections and engine speed errors)
+        # is tabulated once for all gears, so that each evaluation is a
+        # vectorized shift matrix plus a walk through a transition table.
+        from .mechanical import calculate_gear_box_speeds_in
+        if not isinstance(correct_gear, CorrectGear):
+            return None
+        valid = np.array(list(self))
+        values = np.union1d(np.union1d(valid, correct_gear.gears), [0])
+        table = correct_gear.tabulate(
+            values, velocities, accelerations, motive_powers
+        )
+        if table is None:
+            return None
+
+        # Positions of the valid gears that follow each tabulated gear.
+        table = np.abs(table[:, :, None] - valid).argmin(-1)
+        errors = np.abs(np.array([calculate_gear_box_speeds_in(
+            np.tile(g, times.shape[0]), velocities, velocity_speed_ratios,
+            stop_velocity
+        ) for g in valid]) - engine_speeds_out)
+        index = np.arange(times.shape[0], dtype=int)
+        start = int(np.abs(valid).argmin())
+
+        def _error():
+            matrix = correct_gear.prepare(self._prepare(
+                times, velocities, accelerations, motive_powers, None
+            ), times, velocities, accelerations, motive_powers, None)
+            matrix = np.array([matrix[g] for g in valid])
+            matrix = table[np.searchsorted(values, matrix), index].T.tolist()
+            gear, gears = start, []
+            for step in matrix:
+                gear = step[gear]
+                gears.append(gear)
+            return np.float32(np.mean(errors[gears, index]))
+
+        return _error
+
     def correct_constant_velocity(
             self, up_cns_vel=(), up_window=0.0, up_delta=0.0, dn_cns_vel=(),
             dn_window=0.0, dn_delta=0.0):
@@ -828,11 +952,6 @@ class CMV(collections.OrderedDict):
 
         return gears[index:times.shape[0]]
 
-    @staticmethod
-    def get_gear(gear, index, gears, times, velocities, accelerations,
-                 motive_powers, engine_coolant_temperatures, matrix):
-        return matrix[gear][index]
-
     def yield_gear(self, times, velocities, accelerations, motive_powers,
                    engine_coolant_temperatures=None,
                    correct_gear=lambda i, g, *args: g[i], index=0, gears=None):
@@ -848,27 +967,24 @@ class CMV(collections.OrderedDict):
             )
 
         valid_gears = np.array(list(getattr(self, 'gears', self)))
+        shifts, table = _gear_shifting_table(matrix, valid_gears)
+        m = len(table) - 1
 
-        def get_valid_gear(g):
-            if g in valid_gears:
-                return g
-            return valid_gears[np.abs(np.subtract(valid_gears, g)).argmin()]
-
-        gear = valid_gears.min()
         if gears is None:
+            gear, row = table[int(valid_gears.min())]
             gears = np.zeros_like(times, int)
         else:
-            gear = get_valid_gear(gears[index])
+            gear, row = table[min(max(int(gears[index]), 0), m)]
 
         args = (
             gears, times, velocities, accelerations, motive_powers,
             engine_coolant_temperatures, matrix
         )
 
-        for i in np.arange(index, times.shape[0], dtype=int):
-            gear = gears[i] = get_valid_gear(correct_gear(
-                self.get_gear(gear, i, *args), i, *args
-            ))
+        for i in range(index, times.shape[0]):
+            g = correct_gear(shifts[row][i], i, *args)
+            gear, row = table[min(max(int(g), 0), m)]
+            gears[i] = gear
             yield gear
 
     def yield_speed(self, stop_velocity, gears, velocities, *args, **kwargs):
@@ -898,6 +1014,32 @@ class CMV(collections.OrderedDict):
         return self
 
 
+def _gear_shifting_table(matrix, valid_gears):
+    """
+    Returns the dense gear shifting matrix and the valid gear table.
+
+    :param matrix:
+        Gear predicted at each time step for each previous gear.
+    :type matrix: dict[int, numpy.array]
+
+    :param valid_gears:
+        Valid gears [-].
+    :type valid_gears: numpy.array
+
+    :return:
+        - Gear shifting matrix rows (one per gear of `matrix`, sorted).
+        - Nearest valid gear and its matrix row of each integer gear, from 0 to
+          the max gear (i.e., clip the gear to get the entry).
+    :rtype: list[list[int]], list[(int, int)]
+    """
+    keys = sorted(matrix)
+    shifts = np.array([matrix[k] for k in keys], int).tolist()
+    rows = {k: i for i, k in enumerate(keys)}
+    g = np.arange(int(max(np.max(valid_gears), keys[-1])) + 1)
+    g = valid_gears[np.abs(g[:, None] - valid_gears).argmin(1)].tolist()
+    return shifts, [(k, rows.get(k)) for k in g]
+
+
 # noinspection PyMissingOrEmptyDocstring
 class GSMColdHot(collections.OrderedDict):
     def __init__(self, *args, time_cold_hot_transition=0.0):
@@ -1125,6 +1267,50 @@ def correct_gsv(gsv, stop_velocity):
     return gsv
 
 
+def _interp_table(x, xp, fp):
+    """
+    Evaluates piecewise-linear curves, constant outside their breakpoints.
+
+    :param x:
+        Points where the curves are evaluated.
+    :type x: numpy.array
+
+    :param xp:
+        Sorted breakpoints of each curve (rows padded repeating the last one).
+    :type xp: numpy.array
+
+    :param fp:
+        Curve values at the breakpoints.
+    :type fp: numpy.array
+
+    :return:
+        Curve values at the points (curves x points).
+    :rtype: numpy.array
+    """
+    xp, fp = np.asarray(xp, float), np.asarray(fp, float)
+    slopes = np.zeros_like(fp)
+    dx = np.diff(xp, axis=1)
+    np.divide(np.diff(fp, axis=1), dx, out=slopes[:, :-1], where=dx > 0)
+    # Last breakpoint <= x of each curve (memory linear in the points).
+    j = np.array([r.searchsorted(x, 'right') for r in xp], int) - 1
+    j = np.clip(j, 0, xp.shape[1] - 1, out=j)
+    x = np.maximum(x, xp[:, :1])
+    i = np.arange(xp.shape[0])[:, None]
+    x0, f0, s = xp[i, j], fp[i, j], slopes[i, j]
+    return f0 + s * (x - x0)
+
+
+# noinspection PyMissingOrEmptyDocstring
+class _PiecewiseLinear(object):
+    def __init__(self, xp, fp):
+        self.xp, self.fp = np.asarray(xp, float), np.asarray(fp, float)
+
+    def __call__(self, x):
+        x = np.asarray(x, float)
+        y = _interp_table(x.ravel(), self.xp[None], self.fp[None])
+        return y.reshape(x.shape)
+
+
 # noinspection PyMissingOrEmptyDocstring,PyPep8Naming
 class GSPV(CMV):
     def __init__(self, *args, cloud=None, velocity_speed_ratios=None):
@@ -1181,8 +1367,6 @@ class GSPV(CMV):
         return self
 
     def _fit_cloud(self):
-        spl = sci_itp.InterpolatedUnivariateSpline
-
         def _line(n, m, i):
             x = np.mean(m[i]) if m[i] else None
             k_p = n - 1
@@ -1192,7 +1376,7 @@ class GSPV(CMV):
 
             if x is None or x > x_up:
                 x = x_up
-            return spl([0, 1], [x] * 2, k=1)
+            return _PiecewiseLinear([0], [x])
 
         self.clear()
         self.update(copy.deepcopy(self.cloud))
@@ -1203,22 +1387,51 @@ class GSPV(CMV):
             if len(v[1][0]) > 2:
                 v[1] = _gspv_interpolate_cloud(*v[1])
             elif v[1][1]:
-                v[1] = spl([0, 1], [np.mean(v[1][1])] * 2, k=1)
+                v[1] = _PiecewiseLinear([0], [np.mean(v[1][1])])
             else:
                 v[1] = self[k - 1][0]
 
+        self._pack_curves()
+
+    def _pack_curves(self):
+        # Down and up shift-limit curves as breakpoints tables (rows: down
+        # curves of the sorted gears, then the up curves).
+        keys = sorted(self)
+        curves = [self[k][i] for i in (0, 1) for k in keys]
+        if not all(isinstance(c, _PiecewiseLinear) for c in curves):
+            # Models pickled with other curves (e.g., splines) are evaluated
+            # curve by curve.
+            self._curves = keys, None, curves
+            return self._curves
+        n = max(len(c.xp) for c in curves)
+        xp, fp = [np.array([
+            np.append(v, [v[-1]] * (n - len(v))) for v in values
+        ]) for values in zip(*((c.xp, c.fp) for c in curves))]
+        self._curves = keys, xp, fp
+        return self._curves
+
+    def _eval_curves(self, x):
+        try:
+            keys, xp, fp = self._curves
+        except AttributeError:  # Copied without fitting the cloud.
+            keys, xp, fp = self._pack_curves()
+        if xp is None:
+            y = np.array([np.broadcast_to(c(x), x.shape) for c in fp], float)
+        else:
+            y = _interp_table(x, xp, fp)
+        down, up = y.reshape(2, len(keys), -1)
+        return keys, down, up
+
     @property
     def limits(self):
-        limits = {}
         X = [defaults.dfl.INF, 0]
         for v in self.cloud.values():
             X[0] = min(min(v[1][0]), X[0])
             X[1] = max(max(v[1][0]), X[1])
         X = list(np.linspace(*X))
         X = [0] + X + [X[-1] * 1.1]
-        for k, func in self.items():
-            limits[k] = [(f(X), X) for f, x in zip(func, X)]
-        return limits
+        keys, down, up = self._eval_curves(np.array(X))
+        return {k: [(d, X), (u, X)] for k, d, u in zip(keys, down, up)}
 
     def plot(self):
         import matplotlib.pylab as plt
@@ -1241,14 +1454,12 @@ class GSPV(CMV):
 
     def _prepare(self, times, velocities, accelerations, motive_powers,
                  engine_coolant_temperatures):
-        keys = sorted(self.keys())
-        matrix, r, c = {}, times.shape[0], len(keys) - 1
-        for i, g in enumerate(keys):
-            down, up = [func(motive_powers) for func in self[g]]
-            matrix[g] = p = np.tile(g, r)
-            p[velocities < down] = keys[max(0, i - 1)]
-            p[velocities >= up] = keys[min(i + 1, c)]
-        return matrix
+        keys, down, up = self._eval_curves(motive_powers)
+        k = np.array(keys)[:, None]
+        p = np.repeat(k, times.shape[0], 1)
+        p = np.where(velocities < down, np.append(k[:1], k[:-1], 0), p)
+        p = np.where(velocities >= up, np.append(k[1:], k[-1:], 0), p)
+        return dict(zip(keys, p))
 
     def convert(self, velocity_speed_ratios):
         if velocity_speed_ratios != self.velocity_speed_ratios:
@@ -1264,9 +1475,12 @@ class GSPV(CMV):
             K, X = zip(*[(k, v) for k, v in sorted(n_vsr.items())])
             cloud = self.cloud = {}
 
-            for p in np.linspace(*limits):
-                it = [[vsr.get(k, 0)] + [func(p) for func in v]
-                      for k, v in self.items()]
+            P = np.linspace(*limits)
+            keys, down, up = self._eval_curves(P)
+            rows = {k: i for i, k in enumerate(keys)}
+            for j, p in enumerate(P):
+                it = [[vsr.get(k, 0), down[rows[k], j], up[rows[k], j]]
+                      for k in self]
 
                 L, U = _convert_limits(it, X)
 
@@ -1330,7 +1544,7 @@ def _gspv_interpolate_cloud(powers, velocities):
     regressor.fit(powers, velocities)
     x = np.linspace(min(powers), max(powers))
     y = regressor.predict(x)
-    return sci_itp.InterpolatedUnivariateSpline(x, y, k=1, ext=3)
+    return _PiecewiseLinear(x, y)
 
 
 def calibrate_gspv_cold_hot(
@@ -1403,8 +1617,9 @@ def prediction_gears_gsm(
     :type velocity_speed_ratios: dict[int | float]
 
     :param gsm:
-        A gear shifting model (cmv or gspv or dtgs).
-    :type gsm: GSPV | CMV | DTGS
+        A gear shifting model (cmv or gspv or dtgs), or its asynchronous
+        calibration (see :func:`_calibrate_in_worker`).
+    :type gsm: GSPV | CMV | DTGS | co2mpas.utils.parallel.AsyncResult
 
     :param velocities:
         Vehicle velocity [km/h].
@@ -1430,6 +1645,8 @@ def prediction_gears_gsm(
         Predicted gears.
     :rtype: numpy.array
     """
+    from co2mpas.utils.parallel import get_result
+    gsm = get_result(gsm)
 
     if velocity_speed_ratios is not None and cycle_type is not None:
         gsm = _upgrade_gsm(gsm, velocity_speed_ratios, cycle_type)
@@ -1484,11 +1701,6 @@ class DTGS:
             )))
         return matrix
 
-    @staticmethod
-    def get_gear(gear, index, gears, times, velocities, accelerations,
-                 motive_powers, engine_coolant_temperatures, matrix):
-        return matrix[gear][index]
-
     def yield_gear(self, *args, **kwargs):
         return CMV.yield_gear(self, *args, **kwargs)
 
@@ -1813,11 +2025,17 @@ def default_specific_gear_shifting():
     return d.SPECIFIC_GEAR_SHIFTING
 
 
+# noinspection PyMissingOrEmptyDocstring
+def _is_enabled(method):
+    return method not in defaults.dfl.functions.at_gear.disabled_models
+
+
 # noinspection PyMissingOrEmptyDocstring
 def at_domain(method):
     # noinspection PyMissingOrEmptyDocstring
     def domain(kwargs):
-        return kwargs['specific_gear_shifting'] in ('ALL', method)
+        s = kwargs['specific_gear_shifting']
+        return s == method or (s == 'ALL' and _is_enabled(method))
 
     return domain
 
@@ -1826,13 +2044,41 @@ def at_domain(method):
 def dt_domain(method):
     # noinspection PyMissingOrEmptyDocstring
     def domain(kwargs):
-        s = 'specific_gear_shifting'
-        dt = 'use_dt_gear_shifting'
-        return kwargs[s] == method or (kwargs[dt] and kwargs[s] == 'ALL')
+        s = kwargs['specific_gear_shifting']
+        dt = kwargs['use_dt_gear_shifting']
+        return s == method or (dt and s == 'ALL' and _is_enabled(method))
 
     return domain
 
 
+# Weight of the calibrated models: it delays the model nodes, which wait the
+# results, after all calibrations are submitted (see `_calibrate_in_worker`).
+_CALIBRATION_WEIGHT = 1000
+
+
+def _calibrate_in_worker(func):
+    """
+    Executes the calibration in a worker process when the executor defined by
+    `dfl.functions.at_gear.executor` is 'parallel'.
+
+    The calibrations of the competing models are independent, hence they run
+    concurrently until the models are required: the model nodes of
+    :func:`at_gear` and the gear predictions (see
+    :func:`prediction_gears_gsm`) wait the results.
+    """
+    @functools.wraps(func)
+    def calibrate(*args):
+        import co2mpas.utils.parallel as co2_par
+        cfg = defaults.dfl.functions.at_gear
+        if cfg.executor == 'parallel':
+            executor = co2_par.get_executor(cfg.n_workers)
+            if executor is not None:
+                return co2_par.submit(executor, func, *args)
+        return func(*args)
+
+    return calibrate
+
+
 def at_gear():
     """
     Defines the A/T gear shifting model.
@@ -1929,6 +2175,11 @@ def at_gear():
         description='Specific gear shifting model.'
     )
 
+    # Models calibrated in worker processes are waited only when required.
+    from co2mpas.utils.parallel import get_estimation_result
+    for k in ('CMV', 'CMV_Cold_Hot', 'DTGS', 'GSPV', 'GSPV_Cold_Hot'):
+        d.add_data(data_id=k, function=get_estimation_result)
+
     d.add_dispatcher(
         dsp_id='cmv_model',
         dsp=at_cmv(),
@@ -2025,11 +2276,12 @@ def at_cmv():
 
     # calibrate corrected matrix velocity
     d.add_function(
-        function=calibrate_gear_shifting_cmv,
+        function=_calibrate_in_worker(calibrate_gear_shifting_cmv),
         inputs=['correct_gear', 'gears', 'engine_speeds_out', 'times',
                 'velocities', 'accelerations', 'motive_powers',
                 'velocity_speed_ratios', 'stop_velocity'],
-        outputs=['CMV'])
+        outputs=['CMV'],
+        out_weight={'CMV': _CALIBRATION_WEIGHT})
 
     # predict gears with corrected matrix velocity
     d.add_function(
@@ -2071,12 +2323,13 @@ def at_cmv_cold_hot():
 
     # calibrate corrected matrix velocity cold/hot
     d.add_function(
-        function=calibrate_gear_shifting_cmv_cold_hot,
+        function=_calibrate_in_worker(calibrate_gear_shifting_cmv_cold_hot),
         inputs=['correct_gear', 'times', 'gears', 'engine_speeds_out',
                 'velocities', 'accelerations', 'motive_powers',
                 'velocity_speed_ratios', 'time_cold_hot_transition',
                 'stop_velocity'],
-        outputs=['CMV_Cold_Hot'])
+        outputs=['CMV_Cold_Hot'],
+        out_weight={'CMV_Cold_Hot': _CALIBRATION_WEIGHT})
 
     # predict gears with corrected matrix velocity
     d.add_function(
@@ -2126,10 +2379,13 @@ def at_dtgs():
     # calibrate decision tree with velocity, acceleration, temperature
     # & wheel power
     d.add_function(
-        function=calibrate_gear_shifting_decision_tree,
+        function=_calibrate_in_worker(
+            calibrate_gear_shifting_decision_tree
+        ),
         inputs=['velocity_speed_ratios', 'gears', 'velocities', 'accelerations',
                 'motive_powers', 'engine_coolant_temperatures'],
-        outputs=['DTGS']
+        outputs=['DTGS'],
+        out_weight={'DTGS': _CALIBRATION_WEIGHT}
     )
 
     # predict gears with decision tree with velocity, acceleration, temperature
@@ -2168,10 +2424,11 @@ def at_gspv():
 
     # calibrate corrected matrix velocity
     d.add_function(
-        function=calibrate_gspv,
+        function=_calibrate_in_worker(calibrate_gspv),
         inputs=['gears', 'velocities', 'motive_powers',
                 'velocity_speed_ratios', 'stop_velocity'],
-        outputs=['GSPV'])
+        outputs=['GSPV'],
+        out_weight={'GSPV': _CALIBRATION_WEIGHT})
 
     # predict gears with corrected matrix velocity
     d.add_function(
@@ -2213,11 +2470,12 @@ def at_gspv_cold_hot():
 
     # calibrate corrected matrix velocity
     d.add_function(
-        function=calibrate_gspv_cold_hot,
+        function=_calibrate_in_worker(calibrate_gspv_cold_hot),
         inputs=['times', 'gears', 'velocities',
                 'motive_powers', 'time_cold_hot_transition',
                 'velocity_speed_ratios', 'stop_velocity'],
-        outputs=['GSPV_Cold_Hot'])
+        outputs=['GSPV_Cold_Hot'],
+        out_weight={'GSPV_Cold_Hot': _CALIBRATION_WEIGHT})
 
     # predict gears with corrected matrix velocity
     d.add_function(
@@ -10,7 +10,6 @@ It contains functions that model the basic mechanics of the gear box.
 """
 
 import math
-import functools
 import numpy as np
 import schedula as sh
 import scipy.stats as sci_sta
@@ -21,9 +20,9 @@ import scipy.interpolate as sci_itp
 import co2mpas.model.physical.defaults as defaults
 
 
-def _identify_gear(idle, vsr, stop_vel, plateau_acc, ratio, vel, acc):
+def _identify_gears(idle, vsr, stop_vel, plateau_acc, ratios, vel, acc):
     """
-    Identifies a gear [-].
+    Identifies the gears [-].
 
     :param idle:
         Engine speed idle median and median + std [RPM].
@@ -41,35 +40,52 @@ def _identify_gear(idle, vsr, stop_vel, plateau_acc, ratio, vel, acc):
         Maximum acceleration to be at constant velocity [m/s2].
     :type plateau_acc: float
 
-    :param ratio:
-        Vehicle velocity speed ratio [km/(h*RPM)].
-    :type ratio: float
+    :param ratios:
+        Vehicle velocity speed ratios [km/(h*RPM)].
+    :type ratios: numpy.array
 
     :param vel:
         Vehicle velocity [km/h].
-    :type vel: float
+    :type vel: numpy.array
 
     :param acc:
         Vehicle acceleration [m/s2].
-    :type acc: float
+    :type acc: numpy.array
 
     :return:
-        A gear [-].
-    :rtype: int
+        Gears [-].
+    :rtype: numpy.array
     """
 
-    if vel <= stop_vel:
-        return 0
-
-    m, (gear, vs) = min((abs(v - ratio), (k, v)) for k, v in vsr)
-
-    if acc < 0 and (vel <= idle[0] * vs or abs(vel / idle[1] - ratio) < m):
-        return 0
-
-    if gear == 0 and ((vel > stop_vel and acc > 0) or acc > plateau_acc):
-        return 1
-
-    return gear
+    # Nearest ratio (the lowest gear on ties).
+    keys, vsr = map(np.array, zip(*sorted(vsr)))
+    d = np.abs(vsr - ratios[:, None])
+    i = d.argmin(1)
+    m, gears, vs = d[np.arange(i.shape[0]), i], keys[i], vsr[i]
+
+    b = (vel <= idle[0] * vs) | (np.abs(vel / idle[1] - ratios) < m)
+    b &= acc < 0
+    c = (gears == 0) & (((vel > stop_vel) & (acc > 0)) | (acc > plateau_acc))
+    gears[c & ~b] = 1
+    gears[b | (vel <= stop_vel)] = 0
+
+    return gears
+
+
+def _median_filter_gears(times, gears, dt_window):
+    # Same of `co2_utl.median_filter` (median-high), but it counts the gears of
+    # each window with cumulative sums. It is kept separate because the counts
+    # take O(n * distinct values) memory, which suits only the few gears, but
+    # they are vectorized: 6 ms instead of 33 ms of the sorted window of
+    # `median_filter` on 18000 samples at 10 Hz.
+    start, stop = co2_utl.sliding_window_bounds(times, dt_window)
+    values, index = np.unique(gears, return_inverse=True)
+    n = index.shape[0]
+    counts = np.zeros((n + 1, values.shape[0]), int)
+    counts[np.arange(1, n + 1), index] = 1
+    counts = counts.cumsum(0)
+    counts = (counts[stop] - counts[start]).cumsum(1)
+    return values[(counts > ((stop - start) // 2)[:, None]).argmax(1)]
 
 
 def identify_gears(
@@ -129,12 +145,12 @@ def identify_gears(
 
     ratios[engine_speeds_out < idle_speed[0]] = 0
 
-    id_gear = functools.partial(_identify_gear, idle_speed, vsr, stop_velocity,
-                                plateau_acceleration)
-
-    gear = list(map(id_gear, *(ratios, velocities, accelerations)))
+    gear = _identify_gears(
+        idle_speed, vsr, stop_velocity, plateau_acceleration, ratios,
+        velocities, accelerations
+    )
 
-    gear = co2_utl.median_filter(times, gear, change_gear_window_width)
+    gear = _median_filter_gears(times, gear, change_gear_window_width)
 
     gear = _correct_gear_shifts(times, ratios, gear, velocity_speed_ratios)
 
@@ -146,27 +162,44 @@ def identify_gears(
 def _correct_gear_shifts(
         times, ratios, gears, velocity_speed_ratios, shift_window=4.0):
     from . import calculate_gear_shifts
-    shifts = calculate_gear_shifts(gears)
-    vsr = np.vectorize(lambda v: velocity_speed_ratios.get(v, 0))
-    s = len(gears)
-
-    def err(v, r):
-        v = int(v)
-        return np.float32(np.mean(np.abs(ratios[slice(v - 1, v + 1, 1)] - r)))
+    gears = np.asarray(gears)
+    shifts = np.arange(len(gears))[calculate_gear_shifts(gears)]
+    s, dt = len(gears), shift_window / 2
+
+    # Search windows [n, m) of the shifts between engaged gears.
+    g = np.column_stack((gears[shifts - 1], gears[shifts]))
+    engaged = (g != 0).all(1)
+    i, g = shifts[engaged], g[engaged]
+    t = times[i]
+    n = i - (times.searchsorted(t, 'right') - times.searchsorted(t - dt))
+    m = i + (times.searchsorted(t + dt, 'right') - times.searchsorted(t))
+    m = np.minimum(m, s)
+
+    # Ratio errors of all the shifting instants `v` (i.e., gears v - 1, v).
+    v = n[:, None] + np.arange(max(m - n, default=0))
+    # Velocity speed ratios tabulated by gear (i.e., 0 if missing).
+    vsr = np.zeros(int(np.append(g, [0, *velocity_speed_ratios]).max()) + 1)
+    for k, r in velocity_speed_ratios.items():
+        vsr[int(k)] = r
+    r = vsr[g.astype(int)]
+    err = np.abs(ratios.take(v - 1, mode='wrap') - r[:, :1])
+    err += np.abs(ratios.take(v, mode='clip') - r[:, 1:])
+    err = (err / 2).astype(np.float32)
+    # The instant 0 has no previous ratio and the instants >= m are out of
+    # the window, hence they are never the best instant.
+    err = np.where((v == 0) | (v >= m[:, None]), np.inf, err)
+    windows = iter(zip(n.tolist(), err))
 
     k = 0
     new_gears = np.zeros_like(gears)
-    dt = shift_window / 2
-    for i in np.arange(s)[shifts]:
+    for i, b in zip(shifts.tolist(), engaged.tolist()):
         g = gears[slice(i - 1, i + 1, 1)]
-        if g[0] != 0 and g[-1] != 0:
-            t = times[i]
-            n = max(i - (((t - dt) <= times) & (times <= t)).sum(), k)
-            m = min(i + ((t <= times) & (times <= (t + dt))).sum(), s)
-            j = int(sci_opt.brute(err, (slice(n, m, 1),), args=(vsr(g),),
-                                  finish=None))
+        if b:
+            n, e = next(windows)
+            j = max(n, k)
+            j += int(e[j - n:].argmin())  # First best instant.
         else:
-            j = int(i)
+            j = i
 
         x = slice(j - 1, j + 1, 1)
         new_gears[x] = g
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+"""
+It contains the compiled kernels of the recurrent prediction stages.
+
+The kernels advance a recurrence over the whole cycle writing the results into
+the preallocated arrays of the prediction models. They are compiled with
+`numba` when it is installed (i.e., `pip install co2mpas[jit]`), otherwise they
+run as pure-python/numpy functions.
+
+.. note:: The kernels do not call the calibrated (machine learning) models.
+   Their predictions are computed beforehand as whole arrays, thus a kernel is
+   used only when these do not depend on the recurrence itself.
+"""
+
+import numpy as np
+
+try:
+    import numba
+
+    #: Compiles the kernel in nopython mode.
+    jit = numba.njit(cache=True, nogil=True)
+except ImportError:  # Pure-python fallback.
+    def jit(func):
+        return func
+
+
+@jit
+def _start_stop_states(times, can_off, predictions, forced_on,
+                       start_stop_activation_time,
+                       min_time_engine_on_after_start, on_engine,
+                       engine_starts):
+    t_switch_on, off, prev = times[0], False, True
+    for i in range(times.shape[0]):
+        t = times[i]
+        if i > 0:
+            if engine_starts[i - 1]:
+                t_switch_on = t + min_time_engine_on_after_start
+                off = False
+
+            if not off:
+                off = can_off[i]
+
+            prev = on_engine[i - 1]
+
+        on = t <= start_stop_activation_time or forced_on[i] or \
+            not (off and t >= t_switch_on) or \
+            ((prev or can_off[i]) and predictions[i])
+        on_engine[i] = on
+        engine_starts[i] = on and prev != on
+
+
+def calculate_start_stop_states(
+        times, can_off, predictions, forced_on, start_stop_activation_time,
+        min_time_engine_on_after_start, on_engine, engine_starts):
+    """
+    Calculates the engine status and starts of a start/stop system.
+
+    :param times:
+        Time vector [s].
+    :type times: numpy.array
+
+    :param can_off:
+        If the engine can be switched off (i.e., base start/stop rule) [-].
+    :type can_off: numpy.array
+
+    :param predictions:
+        Predictions of the start/stop model [-].
+    :type predictions: numpy.array
+
+    :param forced_on:
+        If the engine has to be on (e.g., a gear is engaged) [-].
+    :type forced_on: numpy.array
+
+    :param start_stop_activation_time:
+        Start-stop activation time threshold [s].
+    :type start_stop_activation_time: float
+
+    :param min_time_engine_on_after_start:
+        Minimum time of engine on after a start [s].
+    :type min_time_engine_on_after_start: float
+
+    :param on_engine:
+        Preallocated array of the engine status [-].
+    :type on_engine: numpy.array
+
+    :param engine_starts:
+        Preallocated array of the engine starts [-].
+    :type engine_starts: numpy.array
+
+    :return:
+        If the engine is on and when the engine starts [-].
+    :rtype: numpy.array, numpy.array
+    """
+    _start_stop_states(
+        np.asarray(times, float), np.asarray(can_off, bool),
+        np.asarray(predictions, bool), np.asarray(forced_on, bool),
+        float(start_stop_activation_time),
+        float(min_time_engine_on_after_start), on_engine, engine_starts
+    )
+    return on_engine, engine_starts
+
+
+@jit
+def _engine_start_currents(engine_starts, delta_times, start_demand,
+                           alternator_nominal_voltage, currents):
+    for i in range(engine_starts.shape[0]):
+        currents[i] = 0.0
+        if engine_starts[i]:
+            den = delta_times[i] * alternator_nominal_voltage
+            if den:
+                currents[i] = -start_demand / den * 1000.0
+
+
+def calculate_engine_start_currents(
+        engine_starts, delta_times, start_demand, alternator_nominal_voltage):
+    """
+    Calculates the current demands to start the engine [A].
+
+    :param engine_starts:
+        When the engine starts [-].
+    :type engine_starts: numpy.array
+
+    :param delta_times:
+        Time steps [s].
+    :type delta_times: numpy.array
+
+    :param start_demand:
+         Energy required to start engine [kJ].
+    :type start_demand: float
+
+    :param alternator_nominal_voltage:
+        Alternator nominal voltage [V].
+    :type alternator_nominal_voltage: float
+
+    :return:
+        Current demands to start the engine [A].
+    :rtype: numpy.array
+    """
+    currents = np.empty_like(delta_times, dtype=float)
+    _engine_start_currents(
+        np.asarray(engine_starts, bool), np.asarray(delta_times, float),
+        float(start_demand), float(alternator_nominal_voltage), currents
+    )
+    return currents
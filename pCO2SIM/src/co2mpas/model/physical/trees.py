@@ -0,0 +1,464 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+"""
+It contains the compiled evaluators of the calibrated tree ensembles.
+
+The prediction models evaluate their calibrated regressors one sample at a
+time, where the per-call overhead of the machine learning libraries dominates
+(e.g., building the `DMatrix` of `xgboost`). Hence, the trees are exported
+once, after the calibration, into flat arrays (see :class:`TreeEnsemble`) that
+are evaluated by a kernel compiled with `numba`, when it is installed (see
+:mod:`co2mpas.model.physical.kernels`), otherwise level by level with `numpy`.
+
+The evaluation replicates the one of the library (i.e., samples casted to
+`float32`, same split conditions and summation order), hence the predictions
+are identical. The decision trees of `sklearn` are compiled as well (see
+:class:`TreeClassifier`).
+
+The `xgboost` regressors of the prediction models are built with the
+calibration settings by :func:`xgb_regressor`.
+"""
+
+import inspect
+import json
+import logging
+import numpy as np
+import xgboost as xgb
+from .defaults import dfl
+from .kernels import jit
+
+log = logging.getLogger(__name__)
+
+try:
+    import numba  # noqa: F401
+    _compiled = True
+except ImportError:  # The pure-python kernel is slower than `numpy`.
+    _compiled = False
+
+
+@jit
+def _predict_row(x, feature, threshold, left, right, missing, value, roots,
+                 base_score, base_last):
+    s = np.float32(0.0) if base_last else base_score
+    for r in range(roots.shape[0]):
+        node = roots[r]
+        while feature[node] >= 0:
+            v = x[feature[node]]
+            if v != v:  # Missing value.
+                node = missing[node]
+            elif v < threshold[node]:
+                node = left[node]
+            else:
+                node = right[node]
+        s += value[node]
+    return s + base_score if base_last else s
+
+
+@jit
+def _predict(X, feature, threshold, left, right, missing, value, roots,
+             base_score, base_last, out):
+    for i in range(X.shape[0]):
+        out[i] = _predict_row(
+            X[i], feature, threshold, left, right, missing, value, roots,
+            base_score, base_last
+        )
+
+
+def _predict_levels(X, feature, threshold, left, right, missing, value, roots,
+                    base_score, base_last):
+    # All trees are advanced together one level at a time.
+    node, i = np.tile(roots, (X.shape[0], 1)), np.arange(X.shape[0])[:, None]
+    while True:
+        f = feature[node]
+        b = f >= 0
+        if not b.any():
+            break
+        v = X[i, np.where(b, f, 0)]
+        node = np.where(b, np.where(
+            np.isnan(v), missing[node],
+            np.where(v < threshold[node], left[node], right[node])
+        ), node)
+    s = np.empty((X.shape[0], node.shape[1] + 1), dtype=np.float32)
+    s[:, 0], s[:, 1:] = 0 if base_last else base_score, value[node]
+    s = np.cumsum(s, axis=1, dtype=np.float32)[:, -1]  # Sequential sum.
+    return s + base_score if base_last else s
+
+
+class TreeEnsemble(object):
+    """
+    Additive ensemble of binary trees stored in flat arrays.
+
+    The nodes of all trees are concatenated. A sample goes to the `left` child
+    when its feature is less than the node `threshold`, to the `missing` child
+    when it is `nan`, otherwise to the `right` child. The prediction is the sum
+    of the `base_score` and of the reached leaves values, summed in this order
+    or with the `base_score` last.
+
+    :param feature:
+        Feature index of each node (-1 for the leaves).
+    :type feature: numpy.array
+
+    :param threshold:
+        Split threshold of each node.
+    :type threshold: numpy.array
+
+    :param left:
+        Left child of each node.
+    :type left: numpy.array
+
+    :param right:
+        Right child of each node.
+    :type right: numpy.array
+
+    :param missing:
+        Child of each node for missing values.
+    :type missing: numpy.array
+
+    :param value:
+        Value of each node (used only for the leaves).
+    :type value: numpy.array
+
+    :param roots:
+        Root node of each tree.
+    :type roots: numpy.array
+
+    :param base_score:
+        Initial prediction score.
+    :type base_score: float
+
+    :param base_last:
+        If True, the `base_score` is added to the sum of the leaves values, as
+        `xgboost<1.0` does.
+    :type base_last: bool
+    """
+
+    def __init__(self, feature, threshold, left, right, missing, value, roots,
+                 base_score=0.0, base_last=False):
+        self.feature = np.asarray(feature, dtype=np.int64)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int64)
+        self.right = np.asarray(right, dtype=np.int64)
+        self.missing = np.asarray(missing, dtype=np.int64)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.base_score = np.float32(base_score)
+        self.base_last = bool(base_last)
+
+    def _arrays(self):
+        return (self.feature, self.threshold, self.left, self.right,
+                self.missing, self.value, self.roots, self.base_score,
+                self.base_last)
+
+    def predict(self, X):
+        """
+        Predicts the samples.
+
+        :param X:
+            Samples (sample x feature).
+        :type X: numpy.array
+
+        :return:
+            Predictions.
+        :rtype: numpy.array
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        if not _compiled:
+            return _predict_levels(X, *self._arrays())
+        out = np.empty(X.shape[0], dtype=np.float32)
+        _predict(X, *self._arrays(), out)
+        return out
+
+    def predict_one(self, *x):
+        """
+        Predicts one sample.
+
+        :param x:
+            Features of the sample.
+        :type x: float
+
+        :return:
+            Prediction.
+        :rtype: float
+        """
+        x = np.array(x, dtype=np.float32)
+        if not _compiled:
+            return _predict_levels(x[None], *self._arrays())[0]
+        return np.float32(_predict_row(x, *self._arrays()))
+
+
+class TreeClassifier(TreeEnsemble):
+    """
+    Decision tree classifier stored in flat arrays.
+
+    The leaves values are the indices of the predicted classes.
+
+    :param classes:
+        Class labels.
+    :type classes: numpy.array
+    """
+
+    def __init__(self, feature, threshold, left, right, missing, value,
+                 classes):
+        super(TreeClassifier, self).__init__(
+            feature, threshold, left, right, missing, value, [0]
+        )
+        self.classes = np.asarray(classes)
+
+    def predict(self, X):
+        return self.classes[super(TreeClassifier, self).predict(X).astype(int)]
+
+    def predict_one(self, *x):
+        return self.classes[int(super(TreeClassifier, self).predict_one(*x))]
+
+
+def _columns(model, columns=None):
+    # Unpacks a features selection pipeline into its estimator and the columns
+    # of its features.
+    steps = getattr(model, 'steps', None)
+    if steps:
+        model = steps[-1][-1]
+        for _, step in steps[:-1]:
+            ind = np.where(step.get_support())[0]
+            columns = ind if columns is None else np.asarray(columns)[ind]
+    return model, columns
+
+
+def _map_features(feature, columns):
+    feature = np.asarray(feature)
+    if columns is not None:
+        b = feature >= 0
+        feature = feature.copy()
+        feature[b] = np.asarray(columns)[feature[b]]
+    return feature
+
+
+def compile_decision_tree(model, columns=None):
+    """
+    Exports a calibrated `sklearn` decision tree classifier into a
+    :class:`TreeClassifier`.
+
+    :param model:
+        Calibrated classifier (also within a features selection pipeline).
+    :type model: sklearn.tree.DecisionTreeClassifier
+
+    :param columns:
+        Column of each model feature in the samples to predict.
+    :type columns: numpy.array, optional
+
+    :return:
+        Compiled tree, or None if the model cannot be compiled.
+    :rtype: TreeClassifier | None
+    """
+    try:
+        model, columns = _columns(model, columns)
+        tree, classes = model.tree_, model.classes_
+    except AttributeError:
+        return None
+    if tree.n_outputs != 1:
+        return None
+    lft, rgt = tree.children_left, tree.children_right
+    leaf, nodes = lft < 0, np.arange(lft.shape[0])
+    left, right = np.where(leaf, nodes, lft), np.where(leaf, nodes, rgt)
+
+    # The samples are casted to float32 and go left if `x <= threshold`, i.e.
+    # if `x < next float32 after the threshold rounded down`.
+    thr = tree.threshold.astype(np.float32)
+    b = thr > tree.threshold
+    thr[b] = np.nextafter(thr[b], np.float32(-np.inf))
+    thr = np.nextafter(thr, np.float32(np.inf))
+
+    go_left = getattr(tree, 'missing_go_to_left', None)
+    if go_left is None:  # No missing values support.
+        missing = left
+    else:
+        missing = np.where(np.asarray(go_left, bool), left, right)
+    return TreeClassifier(
+        _map_features(np.where(leaf, -1, tree.feature), columns), thr, left,
+        right, missing, np.argmax(tree.value[:, 0], axis=1), classes
+    )
+
+
+def _xgb_tree(node, feature_names):
+    # Flat arrays of a tree from its json dump.
+    nodes = {}
+
+    def _visit(n):
+        nodes[n['nodeid']] = n
+        for c in n.get('children', ()):
+            _visit(c)
+
+    _visit(node)
+    n = max(nodes) + 1  # The ids of the pruned nodes are not used.
+    feature, threshold = np.full(n, -1, np.int64), np.zeros(n, np.float32)
+    value, left = np.zeros(n, np.float32), np.arange(n)
+    right, missing = left.copy(), left.copy()
+    for i, v in nodes.items():
+        if 'leaf' in v:
+            value[i] = v['leaf']
+            continue
+        f = v['split']
+        feature[i] = feature_names.index(f) if feature_names else int(f[1:])
+        threshold[i] = v['split_condition']
+        left[i], right[i], missing[i] = v['yes'], v['no'], v['missing']
+    return feature, threshold, left, right, missing, value
+
+
+def _xgb_base_score(model, booster):
+    base_score = getattr(model, 'base_score', None)
+    if base_score is None:  # Estimated by the training (xgboost>=2.0).
+        config = json.loads(booster.save_config())
+        base_score = config['learner']['learner_model_param']['base_score']
+        base_score = float(base_score.strip('[]'))  # '[5E-1]' (xgboost>=3.0).
+    return base_score
+
+
+def _xgb_n_trees(model):
+    # Number of trees used by `model.predict` (None for all).
+    try:
+        sig = inspect.signature(model.predict).parameters['ntree_limit']
+        if sig.default == 0:  # Old xgboost uses all trees by default.
+            return None
+    except (KeyError, ValueError):
+        pass
+    n = getattr(model, 'best_iteration', None)
+    return None if n is None else n + 1
+
+
+def _xgb_trees(model):
+    # Trees of the regressor from the json dump of its booster.
+    if getattr(model, 'booster', None) not in (None, 'gbtree') or \
+            getattr(model, 'objective', None) not in (
+                'reg:squarederror', 'reg:linear'):
+        raise ValueError('unsupported booster')
+    booster = model.get_booster()
+    names = booster.feature_names
+    if names and names == ['f%d' % i for i in range(len(names))]:
+        names = None
+    trees = [_xgb_tree(json.loads(v), names)
+             for v in booster.get_dump(dump_format='json')]
+    return trees[:_xgb_n_trees(model)], _xgb_base_score(model, booster)
+
+
+def _xgb_base_last():
+    # If the base score is added after the trees (xgboost<1.0).
+    import xgboost as xgb
+    return int(xgb.__version__.split('.')[0]) < 1
+
+
+def compile_xgboost(model, columns=None):
+    """
+    Exports the trees of a calibrated `xgboost` regressor into a
+    :class:`TreeEnsemble`.
+
+    If the regressor cannot be compiled (e.g., unsupported booster), a warning
+    is logged and the regressor is evaluated by `xgboost`.
+
+    :param model:
+        Calibrated regressor (also within a `RANSACRegressor` or a features
+        selection pipeline).
+    :type model: xgboost.XGBRegressor | sklearn.linear_model.RANSACRegressor
+
+    :param columns:
+        Column of each model feature in the samples to predict (e.g., the
+        support mask indices of a features selection).
+    :type columns: numpy.array, optional
+
+    :return:
+        Compiled trees, or None if the model cannot be compiled.
+    :rtype: TreeEnsemble | None
+    """
+    model, columns = _columns(model, columns)
+    model = getattr(model, 'estimator_', model)
+    if not hasattr(model, 'get_booster'):  # Not an `xgboost` regressor.
+        return None
+    try:
+        trees, base_score = _xgb_trees(model)
+    except (AttributeError, ValueError, KeyError, TypeError) as ex:
+        log.warning('Regressor %r cannot be compiled, it is evaluated by '
+                    'xgboost: %s', model, ex)
+        return None
+    if not trees:
+        return None
+
+    offsets = np.cumsum([0] + [t[0].shape[0] for t in trees[:-1]])
+    feature, threshold, left, right, missing, value = (
+        np.concatenate(v) for v in zip(*(
+            (ftr, thr, lft + o, rgt + o, mis + o, val)
+            for o, (ftr, thr, lft, rgt, mis, val) in zip(offsets, trees)
+        ))
+    )
+    return TreeEnsemble(
+        _map_features(feature, columns), threshold, left, right, missing,
+        value, offsets, base_score, _xgb_base_last()
+    )
+
+
+# noinspection PyMissingOrEmptyDocstring,PyPep8Naming
+class _XGBRegressor(xgb.XGBRegressor):
+    # Stops early the boosting on a fraction of held out samples (see
+    # `dfl.functions.XGBRegressor`).
+    def __init__(self, *, validation_fraction=0, n_iter_no_change=10,
+                 **kwargs):
+        super(_XGBRegressor, self).__init__(**kwargs)
+        self.validation_fraction = validation_fraction
+        self.n_iter_no_change = n_iter_no_change
+
+    @classmethod
+    def _get_param_names(cls):
+        # The parameters of `xgboost` are not in the signature of `__init__`.
+        names = xgb.XGBRegressor._get_param_names()
+        return sorted(set(names).union(('validation_fraction',
+                                        'n_iter_no_change')))
+
+    def get_xgb_params(self):
+        params = super(_XGBRegressor, self).get_xgb_params()
+        params.pop('validation_fraction', None)
+        params.pop('n_iter_no_change', None)
+        return params
+
+    def fit(self, X, y, **kwargs):
+        n = int(len(y) * (self.validation_fraction or 0))
+        if not (n and self.n_iter_no_change) or 'eval_set' in kwargs:
+            return super(_XGBRegressor, self).fit(X, y, **kwargs)
+        i = np.random.RandomState(0).permutation(len(y))
+        kwargs['eval_set'] = [(X[i[:n]], y[i[:n]])]
+        fit = inspect.signature(xgb.XGBRegressor.fit).parameters
+        if 'early_stopping_rounds' in fit:  # Fit argument (xgboost<2.0).
+            kwargs['early_stopping_rounds'] = self.n_iter_no_change
+            return super(_XGBRegressor, self).fit(
+                X[i[n:]], y[i[n:]], verbose=False, **kwargs
+            )
+        self.set_params(early_stopping_rounds=self.n_iter_no_change)
+        try:
+            return super(_XGBRegressor, self).fit(
+                X[i[n:]], y[i[n:]], verbose=False, **kwargs
+            )
+        finally:
+            self.set_params(early_stopping_rounds=None)
+
+
+def xgb_regressor(**kwargs):
+    """
+    Returns an `xgboost` regressor with the calibration settings.
+
+    The number of threads and the early stopping of the boosting are taken from
+    :class:`co2mpas.model.physical.defaults.dfl.functions.XGBRegressor`.
+
+    :param kwargs:
+        Parameters of the regressor.
+    :type kwargs: object
+
+    :return:
+        Regressor.
+    :rtype: xgboost.XGBRegressor
+    """
+    par = dfl.functions.XGBRegressor
+    n_jobs = -1 if par.n_jobs is None else par.n_jobs  # -1: all processors.
+    return _XGBRegressor(
+        n_jobs=n_jobs, validation_fraction=par.validation_fraction,
+        n_iter_no_change=par.n_iter_no_change, **kwargs
+    )
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+"""
+It contains functions to predict together several variations of a vehicle that
+share the same cycle (e.g., the rows of a simulation plan that change only
+scalar parameters like the vehicle mass or the road loads).
+
+The time-series of the variations are stored in 2-D arrays (variation x time).
+The recurrent stages of all variations are advanced together one time step at a
+time, hence the engine temperature regression models are evaluated once per
+time step for all variations.
+
+The variations are usually simulated by independent dispatches of the model
+(see :func:`co2mpas.plan.make_simulation_plan`). The :class:`PredictionBatcher`
+runs them together and collects their prediction loops.
+"""
+
+import pickle
+import threading
+import collections
+import numpy as np
+
+_local = threading.local()
+
+
+def _model_key(model):
+    # The variations have usually equal copies of the same calibrated model.
+    try:
+        return pickle.dumps(model, pickle.HIGHEST_PROTOCOL)
+    except Exception:  # Not picklable.
+        return id(model)
+
+
+def _thermal_groups(prediction_models):
+    # Variations whose engine temperatures are advanced together, grouped by
+    # engine temperature regression model.
+    groups, k = collections.OrderedDict(), 'engine_coolant_temperatures'
+    for i, models in enumerate(prediction_models):
+        eng_mdl = models[3]
+        mdl = eng_mdl.engine_temperature_prediction_model
+        if k not in (eng_mdl._outputs or {}) and k not in (mdl._outputs or {}):
+            reg = mdl.engine_temperature_regression_model
+            groups.setdefault(_model_key(reg), (reg, []))[1].append(i)
+    return [(reg, np.array(ind)) for reg, ind in groups.values()]
+
+
+def _deltas(reg, dt, *args, prev_temperatures=None, max_temp=None):
+    # Temperature deltas of the regression model (vectorized when possible).
+    if hasattr(reg, 'deltas'):
+        return reg.deltas(
+            dt, *args, prev_temperatures=prev_temperatures, max_temp=max_temp
+        )
+    it = zip(*np.broadcast_arrays(prev_temperatures, max_temp, *args))
+    return np.array([
+        reg.delta(dt, *a, prev_temperature=t, max_temp=m) for t, m, *a in it
+    ])
+
+
+def batch_prediction_loop(prediction_models, times, velocities, accelerations,
+                          motive_powers):
+    """
+    Predicts the vehicle time-series of several variations on the same cycle.
+
+    :param prediction_models:
+        Prediction models of each variation (i.e., wheels, final drive, gear
+        box, engine, and electrics prediction models).
+    :type prediction_models: list[tuple]
+
+    :param times:
+        Time vector [s].
+    :type times: numpy.array
+
+    :param velocities:
+        Velocity vector [km/h].
+    :type velocities: numpy.array
+
+    :param accelerations:
+        Acceleration vector [m/s2].
+    :type accelerations: numpy.array
+
+    :param motive_powers:
+        Motive power of each variation (variation x time) [kW].
+    :type motive_powers: numpy.array
+
+    :return:
+        Vehicle time-series of the variations (variation x time).
+    :rtype: dict[str, numpy.array]
+    """
+    from . import _prediction_stages, _prediction_loop, _output_types, \
+        defaults, buffers
+    kernel = defaults.dfl.functions.prediction_loop.backend == 'kernel'
+    m, n = len(prediction_models), times.shape[0]
+    motive_powers = np.broadcast_to(motive_powers, (m, n))
+    thermal = _thermal_groups(prediction_models)
+    batched = {i for _, ind in thermal for i in ind}
+
+    types = {}
+    for models in prediction_models:
+        types.update(_output_types(models))
+    buf, stages = buffers.OutputsBuffer(types, n, m), []
+    outputs = dict(buf.fields)
+    for i, models in enumerate(prediction_models):
+        out = buf.row(i)
+        for model in models:
+            model.set_outputs(n, out)
+
+        for k, v in out.items():  # The given outputs are copied in the rows.
+            if v is not out.fields.get(k):
+                if k not in outputs:
+                    outputs[k] = np.empty((m, n), dtype=v.dtype)
+                outputs[k][i] = v
+                out[k] = outputs[k][i]
+
+        loops, post, check = _prediction_stages(
+            models, out, times, velocities, accelerations, motive_powers[i],
+            kernel=kernel, thermal=i not in batched
+        )
+        stages.append((zip(*loops), post, check))
+
+    temp = outputs.get('engine_coolant_temperatures')
+    fdp, eng_s = outputs.get('final_drive_powers_in'), \
+        outputs.get('engine_speeds_out_hot')
+    dts = np.ediff1d(times, to_begin=[0])
+    max_temp = [np.array([
+        prediction_models[i][3].engine_temperature_prediction_model
+        .max_engine_coolant_temperature for i in ind
+    ], dtype=float) for _, ind in thermal]
+
+    for j in range(n):
+        for it, _, _ in stages:
+            next(it, None)  # No stages if all models are fake.
+
+        if j + 1 < n:
+            for (reg, ind), t_max in zip(thermal, max_temp):
+                temp[ind, j + 1] = temp[ind, j] + _deltas(
+                    reg, dts[j], fdp[ind, j], eng_s[ind, j], accelerations[j],
+                    prev_temperatures=temp[ind, j], max_temp=t_max
+                )
+
+    for i, (_, post, check) in enumerate(stages):
+        for func in post:
+            func()
+
+        models = prediction_models[i]
+        if check and not models[1].check_ratio_vector(outputs['gears'][i]):
+            # The final drive ratios depend on the gears.
+            res = _prediction_loop(
+                models, times, velocities, accelerations, motive_powers[i],
+                False, kernel
+            )
+            for k, v in res.items():
+                outputs[k][i] = v
+
+    return outputs
+
+
+def get_batcher():
+    """
+    Returns the batcher of the current thread, if any.
+
+    :return:
+        Batcher of the current thread.
+    :rtype: PredictionBatcher | None
+    """
+    return getattr(_local, 'batcher', None)
+
+
+class PredictionBatcher:
+    """
+    Runs several functions (e.g., the dispatches of plan variations) together
+    and predicts their prediction loops on the same cycle with
+    :func:`batch_prediction_loop`.
+
+    Each function runs in its own thread, but only one thread at a time runs.
+    The threads switch only when they wait for the prediction loop, that is
+    computed when all running functions are waiting for it.
+    """
+
+    #: Stack size of the threads [bytes].
+    stack_size = 1 << 25
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._active, self._pending, self._results = 0, {}, {}
+
+    def _target(self, index, func, results):
+        with self._cond:
+            _local.batcher, _local.index = self, index
+            try:
+                results[index] = func(), None
+            except BaseException as ex:
+                results[index] = None, ex
+            finally:
+                _local.batcher = None
+                self._active -= 1
+                self._flush()
+
+    def run(self, *funcs):
+        """
+        Runs the functions together.
+
+        :param funcs:
+            Functions without arguments.
+        :type funcs: callable
+
+        :return:
+            Result and exception of each function.
+        :rtype: list[tuple]
+        """
+        results, self._active = [None] * len(funcs), len(funcs)
+        size = threading.stack_size(self.stack_size)
+        try:
+            threads = [threading.Thread(
+                target=self._target, args=(i, func, results), daemon=True
+            ) for i, func in enumerate(funcs)]
+            for t in threads:
+                t.start()
+        finally:
+            threading.stack_size(size)
+        for t in threads:
+            t.join()
+        return results
+
+    def predict(self, models, times, velocities, accelerations, motive_powers):
+        """
+        Predicts the vehicle time-series together with the other functions.
+
+        :return:
+            Vehicle time-series.
+        :rtype: dict[str, numpy.array]
+        """
+        index = _local.index
+        self._pending[index] = (
+            models, times, velocities, accelerations, motive_powers
+        )
+        self._flush()
+        while index not in self._results:
+            self._cond.wait()
+        res = self._results.pop(index)
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+    def _flush(self):
+        if not self._pending or len(self._pending) < self._active:
+            return
+        from . import _predict
+        pending, self._pending = self._pending, {}
+        cycles = collections.OrderedDict()
+        for i in sorted(pending):
+            key = tuple(np.asarray(v).tobytes() for v in pending[i][1:4])
+            cycles.setdefault(key, []).append(i)
+
+        for ind in cycles.values():
+            try:
+                if len(ind) == 1:
+                    self._results[ind[0]] = _predict(*pending[ind[0]])
+                    continue
+                outputs = batch_prediction_loop(
+                    [pending[i][0] for i in ind], *pending[ind[0]][1:4],
+                    np.array([pending[i][4] for i in ind])
+                )
+                for j, i in enumerate(ind):
+                    self._results[i] = {k: v[j] for k, v in outputs.items()}
+            except Exception as ex:
+                for i in ind:
+                    self._results[i] = ex
+        self._cond.notify_all()
@@ -13,6 +13,7 @@ import math
 import numpy as np
 import schedula as sh
 import co2mpas.utils as co2_utl
+from .buffers import allocate_outputs, OutputsMixin
 from .gear_box import mechanical as gb_mec
 # noinspection PyCompatibility
 import regex
@@ -500,7 +501,7 @@ def calculate_tyre_dimensions(tyre_code):
 
 
 # noinspection PyMissingOrEmptyDocstring
-class WheelsModel:
+class WheelsModel(OutputsMixin):
     key_outputs = [
         'wheel_speeds',
         'wheel_powers',
@@ -550,10 +551,23 @@ class WheelsModel:
         for t, names in self.types.items():
             names = names - set(outputs)
             if names:
-                outputs.update(zip(names, np.empty((len(names), n), dtype=t)))
+                allocate_outputs(outputs, names, n, t)
 
         self.outputs = outputs
 
+    def calculate_results(self, velocities, motive_powers):
+        # Whole array version of `yield_results` (the model is stateless).
+        outputs, given = self.outputs, self._outputs or {}
+        if 'wheel_speeds' not in given:
+            func = _compile_speed_function(self.r_dynamic)
+            outputs['wheel_speeds'][:] = func(velocities)
+        if 'wheel_powers' not in given:
+            outputs['wheel_powers'][:] = motive_powers
+        if 'wheel_torques' not in given:
+            outputs['wheel_torques'][:] = calculate_wheel_torques(
+                outputs['wheel_powers'], outputs['wheel_speeds']
+            )
+
     def yield_results(self, velocities, motive_powers):
         outputs = self.outputs
 
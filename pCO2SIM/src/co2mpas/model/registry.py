@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+"""
+It contains the registry of the CO2MPAS models shared in the process.
+
+The models (e.g., `co2mpas.model.physical.physical`) are built once per model
+configuration (see :data:`co2mpas.model.physical.defaults.dfl`), because the
+defaults are copied into the dispatchers when they are built.
+
+The execution plans of the sub-dispatches (i.e., the sub-models induced by the
+input data nodes and the requested outputs) are cached as well (see
+:func:`get_plan`), because they are the same for all cycles and vehicles that
+provide the same data.
+
+.. note:: The shared models must not be modified. To add nodes, build a new
+   model with its factory function or use `copy()`.
+"""
+
+import functools
+import importlib
+import threading
+import weakref
+import schedula as sh
+
+
+class SharedSubDispatch(sh.SubDispatch):
+    """
+    Sub-dispatch of a shared model.
+
+    The dispatch state is kept only in the returned solution (or in the parent
+    workflow), and neither the sub-dispatch nor the shared model keep a
+    reference to it. The execution plan is taken from the registry (see
+    :func:`get_plan`).
+    """
+
+    def __call__(self, *input_dicts, copy_input_dicts=False, _sol_output=None,
+                 _sol=None):
+        dsp = self.dsp
+        inputs = sh.combine_dicts(*input_dicts, copy=copy_input_dicts)
+        if not self.no_call:
+            dsp = get_plan(
+                dsp, inputs, self.outputs, self.cutoff, self.inputs_dist,
+                self.wildcard, self.shrink
+            )
+        solution = dsp.solution.__class__(
+            dsp, inputs, self.outputs, self.wildcard, self.cutoff,
+            self.inputs_dist, self.no_call, self.rm_unused_nds,
+            stopper=_sol and _sol[1].stopper
+        )
+        solution.run()
+        return self._return(solution, _sol_output, _sol)
+
+
+def _freeze(obj):
+    if isinstance(obj, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in obj.items()))
+    return obj
+
+
+def _defaults_key():
+    from .physical.defaults import dfl
+    return repr(_freeze(dfl.to_dict()))
+
+
+@functools.lru_cache(32)
+def _get_model(path, defaults_key, args, kwargs):
+    module, name = path.rsplit('.', 1)
+    func = getattr(importlib.import_module(module), name)
+    return func(*args, **dict(kwargs))
+
+
+#: Execution plans of the models (weakly referenced), i.e. {dsp: {key: plan}}.
+_PLANS = weakref.WeakKeyDictionary()
+_PLANS_LOCK = threading.Lock()
+
+
+def _get_plan(dsp, inputs, outputs, cutoff, inputs_dist, wildcard, shrink):
+    if shrink:
+        previous = dsp.solution  # The shrink dispatches the model.
+        try:
+            return dsp.shrink_dsp(
+                inputs, outputs or None, cutoff,
+                inputs_dist and dict(inputs_dist), wildcard
+            )
+        finally:
+            dsp.solution = previous
+    return dsp.get_sub_dsp_from_workflow(
+        outputs, dsp.dmap, reverse=True, blockers=inputs, wildcard=wildcard
+    )
+
+
+def get_plan(dsp, inputs, outputs=None, cutoff=None, inputs_dist=None,
+             wildcard=False, shrink=False):
+    """
+    Returns the execution plan of a dispatch (i.e., the sub-model to dispatch).
+
+    It is the sub-model that :meth:`schedula.Dispatcher.dispatch` computes
+    before each dispatch. The plan depends only on the input data nodes (not on
+    their values) and on the dispatch flags, hence it is computed once and it is
+    reused by the following dispatches. The plans are dropped together with the
+    model (i.e., the model is weakly referenced).
+
+    :param dsp:
+        Shared model.
+    :type dsp: schedula.Dispatcher
+
+    :param inputs:
+        Input data nodes.
+    :type inputs: dict | collections.abc.Iterable
+
+    :param outputs:
+        Ending data nodes.
+    :type outputs: list[str], iterable, optional
+
+    :param cutoff:
+        Depth to stop the search.
+    :type cutoff: float, int, optional
+
+    :param inputs_dist:
+        Initial distances of input data nodes.
+    :type inputs_dist: dict[str, int | float], optional
+
+    :param wildcard:
+        If True, when the data node is used as input and target in the
+        ArciDispatch algorithm, the input value will be used as input for the
+        connected functions, but not as output.
+    :type wildcard: bool, optional
+
+    :param shrink:
+        If True the dispatcher is shrink before the dispatch.
+    :type shrink: bool, optional
+
+    :return:
+        Execution plan.
+    :rtype: schedula.Dispatcher
+    """
+    if not (shrink or outputs):
+        return dsp
+    key = (
+        frozenset(inputs), tuple(outputs or ()), cutoff, _freeze(inputs_dist),
+        wildcard, shrink
+    )
+    with _PLANS_LOCK:
+        plans = _PLANS.setdefault(dsp, {})
+        try:
+            return plans[key]
+        except KeyError:
+            plan = plans[key] = _get_plan(dsp, *key)
+            return plan
+
+
+def get_model(path, *args, **kwargs):
+    """
+    Returns the shared model built by the given factory function.
+
+    :param path:
+        Import path of the model factory function
+        (e.g., 'co2mpas.model.physical.physical').
+    :type path: str
+
+    :param args:
+        Positional arguments of the factory function (hashable).
+    :type args: object
+
+    :param kwargs:
+        Keyword arguments of the factory function (hashable).
+    :type kwargs: object
+
+    :return:
+        The shared model.
+    :rtype: schedula.Dispatcher | schedula.utils.dsp.SubDispatch
+    """
+    kwargs = tuple(sorted(kwargs.items()))
+    return _get_model(path, _defaults_key(), args, kwargs)
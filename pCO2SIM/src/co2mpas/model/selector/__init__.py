@@ -28,6 +28,7 @@ import pprint
 import functools
 import numpy as np
 import co2mpas.utils as co2_utl
+from ..registry import get_model, SharedSubDispatch
 
 log = logging.getLogger(__name__)
 
@@ -239,7 +240,7 @@ def define_sub_model(d, inputs, outputs, models, **kwargs):
         outputs = set(outputs).difference(missing)
     if inputs is not None:
         inputs = set(inputs).union(models)
-    return sh.SubDispatch(d.shrink_dsp(inputs, outputs))
+    return SharedSubDispatch(d.shrink_dsp(inputs, outputs))
 
 
 # noinspection PyUnusedLocal
@@ -298,9 +299,8 @@ def combine_outputs(outputs):
 def sub_models():
     models = {}
 
-    from ..physical.engine.thermal import thermal
     models['engine_coolant_temperature_model'] = {
-        'd': thermal(),
+        'd': get_model('co2mpas.model.physical.engine.thermal.thermal'),
         'models': ['engine_temperature_regression_model',
                    'max_engine_coolant_temperature'],
         'inputs': ['times', 'accelerations', 'final_drive_powers_in',
@@ -311,9 +311,8 @@ def sub_models():
         'up_limit': [3],
     }
 
-    from ..physical.engine.start_stop import start_stop
     models['start_stop_model'] = {
-        'd': start_stop(),
+        'd': get_model('co2mpas.model.physical.engine.start_stop.start_stop'),
         'models': ['start_stop_model', 'use_basic_start_stop'],
         'inputs': ['times', 'velocities', 'accelerations',
                    'engine_coolant_temperatures', 'state_of_charges',
@@ -327,10 +326,8 @@ def sub_models():
         'dn_limit': [0.7] * 2,
     }
 
-    from ..physical import physical
-
     models['engine_speed_model'] = {
-        'd': physical(),
+        'd': get_model('co2mpas.model.physical.physical'),
         'select_models': tyre_models_selector,
         'models': ['final_drive_ratios', 'gear_box_ratios',
                    'idle_engine_speed_median', 'idle_engine_speed_std',
@@ -389,7 +386,7 @@ def sub_models():
                    'gear_box_type', 'gears', 'accelerations', 'times',
                    'gear_shifts', 'engine_speeds_out_hot', 'velocities',
                    'lock_up_tc_limits', 'has_torque_converter'],
-        'define_sub_model': lambda d, **kwargs: sh.SubDispatch(d),
+        'define_sub_model': lambda d, **kwargs: SharedSubDispatch(d),
         'outputs': ['engine_speeds_out'],
         'targets': ['engine_speeds_out'],
         'metrics_inputs': ['on_engine'],
@@ -397,10 +394,11 @@ def sub_models():
         'up_limit': [100],
     }
 
-    from ..physical.engine.co2_emission import co2_emission
     from .co2_params import co2_params_selector
     models['co2_params'] = {
-        'd': co2_emission(),
+        'd': get_model(
+            'co2mpas.model.physical.engine.co2_emission.co2_emission'
+        ),
         'model_selector': co2_params_selector,
         'models': ['co2_params_calibrated', 'calibration_status',
                    'initial_friction_params', 'engine_idle_fuel_consumption'],
@@ -412,10 +410,8 @@ def sub_models():
         'weights': [1, None]
     }
 
-    from ..physical.electrics import electrics
-
     models['alternator_model'] = {
-        'd': electrics(),
+        'd': get_model('co2mpas.model.physical.electrics.electrics'),
         'models': ['alternator_status_model', 'alternator_nominal_voltage',
                    'alternator_current_model', 'max_battery_charging_current',
                    'start_demand', 'electric_load', 'alternator_nominal_power',
@@ -433,7 +429,7 @@ def sub_models():
         'weights': [1, 1, 0, 0]
     }
 
-    from ..physical.gear_box.at_gear import at_gear
+    at_gear = get_model('co2mpas.model.physical.gear_box.at_gear.at_gear')
     at_pred_inputs = [
         'idle_engine_speed', 'full_load_curve', 'road_loads', 'vehicle_mass',
         'accelerations', 'motive_powers', 'engine_speeds_out',
@@ -445,16 +441,16 @@ def sub_models():
     ]
 
     models['at_model'] = {
-        'd': at_gear(),
+        'd': at_gear,
         'select_models': functools.partial(
-            at_models_selector, at_gear(), at_pred_inputs
+            at_models_selector, at_gear, at_pred_inputs
         ),
         'models': ['MVL', 'CMV', 'CMV_Cold_Hot', 'DTGS', 'GSPV',
                    'GSPV_Cold_Hot',
                    'specific_gear_shifting', 'change_gear_window_width',
                    'max_velocity_full_load_correction', 'plateau_acceleration'],
         'inputs': at_pred_inputs,
-        'define_sub_model': lambda d, **kwargs: sh.SubDispatch(d),
+        'define_sub_model': lambda d, **kwargs: SharedSubDispatch(d),
         'outputs': ['gears', 'max_gear'],
         'targets': ['gears', 'max_gear'],
         'metrics': [sk_met.accuracy_score, None],
@@ -724,8 +720,8 @@ def _selector(name, data_in, data_out, setting):
         outputs=['model', 'errors']
     )
 
-    return sh.SubDispatch(d, outputs=['model', 'errors'],
-                          output_type='list')
+    return SharedSubDispatch(d, outputs=['model', 'errors'],
+                             output_type='list')
 
 
 def _errors(name, data_id, data_out, setting):
@@ -872,7 +868,7 @@ def _error(name, setting):
     for k, v in default_settings.items():
         d.add_data(k, v)
 
-    func = sh.SubDispatch(
+    func = SharedSubDispatch(
         dsp=d,
         outputs=['errors', 'status'],
         output_type='list'
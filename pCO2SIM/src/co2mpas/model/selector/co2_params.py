@@ -13,7 +13,6 @@ It contains models to compare/select the calibrated co2_params.
 import logging
 import copy
 import functools
-import schedula as sh
 log = logging.getLogger(__name__)
 
 
@@ -75,6 +74,7 @@ def co2_params_selector(
     :rtype: SubDispatch
     """
     from . import _selector
+    from ..registry import SharedSubDispatch
     d = _selector(name, data_in + ('ALL',), data_out, setting).dsp
     n = d.get_node('sort_models', node_attr=None)[0]
     errors, sort_models = n['inputs'], n['function']
@@ -100,5 +100,5 @@ def co2_params_selector(
         outputs=['rank']
     )
 
-    return sh.SubDispatch(d, outputs=['model', 'errors'],
-                          output_type='list')
+    return SharedSubDispatch(d, outputs=['model', 'errors'],
+                             output_type='list')
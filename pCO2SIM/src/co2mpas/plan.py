@@ -16,6 +16,8 @@ import co2mpas.batch as batch
 import functools
 import logging
 import json
+import numpy as np
+from co2mpas.model.physical.defaults import dfl
 
 log = logging.getLogger(__name__)
 
@@ -103,6 +105,48 @@ def define_new_inputs(data, base):
 plan_listener = None
 
 
+def _scalar_changes(changes):
+    # If the plan row changes only scalar data (e.g., the vehicle mass).
+    return all(
+        k[0] == 'base' and np.isscalar(v) and not isinstance(v, str)
+        for k, v in changes.items()
+    )
+
+
+def _run_variations(dsps, jobs):
+    # Simulates the variations, together if more than one. Each variation is
+    # dispatched by its own copy of the model, because the dispatchers keep the
+    # solution of their last dispatch.
+    while len(dsps) < len(jobs):
+        dsps.append(dsps[0].copy())
+    funcs = [functools.partial(d.dispatch, job[0]) for d, job in zip(dsps, jobs)]
+    if len(funcs) == 1:
+        try:
+            return [(funcs[0](), None)]
+        except Exception as ex:
+            return [(None, ex)]
+    from .model.physical.variations import PredictionBatcher
+    return PredictionBatcher().run(*funcs)
+
+
+def _simulate_variations(dsps, jobs, summary):
+    # Simulates the variations and adds their results to the summary. The
+    # failures are logged and recorded in the summary of the variation.
+    for (inputs, p, o, base_keys), (res, ex) in zip(
+            jobs, _run_variations(dsps, jobs)):
+        if ex is None:
+            batch.notify_result_listener(plan_listener, {'solution': res})
+            s = filter_summary(p, o, res.get('summary', {}))
+        elif isinstance(ex, Exception):
+            log.error('Variation "%s" failed due to: %s',
+                      inputs['vehicle_name'], ex, exc_info=ex)
+            s = {'all': {'plan': {'status': {'error': str(ex)}}}}
+        else:
+            raise ex
+        batch._add2summary(summary, s, base_keys)
+    jobs.clear()
+
+
 def make_simulation_plan(plan, timestamp, variation, flag, model=None):
     model, summary = model or batch.vehicle_processing_model(), {}
     run_base = model.get_node('run_base')[0].dsp
@@ -114,7 +158,17 @@ def make_simulation_plan(plan, timestamp, variation, flag, model=None):
     o_cache, o_folder = flag['overwrite_cache'], flag['output_folder']
     modelconf = flag.get('modelconf', None)
     kw, bases = sh.combine_dicts(flag, {'run_base': True}), set()
+    batch_size = dfl.functions.make_simulation_plan.batch_size
+    jobs, group, dsps = [], None, [run_base]
+
     for (i, base_fpath, run), p in tqdm.tqdm(plan, disable=False):
+        # The variations of the same base that change only scalar parameters
+        # are simulated together.
+        key = (base_fpath, run) if _scalar_changes(p) else None
+        if jobs and (key is None or key != group or len(jobs) >= batch_size):
+            _simulate_variations(dsps, jobs, summary)
+        group = key
+
         try:
             base = get_results(model, o_cache, base_fpath, timestamp, run, var,
                                o_folder, modelconf)
@@ -136,14 +190,13 @@ def make_simulation_plan(plan, timestamp, variation, flag, model=None):
         inputs.update(sh.selector(set(base).difference(run_modes), base))
         inputs['vehicle_name'] = name
         inputs.update(kw)
-        res = run_base.dispatch(inputs)
-        batch.notify_result_listener(plan_listener, {'solution': res})
-
-        s = filter_summary(p, o, res.get('summary', {}))
         base_keys = {
             'vehicle_name': (base_fpath, name, run),
         }
-        batch._add2summary(summary, s, base_keys)
+        jobs.append((inputs, p, o, base_keys))
+
+    if jobs:
+        _simulate_variations(dsps, jobs, summary)
 
     return summary
 
@@ -8,9 +8,7 @@
 It contains plotting functions for models and/or output results.
 """
 
-import importlib
 import logging
-import sys
 
 log = logging.getLogger(__name__)
 
@@ -134,12 +132,9 @@ def plot_model_graphs(model_ids=None, view_in_browser=True,
 
     dot_graphs = []
 
+    from .model.registry import get_model
     for model_path in models_path:
-        model_path = model_path.split('.')
-        module_path, object_name = '.'.join(model_path[:-1]), model_path[-1]
-        importlib.import_module(module_path)
-        module = sys.modules[module_path]
-        dsp = getattr(module, object_name)()
+        dsp = get_model(model_path)
         depth = -1 if depth is None else depth
         dot = dsp.plot(view=view_in_browser, depth=depth,
                        directory=output_folder, **kwargs)
@@ -16,6 +16,7 @@ from contextlib import contextmanager
 import contextlib
 import inspect
 import io
+import bisect
 import os
 import re
 import statistics
@@ -32,7 +33,8 @@ except AttributeError:
     isidentifier = re.compile(r'[a-z_]\w*$', re.I).match
 
 __all__ = [
-    'grouper', 'sliding_window', 'median_filter', 'reject_outliers',
+    'grouper', 'sliding_window', 'sliding_window_bounds', 'median_filter',
+    'reject_outliers',
     'clear_fluctuations', 'argmax', 'derivative'
 ]
 
@@ -112,7 +114,7 @@ def sliding_window(xy, dx_window):
     Returns a sliding window (of width dx) over data from the iterable.
 
     :param xy:
-        X and Y values.
+        X and Y values (sorted by x).
     :type xy: list[(float, float) | list[float]]
 
     :param dx_window:
@@ -124,37 +126,55 @@ def sliding_window(xy, dx_window):
     :rtype: generator
     """
 
-    dx = dx_window / 2
-    it = iter(xy)
-    v = next(it)
-    window = []
+    start, stop = sliding_window_bounds([v[0] for v in xy], dx_window)
+    for i, j in zip(start.tolist(), stop.tolist()):
+        yield xy[i:j]
 
-    for x, y in xy:
-        # window limits
-        x_dn = x - dx
-        x_up = x + dx
 
-        # remove samples
-        window = [w for w in window if w[0] >= x_dn]
+def sliding_window_bounds(x, dx_window):
+    """
+    Returns the index bounds of the windows of :func:`sliding_window`.
 
-        # add samples
-        while v and v[0] <= x_up:
-            window.append(v)
-            try:
-                v = next(it)
-            except StopIteration:
-                v = None
+    :param x:
+        Sorted x data.
+    :type x: numpy.array
 
-        yield window
+    :param dx_window:
+        dX window.
+    :type dx_window: float
+
+    :return:
+        Start and stop indices of each window (i.e., `xy[start:stop]`).
+    :rtype: (numpy.array, numpy.array)
+    """
+
+    x, dx = np.asarray(x), dx_window / 2
+    start = np.searchsorted(x, x - dx)
+    stop = np.searchsorted(x, x + dx, 'right')
+    # Only the samples of the previous window are removed.
+    start[:1] = 0
+    np.minimum(start[1:], stop[:-1], out=start[1:])
+    return start, stop
+
+
+#: Index of the filtered value in the sorted window, given the window length.
+_sorted_filters = {
+    statistics.median_high: lambda n: n // 2,
+    statistics.median_low: lambda n: (n - 1) // 2
+}
 
 
 def median_filter(x, y, dx_window, filter=statistics.median_high):
     """
     Calculates the moving median-high of y values over a constant dx.
 
+    The median-high and median-low are taken from a sorted window that is
+    updated incrementally (O(n log w) comparisons), the other filters are
+    applied to each window.
+
     :param x:
-        x data.
-    :type x: Iterable
+        x data (sorted).
+    :type x: numpy.array | list
 
     :param y:
         y data.
@@ -173,12 +193,25 @@ def median_filter(x, y, dx_window, filter=statistics.median_high):
     :rtype: numpy.array
     """
 
-    xy = list(zip(x, y))
-    Y = []
-    add = Y.append
-    for v in sliding_window(xy, dx_window):
-        add(filter(list(zip(*v))[1]))
-    return np.array(Y)
+    start, stop = sliding_window_bounds(x, dx_window)
+    bounds = zip(start.tolist(), stop.tolist())
+    dtype = y.dtype if isinstance(y, np.ndarray) else None
+    y = y.tolist() if dtype is not None else list(y)
+
+    if filter in _sorted_filters and all(v == v for v in y):  # Without nan.
+        index, window, Y, j0, j1 = _sorted_filters[filter], [], [], 0, 0
+        insort, find = bisect.insort, bisect.bisect_left
+        for i, j in bounds:
+            for k in range(j1, j):
+                insort(window, y[k])
+            for k in range(j0, i):
+                del window[find(window, y[k])]
+            j0, j1 = i, j
+            Y.append(window[index(j - i)])
+    else:
+        Y, dtype = [filter(tuple(y[i:j])) for i, j in bounds], None
+
+    return np.array(Y, dtype=dtype)
 
 
 def get_inliers(x, n=1, med=np.median, std=np.std):
@@ -243,10 +276,30 @@ def ret_v(v):
     return lambda: v
 
 
+def _fluctuates(y):
+    # Has the sequence both increments and decrements?
+    up, dn = False, False
+    for a, b in zip(y, y[1:]):
+        if b > a:
+            up = True
+        elif b < a:
+            dn = True
+
+        if up and dn:
+            return True
+    return False
+
+
 def clear_fluctuations(times, gears, dt_window):
     """
     Clears the gear identification fluctuations.
 
+    The windows that fluctuate (i.e., with both increments and decrements) are
+    set to their median-high, one after the other. Since a correction changes
+    only the samples of its window, the windows are checked with cumulative
+    sums of the increments/decrements, except those that overlap the corrected
+    samples.
+
     :param times:
         Time vector.
     :type times: numpy.array
@@ -264,27 +317,31 @@ def clear_fluctuations(times, gears, dt_window):
     :rtype: numpy.array
     """
 
-    xy = [list(v) for v in zip(times, gears)]
-
-    for samples in sliding_window(xy, dt_window):
-
-        up, dn = False, False
-
-        x, y = zip(*samples)
-
-        for k, d in enumerate(np.diff(y)):
-            if d > 0:
-                up = True
-            elif d < 0:
-                dn = True
-
-            if up and dn:
-                m = statistics.median_high(y)
-                for v in samples:
-                    v[1] = m
-                break
-
-    return np.array([y[1] for y in xy])
+    start, stop = sliding_window_bounds(times, dt_window)
+    d, j = np.diff(np.asarray(gears)), np.maximum(stop - 1, start)
+    b = np.ones(start.shape, bool)
+    for c in (d > 0, d < 0):
+        c = np.append(0, np.cumsum(c))
+        b &= c[j] > c[start]
+    candidates = np.flatnonzero(b).tolist()
+
+    dtype = gears.dtype if isinstance(gears, np.ndarray) else None
+    y = gears.tolist() if dtype is not None else list(gears)
+    start, stop, n = start.tolist(), stop.tolist(), len(y)
+    i, modified = 0, 0  # Samples [:modified] could be corrected.
+    while True:
+        k = bisect.bisect_left(candidates, i)
+        if k == len(candidates):
+            break
+        i = candidates[k]
+        while i < n and (i == candidates[k] or start[i] < modified):
+            s, e = start[i], stop[i]
+            if _fluctuates(y[s:e]):
+                y[s:e] = [statistics.median_high(y[s:e])] * (e - s)
+                modified = e
+            i += 1
+
+    return np.array(y, dtype=dtype)
 
 
 def _err(v, y1, y2, r, l):
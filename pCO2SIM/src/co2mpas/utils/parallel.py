@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+"""
+It contains functions to execute model functions in worker processes.
+
+Functions and arguments are serialized with :mod:`dill` (the calibrated models
+contain closures) and the current model configuration (see
+:data:`co2mpas.model.physical.defaults.dfl`) is replicated in the workers, so
+that the `--modelconf` settings are applied also on platforms that spawn the
+processes.
+"""
+
+import concurrent.futures as cf
+import logging
+import sys
+
+log = logging.getLogger(__name__)
+
+#: Process pools shared by the model (keyed by the number of workers).
+_EXECUTORS = {}
+
+#: Is the current process a worker of a process pool?
+_IS_WORKER = False
+
+#: Last model configuration applied in the worker process.
+_WORKER_DEFAULTS = None
+
+#: Peak resident set size of the worker processes since the last reset [MB].
+_WORKERS_PEAK_RSS = None
+
+_IS_LINUX = sys.platform.startswith('linux')
+
+
+def _reset_process_peak_rss():
+    # Resets the peak resident set size of the process (only on Linux).
+    if _IS_LINUX:
+        try:
+            with open('/proc/self/clear_refs', 'w') as f:
+                f.write('5')
+        except OSError:
+            pass
+
+
+def _get_process_peak_rss():
+    # Returns the peak resident set size of the process [MB].
+    if _IS_LINUX:
+        try:
+            with open('/proc/self/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (2 ** 20 if sys.platform == 'darwin' else 1024)
+    except ImportError:  # Windows.
+        return None
+
+
+def reset_peak_rss():
+    """
+    Resets the peak resident set size of the process and of its workers.
+
+    The peak of the process is reset only on Linux, otherwise it remains the
+    peak since the process has started.
+    """
+    global _WORKERS_PEAK_RSS
+    _WORKERS_PEAK_RSS = None
+    _reset_process_peak_rss()
+
+
+def get_peak_rss():
+    """
+    Returns the peak resident set size since the last reset.
+
+    It is the maximum between the peak of the process and the peaks of the
+    worker processes while executing the functions whose results have been
+    collected (see :meth:`AsyncResult.get`).
+
+    :return:
+        Peak resident set size [MB], or None if it is not available.
+    :rtype: float | None
+    """
+    rss = [v for v in (_get_process_peak_rss(), _WORKERS_PEAK_RSS)
+           if v is not None]
+    return max(rss) if rss else None
+
+
+def get_executor(n_workers=None):
+    """
+    Returns the shared process pool executor.
+
+    :param n_workers:
+        Maximum number of worker processes. If None, it is the number of
+        processors of the machine.
+    :type n_workers: int, optional
+
+    :return:
+        Process pool executor, or None if called from a worker process (nested
+        pools are not allowed).
+    :rtype: concurrent.futures.ProcessPoolExecutor | None
+    """
+    if _IS_WORKER:
+        return None
+    try:
+        return _EXECUTORS[n_workers]
+    except KeyError:
+        log.debug('Starting process pool with %s workers...', n_workers)
+        executor = _EXECUTORS[n_workers] = cf.ProcessPoolExecutor(n_workers)
+        return executor
+
+
+def shutdown_executors(wait=True):
+    """
+    Shutdowns all shared process pool executors.
+
+    :param wait:
+        Wait the pending futures are done executing?
+    :type wait: bool
+    """
+    while _EXECUTORS:
+        _EXECUTORS.popitem()[1].shutdown(wait=wait)
+
+
+class AsyncResult(object):
+    """
+    Result of a function executed in a worker process.
+
+    The future result is the serialized function result and the peak resident
+    set size of the worker during the execution [MB].
+    """
+
+    def __init__(self, future):
+        self.future = future
+
+    def get(self):
+        """
+        Waits and returns the function result.
+
+        If the function has raised, the same exception is raised.
+
+        :return:
+            Function result.
+        :rtype: object
+        """
+        if not hasattr(self, '_value'):
+            import dill
+            global _WORKERS_PEAK_RSS
+            value, rss = self.future.result()
+            if rss is not None:
+                _WORKERS_PEAK_RSS = max(rss, _WORKERS_PEAK_RSS or 0)
+            self._value = dill.loads(value)
+        return self._value
+
+
+def get_result(value):
+    """
+    Returns the value or the result of an asynchronous execution.
+
+    :param value:
+        Value or asynchronous result.
+    :type value: object | AsyncResult
+
+    :return:
+        Value.
+    :rtype: object
+    """
+    if isinstance(value, AsyncResult):
+        return value.get()
+    return value
+
+
+def get_estimation_result(estimations):
+    """
+    Returns the result of the first data node estimation.
+
+    It is used as data node function to wait the asynchronous results.
+
+    :param estimations:
+        Data node estimations (function id --> value).
+    :type estimations: dict
+
+    :return:
+        Value.
+    :rtype: object
+    """
+    return get_result(next(iter(estimations.values())))
+
+
+def submit(executor, func, *args, **kwargs):
+    """
+    Executes the function in a worker process.
+
+    :param executor:
+        Process pool executor.
+    :type executor: concurrent.futures.ProcessPoolExecutor
+
+    :param func:
+        Function to be executed.
+    :type func: callable
+
+    :return:
+        Asynchronous result.
+    :rtype: AsyncResult
+    """
+    import dill
+    from co2mpas.model.physical.defaults import dfl
+    payload = dill.dumps((func, args, kwargs))
+    return AsyncResult(executor.submit(_run, dill.dumps(dfl), payload))
+
+
+def _run(defaults, payload):
+    import dill
+    global _IS_WORKER, _WORKER_DEFAULTS
+    _IS_WORKER = True
+    if defaults != _WORKER_DEFAULTS:
+        from co2mpas.model.physical.defaults import dfl
+        dfl.from_dict(dill.loads(defaults))
+        _WORKER_DEFAULTS = defaults
+    func, args, kwargs = dill.loads(payload)
+    _reset_process_peak_rss()
+    value = dill.dumps(func(*args, **kwargs))
+    return value, _get_process_peak_rss()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+"""
+Performance benchmarks (time and memory).
+
+They are skipped by default, set ``RUN_BENCHMARKS=1`` to run them, e.g.::
+
+    RUN_BENCHMARKS=1 pytest -s tests/benchmarks
+
+Results are logged at INFO level.
+"""
+import functools
+import glob
+import logging
+import os
+import os.path as osp
+import timeit
+import unittest
+
+log = logging.getLogger(__name__)
+
+
+def _bool_env_var(var_name, default):
+    v = os.environ.get(var_name, default)
+    try:
+        if v.strip().lower() in ('', '0', 'off', 'false'):
+            return False
+    except AttributeError:
+        pass
+    return bool(v)
+
+
+RUN_BENCHMARKS = _bool_env_var('RUN_BENCHMARKS', False)
+RUN_INPUT_FOLDER = os.environ.get('RUN_INPUT_FOLDER', None)
+
+skip_benchmark = unittest.skipUnless(
+    RUN_BENCHMARKS, 'Set `RUN_BENCHMARKS=1` to run the benchmarks.'
+)
+
+
+def input_files():
+    """
+    Returns the vehicle input files of the benchmarks.
+
+    They are the demo files, or the files of the `RUN_INPUT_FOLDER`.
+
+    :return:
+        Input file paths.
+    :rtype: list[str]
+    """
+    import co2mpas
+    path = RUN_INPUT_FOLDER or osp.join(osp.dirname(co2mpas.__file__), 'demos')
+    return sorted(f for f in glob.glob(osp.join(path, '*.xlsx'))
+                  if not osp.basename(f).startswith(('~', 'co2mpas_simplan')))
+
+
+@functools.lru_cache(None)
+def vehicle_solution(fpath):
+    """
+    Returns the CO2MPAS model solution of a vehicle input file.
+
+    :param fpath:
+        Input file path.
+    :type fpath: str
+
+    :return:
+        CO2MPAS model solution (i.e., `dsp_solution`).
+    :rtype: schedula.Solution
+    """
+    from co2mpas.batch import vehicle_processing_model
+    return vehicle_processing_model().dispatch({
+        'input_file_name': fpath,
+        'variation': {'flag.only_summary': True}
+    })['solution']['dsp_solution']
+
+
+def _output_cases(output, keys):
+    for fpath in input_files():
+        vehicle = osp.splitext(osp.basename(fpath))[0]
+        for k, data in sorted(vehicle_solution(fpath).items()):
+            if k.startswith('output.%s.' % output) and \
+                    all(i in data for i in keys):
+                yield vehicle, k.split('.')[-1], data
+
+
+def prediction_cases(*keys):
+    """
+    Yields the prediction outputs of the benchmark vehicles that have the keys.
+
+    :param keys:
+        Required data nodes of the prediction outputs.
+    :type keys: str
+
+    :return:
+        Vehicle name, cycle name, and prediction outputs.
+    :rtype: tuple[str, str, dict]
+    """
+    return _output_cases('prediction', keys)
+
+
+def calibration_cases(*keys):
+    """
+    Yields the calibration outputs of the benchmark vehicles that have the keys.
+
+    :param keys:
+        Required data nodes of the calibration outputs.
+    :type keys: str
+
+    :return:
+        Vehicle name, cycle name, and calibration outputs.
+    :rtype: tuple[str, str, dict]
+    """
+    return _output_cases('calibration', keys)
+
+
+def best_time(func, *args, repeat=5, number=1):
+    """
+    Returns the best execution time of the function [s].
+    """
+    timer = timeit.Timer(lambda: func(*args))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _maxrss():
+    import resource
+    import sys
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss * (1 if sys.platform == 'darwin' else 1024)  # [bytes]
+
+
+def _peak_rss(conn, func, args):
+    start = _maxrss()
+    func(*args)
+    conn.send(_maxrss() - start)
+    conn.close()
+
+
+def peak_rss(func, *args):
+    """
+    Returns the increase of the peak resident set size executing the function.
+
+    The function is executed in a forked process, so the measure is not
+    affected by the previous executions [bytes].
+    """
+    import multiprocessing as mp
+    ctx = mp.get_context('fork')
+    parent, child = ctx.Pipe(duplex=False)
+    p = ctx.Process(target=_peak_rss, args=(child, func, args))
+    p.start()
+    child.close()
+    try:
+        return parent.recv()
+    finally:
+        p.join()
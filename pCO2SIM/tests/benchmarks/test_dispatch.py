@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+import logging
+import os.path as osp
+import unittest
+
+from . import skip_benchmark, input_files, vehicle_solution, best_time
+
+log = logging.getLogger(__name__)
+
+
+def _without_plans(func, *args):
+    # Previous behaviour: the execution plans are computed at each dispatch.
+    from co2mpas.model.registry import _PLANS
+    _PLANS.clear()
+    return func(*args)
+
+
+@skip_benchmark
+class DispatchOverhead(unittest.TestCase):
+    def test_execution_plans(self):
+        from co2mpas.model.registry import get_model
+        n = 0
+        for fpath in input_files():
+            vehicle = osp.splitext(osp.basename(fpath))[0]
+            sol = vehicle_solution(fpath)
+            cycles = tuple(k for k in ('wltp_h', 'wltp_l')
+                           if 'output.calibration.%s' % k in sol)
+            if not cycles:
+                continue
+            func = get_model(
+                'co2mpas.model.selector.selector', *cycles,
+                pred_cyl_ids=('nedc_h', 'nedc_l', 'wltp_h', 'wltp_l')
+            )
+            keys = ['config.selector.all', 'input.prediction.models'] + [
+                'output.calibration.%s' % k for k in cycles
+            ]
+            args = [sol.get(k, {}) for k in keys]
+            ref = best_time(_without_plans, func, *args, repeat=10)
+            cached = best_time(func, *args, repeat=10)
+            log.info('%s models selection [ms]: %.1f -> %.1f (%.1f saved per '
+                     'cycle).', vehicle, ref * 1000, cached * 1000,
+                     (ref - cached) * 1000 / len(cycles))
+            n += 1
+        self.assertTrue(n, 'No models selection has been benchmarked.')
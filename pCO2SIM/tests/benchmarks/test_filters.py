@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+import logging
+import unittest
+
+import numpy as np
+
+from . import skip_benchmark, best_time
+
+log = logging.getLogger(__name__)
+
+
+@skip_benchmark
+class Filters(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        self.cycles = {}
+        for freq in (1, 10):
+            times = np.arange(0, 1800, 1 / freq)
+            noise = rnd.normal(0, .7, times.shape[0])
+            gears = np.round(3 + 2 * np.sin(times / 60) + noise)
+            self.cycles[freq] = times, gears
+
+    def test_median_filter(self):
+        import co2mpas.utils as co2_utl
+        from ..utils.test_filters import _median_filter
+        for freq, (times, gears) in sorted(self.cycles.items()):
+            for dt in (2.0, 10.0):
+                ref = best_time(_median_filter, times, gears, dt, repeat=1)
+                res = best_time(co2_utl.median_filter, times, gears, dt)
+                log.info('%d Hz median filter (window %.0f s) [ms]: '
+                         '%.1f -> %.1f.', freq, dt, ref * 1000, res * 1000)
+
+    def test_clear_fluctuations(self):
+        import co2mpas.utils as co2_utl
+        from ..utils.test_filters import _clear_fluctuations
+        for freq, (times, gears) in sorted(self.cycles.items()):
+            for dt in (2.0, 10.0):
+                args = times, gears, dt
+                ref = best_time(_clear_fluctuations, *args, repeat=1)
+                res = best_time(co2_utl.clear_fluctuations, *args)
+                log.info('%d Hz clear fluctuations (window %.0f s) [ms]: '
+                         '%.1f -> %.1f.', freq, dt, ref * 1000, res * 1000)
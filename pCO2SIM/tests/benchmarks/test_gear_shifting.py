@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+import logging
+import unittest
+
+import numpy as np
+
+from co2mpas.model.physical.defaults import dfl
+from . import skip_benchmark, calibration_cases, best_time
+
+log = logging.getLogger(__name__)
+
+_ARGS = (
+    'gears', 'engine_speeds_out', 'times', 'velocities', 'accelerations',
+    'motive_powers', 'velocity_speed_ratios'
+)
+
+
+def _calibration_data():
+    keys = _ARGS + ('idle_engine_speed', 'full_load_curve')
+    for vehicle, cycle, data in calibration_cases(*keys):
+        yield '%s %s' % (vehicle, cycle), data
+
+
+def _reference_identify_gears(
+        times, velocities, accelerations, engine_speeds_out,
+        velocity_speed_ratios, stop_velocity, plateau_acceleration,
+        change_gear_window_width, idle_engine_speed):
+    # Per-sample identification, sliding-window median and brute force search
+    # of the shifting instants.
+    import statistics
+    from ..models.test_gear_shifting import \
+        _reference_correct_gear_shifts as _correct_gear_shifts
+    # Previous list-based windows, independent of `sliding_window_bounds`.
+    from ..utils.test_filters import _sliding_window, _clear_fluctuations
+    vsr = [v for v in velocity_speed_ratios.items() if v[0] != 0]
+    ratios = velocities / engine_speeds_out
+    idle = (idle_engine_speed[0] - idle_engine_speed[1],
+            idle_engine_speed[0] + idle_engine_speed[1])
+    ratios[engine_speeds_out < idle[0]] = 0
+
+    def _identify_gear(ratio, vel, acc):
+        if vel <= stop_velocity:
+            return 0
+        m, (gear, vs) = min((abs(v - ratio), (k, v)) for k, v in vsr)
+        if acc < 0 and (vel <= idle[0] * vs or abs(vel / idle[1] - ratio) < m):
+            return 0
+        starts = (vel > stop_velocity and acc > 0) or acc > plateau_acceleration
+        if gear == 0 and starts:
+            return 1
+        return gear
+
+    gear = list(map(_identify_gear, ratios, velocities, accelerations))
+    xy, dt = list(zip(times, gear)), change_gear_window_width
+    gear = np.array([statistics.median_high(list(zip(*w))[1])
+                     for w in _sliding_window(xy, dt)])
+    gear = _correct_gear_shifts(times, ratios, gear, velocity_speed_ratios)
+    return _clear_fluctuations(times, gear, change_gear_window_width)
+
+
+@skip_benchmark
+class GearShifting(unittest.TestCase):
+    def setUp(self):
+        cmv = dfl.functions.CMV
+        self.cmv = cmv.ENABLE_OPT_LOOP, cmv.VECTORIZE_OPT_LOOP
+        cmv.ENABLE_OPT_LOOP = True
+
+    def tearDown(self):
+        cmv = dfl.functions.CMV
+        cmv.ENABLE_OPT_LOOP, cmv.VECTORIZE_OPT_LOOP = self.cmv
+
+    def assertBenchmarked(self, n):
+        self.assertTrue(n, 'No vehicle calibration has been benchmarked.')
+
+    def test_cmv_opt_loop(self):
+        from co2mpas.model.physical.gear_box.at_gear import CMV, \
+            correct_gear_v2, correct_gear_v3
+
+        def _fit(correct_gear, vectorize):
+            dfl.functions.CMV.VECTORIZE_OPT_LOOP = vectorize
+            return CMV().fit(correct_gear, *args)
+
+        n = 0
+        for name, data in _calibration_data():
+            vsr = data['velocity_speed_ratios']
+            idle, flc = data['idle_engine_speed'], data['full_load_curve']
+            args = [data[k] for k in _ARGS]
+            args.append(data.get('stop_velocity', dfl.values.stop_velocity))
+            for cg_name, correct_gear in (
+                    ('v2', correct_gear_v2(vsr, idle, flc)),
+                    ('v3', correct_gear_v3(vsr, idle))):
+                ref, res = _fit(correct_gear, False), _fit(correct_gear, True)
+                self.assertEqual(list(ref), list(res))
+                for k, v in ref.items():
+                    np.testing.assert_array_equal(res[k], v, err_msg=k)
+
+                ref = best_time(_fit, correct_gear, False, repeat=1)
+                res = best_time(_fit, correct_gear, True, repeat=3)
+                log.info('%s CMV calibration (correct_gear_%s) [ms]: '
+                         '%.1f -> %.1f.', name, cg_name, ref * 1000,
+                         res * 1000)
+            n += 1
+        self.assertBenchmarked(n)
+
+    def test_identify_gears(self):
+        from co2mpas.model.physical.gear_box.mechanical import identify_gears
+        keys = ('times', 'velocities', 'accelerations', 'engine_speeds_out')
+        n = 0
+        for name, data in _calibration_data():
+            args = [data[k] for k in keys]
+            kw = dict(
+                velocity_speed_ratios=data['velocity_speed_ratios'],
+                stop_velocity=dfl.values.stop_velocity,
+                plateau_acceleration=dfl.values.plateau_acceleration,
+                change_gear_window_width=dfl.values.change_gear_window_width,
+                idle_engine_speed=data['idle_engine_speed']
+            )
+            # Same cycle resampled at 10 Hz.
+            t = np.arange(args[0][0], args[0][-1], .1)
+            for freq, a in (('', args), (' 10Hz', [t] + [
+                    np.interp(t, args[0], v) for v in args[1:]])):
+                ref = _reference_identify_gears(*a, **kw)
+                np.testing.assert_array_equal(identify_gears(*a, **kw), ref)
+
+                ref = best_time(lambda: _reference_identify_gears(*a, **kw),
+                                repeat=1)
+                res = best_time(lambda: identify_gears(*a, **kw), repeat=3)
+                log.info('%s%s gear identification [ms]: %.1f -> %.1f.',
+                         name, freq, ref * 1000, res * 1000)
+            n += 1
+        self.assertBenchmarked(n)
+
+    def test_parallel_calibration(self):
+        import co2mpas.utils.parallel as co2_par
+        from co2mpas.model.physical.gear_box.at_gear import at_gear
+        cfg, d = dfl.functions.at_gear, at_gear()
+        models = ('CMV', 'CMV_Cold_Hot', 'DTGS', 'GSPV', 'GSPV_Cold_Hot')
+        keys = set(d.data_nodes) - set(models) - {'gears', 'correct_gear'}
+
+        def _calibrate(executor, inputs):
+            cfg.executor = executor
+            return d.dispatch(inputs, outputs=models)
+
+        executor, n = cfg.executor, 0
+        try:
+            for name, data in _calibration_data():
+                inputs = {k: v for k, v in data.items() if k in keys}
+                inputs['gears'] = data['gears']
+                ref = _calibrate('sync', inputs)
+                res = _calibrate('parallel', inputs)
+                for k in models:
+                    if k not in ref:
+                        continue
+                    # The calibrated models predict the same gears.
+                    i = dict(inputs, specific_gear_shifting=k)
+                    i.pop('gears')
+                    ref_gears, res_gears = [
+                        d.dispatch(dict(i, **{k: m[k]}), ['gears'])['gears']
+                        for m in (ref, res)
+                    ]
+                    np.testing.assert_array_equal(res_gears, ref_gears, k)
+
+                ref = best_time(_calibrate, 'sync', inputs, repeat=3)
+                res = best_time(_calibrate, 'parallel', inputs, repeat=3)
+                log.info('%s A/T models calibration [ms]: %.1f -> %.1f.', name,
+                         ref * 1000, res * 1000)
+                n += 1
+        finally:
+            cfg.executor = executor
+            co2_par.shutdown_executors()
+        self.assertBenchmarked(n)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+"""
+Peak memory of the output processing of the model solution.
+
+It records why the solution is still parsed into nested dicts: read-only
+views of the solution gave the same peak RSS on the demo vehicle, since the
+schedula helpers copy only the containers and not the values. Only a deep
+copy of the solution would matter.
+"""
+import copy
+import logging
+import os.path as osp
+import unittest
+
+from . import skip_benchmark, input_files, vehicle_solution, peak_rss
+
+log = logging.getLogger(__name__)
+
+
+def _deepcopy(solution):
+    from co2mpas.batch import parse_dsp_solution
+    return copy.deepcopy(parse_dsp_solution(solution))
+
+
+def _process_outputs(parse, solution):
+    from co2mpas.report import report
+    report()(parse(solution), 'vehicle')
+
+
+@skip_benchmark
+class OutputsMemory(unittest.TestCase):
+    def test_peak_rss(self):
+        from co2mpas.batch import vehicle_processing_model, parse_dsp_solution
+        model, n = vehicle_processing_model(), 0
+        for fpath in input_files():
+            vehicle = osp.splitext(osp.basename(fpath))[0]
+            total = peak_rss(model.dispatch, {
+                'input_file_name': fpath,
+                'variation': {'flag.only_summary': True}
+            })
+            sol = vehicle_solution(fpath)
+            res = peak_rss(_process_outputs, parse_dsp_solution, sol)
+            cp = peak_rss(_process_outputs, _deepcopy, sol)
+            log.info('%s peak RSS [MB]: vehicle %.1f, outputs %.1f '
+                     '(deepcopy %.1f).', vehicle, total / 2 ** 20,
+                     res / 2 ** 20, cp / 2 ** 20)
+            self.assertLess(res, cp)
+            n += 1
+        self.assertTrue(n, 'No vehicle has been benchmarked.')
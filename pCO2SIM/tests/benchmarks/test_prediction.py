@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+import copy
+import logging
+import unittest
+
+import numpy as np
+
+from . import skip_benchmark, prediction_cases, best_time
+
+log = logging.getLogger(__name__)
+
+_MODELS = (
+    'wheels_prediction_model', 'final_drive_prediction_model',
+    'gear_box_prediction_model', 'engine_prediction_model',
+    'electrics_prediction_model'
+)
+
+_ARGS = 'times', 'velocities', 'accelerations', 'motive_powers'
+
+
+def _prediction_models(data):
+    # The wheels and final drive models of the cycle outputs are usually fake,
+    # hence they are rebuilt to benchmark their computation.
+    from co2mpas.model.physical.wheels import define_wheels_prediction_model
+    from co2mpas.model.physical.final_drive import \
+        define_final_drive_prediction_model
+    models = [data[k] for k in _MODELS]
+    models[0] = define_wheels_prediction_model(data['r_dynamic'])
+    models[1] = define_final_drive_prediction_model(
+        data['final_drive_ratios'], data.get('final_drive_torque_loss'),
+        data['n_wheel_drive'], data['final_drive_efficiency']
+    )
+    return models
+
+
+def _loop(models, args, vectorize, kernel=False):
+    from co2mpas.model.physical import _prediction_loop
+    return _prediction_loop(
+        copy.deepcopy(models), *args, vectorize=vectorize, kernel=kernel
+    )
+
+
+def _checksums(outputs):
+    # The hasher is not enabled, to not intercept schedula.
+    from co2mpas.co2mparable.co2hasher import Co2Hasher
+    hasher = Co2Hasher.__new__(Co2Hasher)
+    return {k: hasher.checksum(v) for k, v in outputs.items()}
+
+
+def _stateless_stages(models, args, vectorize):
+    whl, fd, gb = models[:3]
+    outputs = {}
+    for m in (whl, fd, gb):
+        m.set_outputs(args[0].shape[0], outputs)
+    wheels = [outputs[k] for k in ('wheel_speeds', 'wheel_torques',
+                                   'wheel_powers')]
+    if vectorize:
+        whl.calculate_results(args[1], args[3])
+        fd.calculate_results(gb.get_gears(), *wheels)
+    else:
+        for _ in zip(whl.yield_results(args[1], args[3]),
+                     fd.yield_results(outputs['gears'], *wheels)):
+            pass
+
+
+@skip_benchmark
+class PredictionLoop(unittest.TestCase):
+    def assertBenchmarked(self, n):
+        self.assertTrue(n, 'No vehicle prediction has been benchmarked.')
+
+    def test_block_vectorized_loop(self):
+        n = 0
+        for vehicle, cycle, data in prediction_cases(*(_MODELS + _ARGS)):
+            models = _prediction_models(data)
+            args = [data[i] for i in _ARGS]
+
+            ref, res = _loop(models, args, False), _loop(models, args, True)
+            for i, v in ref.items():
+                np.testing.assert_array_equal(res[i], v, err_msg=i)
+
+            ref = best_time(_stateless_stages, models, args, False)
+            res = best_time(_stateless_stages, models, args, True)
+            log.info('%s %s stateless stages [ms]: %.1f -> %.1f.',
+                     vehicle, cycle, ref * 1000, res * 1000)
+
+            ref = best_time(_loop, models, args, False, repeat=3)
+            res = best_time(_loop, models, args, True, repeat=3)
+            log.info('%s %s prediction loop [ms]: %.1f -> %.1f.',
+                     vehicle, cycle, ref * 1000, res * 1000)
+            n += 1
+        self.assertBenchmarked(n)
+
+    def test_kernel_backend(self):
+        n = 0
+        for vehicle, cycle, data in prediction_cases(*(_MODELS + _ARGS)):
+            models = [data[i] for i in _MODELS]
+            args = [data[i] for i in _ARGS]
+
+            ref = _checksums(_loop(models, args, True))
+            res = _checksums(_loop(models, args, True, True))
+            self.assertEqual(ref, res)
+
+            ref = best_time(_loop, models, args, True, repeat=3)
+            res = best_time(_loop, models, args, True, True, repeat=3)
+            log.info('%s %s prediction loop (kernel backend) [ms]: '
+                     '%.1f -> %.1f.', vehicle, cycle, ref * 1000, res * 1000)
+            n += 1
+        self.assertBenchmarked(n)
+
+    def test_batch_prediction(self):
+        from co2mpas.model.physical.variations import batch_prediction_loop
+        factors, n = (1.0, 0.9, 1.1, 1.25), 0
+        for vehicle, cycle, data in prediction_cases(*(_MODELS + _ARGS)):
+            models = [data[i] for i in _MODELS]
+            args = [data[i] for i in _ARGS]
+            powers = np.array([args[-1] * f for f in factors])
+
+            def _sequential():
+                return [_loop(models, args[:-1] + [p], True) for p in powers]
+
+            def _batch():
+                return batch_prediction_loop(
+                    [copy.deepcopy(models) for _ in factors], *args[:-1],
+                    powers
+                )
+
+            ref, res = _sequential(), _batch()
+            for j, out in enumerate(ref):
+                for i, v in out.items():
+                    np.testing.assert_array_equal(res[i][j], v, err_msg=i)
+
+            ref = best_time(_sequential, repeat=3)
+            res = best_time(_batch, repeat=3)
+            log.info('%s %s %d variations prediction [ms]: %.1f -> %.1f.',
+                     vehicle, cycle, len(factors), ref * 1000, res * 1000)
+            n += 1
+        self.assertBenchmarked(n)
+
+    def test_compiled_trees(self):
+        keys = ('engine_prediction_model', 'times', 'accelerations',
+                'final_drive_powers_in', 'engine_speeds_out_hot')
+        n = 0
+        for vehicle, cycle, data in prediction_cases(*keys):
+            thermal = data[keys[0]].engine_temperature_prediction_model
+            if thermal.is_fake():
+                continue
+            args = [data[i] for i in keys[1:]]
+            xgb = copy.deepcopy(thermal)
+            reg = xgb.engine_temperature_regression_model
+            self.assertIsNotNone(reg.trees)
+            reg.trees = reg.cold_trees = None
+
+            ref, res = xgb(*args), thermal(*args)
+            np.testing.assert_array_equal(res, ref)
+
+            ref = best_time(xgb, *args, repeat=3)
+            res = best_time(thermal, *args, repeat=3)
+            log.info('%s %s engine temperatures (compiled trees) [ms]: '
+                     '%.1f -> %.1f.', vehicle, cycle, ref * 1000, res * 1000)
+            n += 1
+        self.assertBenchmarked(n)
+
+    def test_alternator_current_model(self):
+        keys = ('electrics_prediction_model', 'times', 'state_of_charges',
+                'alternator_statuses', 'gear_box_powers_in', 'accelerations')
+        n = 0
+        for vehicle, cycle, data in prediction_cases(*keys):
+            mdl = data[keys[0]].alternator_current_model
+            if getattr(mdl, 'trees', None) is None:
+                continue
+            X = np.column_stack([data[i] for i in keys[1:]])
+            xgb = copy.copy(mdl)
+            xgb.trees = xgb.init_trees = None
+
+            def _loop(m):
+                return np.array([m(*x) for x in X])
+
+            ref = _loop(xgb)
+            np.testing.assert_array_equal(_loop(mdl), ref)
+            np.testing.assert_array_equal(mdl.predict(X), ref)
+
+            ref = best_time(_loop, xgb, repeat=3)
+            res = best_time(_loop, mdl, repeat=3)
+            vec = best_time(mdl.predict, X, repeat=3)
+            log.info('%s %s alternator currents (compiled trees, vectorized) '
+                     '[ms]: %.1f -> %.1f, %.1f.', vehicle, cycle, ref * 1000,
+                     res * 1000, vec * 1000)
+            n += 1
+        self.assertBenchmarked(n)
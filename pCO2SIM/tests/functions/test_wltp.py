@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+
+import unittest
+import unittest.mock as mock
+
+import numpy as np
+
+import co2mpas.model.physical.cycle.WLTP as wltp
+from co2mpas.model.physical.defaults import dfl
+
+
+class TestWltpGears(unittest.TestCase):
+    def setUp(self):
+        self.cache_size = dfl.functions.wltp_gears.cache_size
+        wltp._WLTP_GEARS.clear()
+        n = 20
+        self.args = (
+            lambda speeds: speeds / 6000.0, np.linspace(0, 60, n),
+            np.full(n, 0.5), np.linspace(0, 30, n),
+            {0: 0.0, 1: 120.0, 2: 70.0},
+            (800.0, 50.0), 5000.0, 100.0, 6000.0, {'params': {'f': [1, 2]}}
+        )
+
+    def tearDown(self):
+        dfl.functions.wltp_gears.cache_size = self.cache_size
+        wltp._WLTP_GEARS.clear()
+
+    def _wltp_gears(self, *args, func=None):
+        calls = []
+
+        def run_cycle(vel, *a):
+            calls.append(vel)
+            gears = np.arange(vel.shape[0]) % 3 - 1
+            return gears, None, None
+
+        with mock.patch.object(wltp.wltp_exp, 'run_cycle', run_cycle), \
+                mock.patch.object(wltp.wltp_exp, 'applyDriveabilityRules'):
+            gears = (func or wltp.wltp_gears)(*args)
+        return gears, len(calls)
+
+    def test_content_key(self):
+        args = self.args[1:]
+        key = wltp._content_key(*args)
+        self.assertEqual(key, wltp._content_key(*(
+            v.copy() if isinstance(v, np.ndarray) else v for v in args
+        )))
+        other = list(args)
+        other[1] = other[1].copy()
+        other[1][5] += 1e-12
+        self.assertNotEqual(key, wltp._content_key(*other))
+        other = list(args)
+        other[-1] = {'params': {'f': [1, 3]}}
+        self.assertNotEqual(key, wltp._content_key(*other))
+
+    def test_cache(self):
+        ref, n = self._wltp_gears(*self.args)
+        self.assertEqual(n, 1)
+        ref[:] = 10  # The cached profile is not modified.
+        res, n = self._wltp_gears(*self.args)
+        self.assertEqual(n, 0)
+        np.testing.assert_array_equal(res, np.arange(20) % 3 == 2)
+
+        args = list(self.args)
+        args[1] = args[1] * 2
+        self.assertEqual(self._wltp_gears(*args)[1], 1)
+        self.assertEqual(len(wltp._WLTP_GEARS), 2)
+
+        dfl.functions.wltp_gears.cache_size = 1
+        args[2] = args[2] * 2
+        self.assertEqual(self._wltp_gears(*args)[1], 1)
+        self.assertEqual(len(wltp._WLTP_GEARS), 1)
+        self.assertEqual(self._wltp_gears(*self.args)[1], 1)
+
+        dfl.functions.wltp_gears.cache_size = 0
+        wltp._WLTP_GEARS.clear()
+        self.assertEqual(self._wltp_gears(*self.args)[1], 1)
+        self.assertEqual(self._wltp_gears(*self.args)[1], 1)
+        self.assertFalse(wltp._WLTP_GEARS)
+
+    def test_threads(self):
+        import concurrent.futures as cf
+        dfl.functions.wltp_gears.cache_size = 3
+        ref = np.arange(20) % 3 == 2
+
+        def _run(args):
+            with cf.ThreadPoolExecutor(8) as executor:
+                return list(executor.map(lambda a: wltp.wltp_gears(*a), args))
+
+        args = []
+        for i in range(200):
+            a = list(self.args)
+            a[1] = a[1] * (i % 7 + 1)
+            args.append(a)
+        res, n = self._wltp_gears(args, func=_run)
+        self.assertGreaterEqual(n, 7)
+        for gears in res:
+            np.testing.assert_array_equal(gears, ref)
+        self.assertEqual(len(wltp._WLTP_GEARS), 3)
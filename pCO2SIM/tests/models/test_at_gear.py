@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+import concurrent.futures as cf
+import unittest
+
+import dill
+import numpy as np
+
+import co2mpas.utils.parallel as co2_par
+from co2mpas.model.physical.defaults import dfl
+from co2mpas.model.physical.gear_box.at_gear import at_gear, at_cmv, \
+    correct_gear_v3
+
+_MODELS = 'CMV', 'CMV_Cold_Hot', 'DTGS', 'GSPV', 'GSPV_Cold_Hot'
+
+
+class ATGearModels(unittest.TestCase):
+    def setUp(self):
+        cfg = dfl.functions.at_gear
+        self.cfg = cfg.executor, cfg.n_workers, cfg.disabled_models
+        rnd = np.random.RandomState(0)
+        n = 600
+        t = np.arange(n, dtype=float)
+        v = 110 * np.sin(t / 60) ** 2
+        vsr = {0: 0.0, 1: 0.0075, 2: 0.0135, 3: 0.02, 4: 0.027, 5: 0.034}
+        gears = np.searchsorted([0.5, 15, 30, 50, 70], v)
+        self.inputs = {
+            'gears': gears, 'times': t, 'velocities': v,
+            'engine_speeds_out': np.array([
+                vi / vsr[g] if g else 800.0 for vi, g in zip(v, gears)
+            ]),
+            'accelerations': np.gradient(v / 3.6, t),
+            'motive_powers': 40 * np.sin(t / 13) + rnd.normal(0, 5, n),
+            'engine_coolant_temperatures': 90 - 70 * np.exp(-t / 150),
+            'velocity_speed_ratios': vsr, 'idle_engine_speed': (800.0, 50.0),
+            'full_load_curve': lambda s: np.interp(
+                s, [800, 2500, 6000], [10, 60, 45]
+            ),
+            'cycle_type': 'WLTP', 'stop_velocity': 1.0,
+            'specific_gear_shifting': 'ALL'
+        }
+
+    def tearDown(self):
+        cfg = dfl.functions.at_gear
+        cfg.executor, cfg.n_workers, cfg.disabled_models = self.cfg
+        co2_par.shutdown_executors()
+
+    def _calibrate(self, **inputs):
+        sol = at_gear().dispatch(dict(self.inputs, **inputs), _MODELS)
+        return {k: sol[k] for k in _MODELS if k in sol}
+
+    def _predict(self, model, name):
+        inputs = dict(self.inputs, specific_gear_shifting=name)
+        inputs[name] = model
+        inputs.pop('gears')
+        return at_gear().dispatch(inputs, ['gears'])['gears']
+
+    def test_disabled_models(self):
+        models = {'CMV', 'CMV_Cold_Hot', 'GSPV', 'GSPV_Cold_Hot'}
+        self.assertEqual(set(self._calibrate()), models)
+
+        dfl.functions.at_gear.disabled_models = ('GSPV', 'CMV_Cold_Hot')
+        self.assertEqual(set(self._calibrate()), {'CMV', 'GSPV_Cold_Hot'})
+
+        # A specific model is calibrated even if disabled.
+        res = self._calibrate(specific_gear_shifting='GSPV')
+        self.assertEqual(set(res), {'GSPV'})
+
+    def test_parallel_executor(self):
+        ref = self._calibrate()
+        cfg = dfl.functions.at_gear
+        cfg.executor, cfg.n_workers = 'parallel', 2
+        res = self._calibrate()
+        self.assertEqual(set(res), set(ref))
+        for k, v in ref.items():
+            self.assertNotIsInstance(res[k], co2_par.AsyncResult)
+            self.assertEqual(type(res[k]), type(v))
+            np.testing.assert_array_equal(
+                self._predict(res[k], k), self._predict(v, k), k
+            )
+
+    def test_calibrations_overlap(self):
+        import unittest.mock as mock
+        events = []
+        get_estimation_result = co2_par.get_estimation_result
+
+        def _submit(executor, func, *args):
+            events.append(('submit', func.__name__))
+            future = cf.Future()
+            future.set_result((dill.dumps(func(*args)), None))
+            return co2_par.AsyncResult(future)
+
+        def _get_estimation_result(estimations):
+            events.append(('wait', None))
+            return get_estimation_result(estimations)
+
+        dfl.functions.at_gear.executor = 'parallel'
+        with mock.patch.object(co2_par, 'get_executor'), \
+                mock.patch.object(co2_par, 'submit', _submit), \
+                mock.patch.object(co2_par, 'get_estimation_result',
+                                  _get_estimation_result):
+            res = self._calibrate()
+
+        # All calibrations are submitted before waiting any result.
+        kinds = [e[0] for e in events]
+        self.assertEqual(kinds.count('submit'), len(res))
+        self.assertEqual(set(kinds[:len(res)]), {'submit'})
+        self.assertIn('wait', kinds)
+
+    def test_predict_with_async_result(self):
+        ref = self._calibrate(specific_gear_shifting='CMV')['CMV']
+        future = cf.Future()
+        future.set_result((dill.dumps(ref), None))
+        correct_gear = correct_gear_v3(
+            self.inputs['velocity_speed_ratios'],
+            self.inputs['idle_engine_speed']
+        )
+        inputs = dict(self.inputs, gear_filter=None, correct_gear=correct_gear)
+        inputs.pop('gears')
+
+        # The model node of the sub-model does not wait the calibration.
+        def _predict(model):
+            return at_cmv().dispatch(dict(inputs, CMV=model), ['gears'])
+
+        np.testing.assert_array_equal(
+            _predict(co2_par.AsyncResult(future))['gears'],
+            _predict(ref)['gears']
+        )
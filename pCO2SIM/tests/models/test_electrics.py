@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+import unittest
+
+import numpy as np
+
+
+def _per_step(model, X):
+    # Previous per-step evaluation with the calibrated regressors.
+    curr = []
+    for x in X:
+        if x[2] == 3:
+            func, mask = model.init_model, model.init_mask
+        else:
+            func, mask = model.model, model.mask
+        curr.append(min(0.0, func(x[None, mask])[0]))
+    return np.array(curr)
+
+
+class AlternatorCurrentModel(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        n = 600
+        self.times = t = np.arange(n, dtype=float)
+        velocities = np.abs(50 * np.sin(t / 40))
+        self.accelerations = np.gradient(velocities) / 3.6
+        self.powers = 10 * self.accelerations + rnd.normal(size=n)
+        self.soc = 70 + np.cumsum(rnd.normal(0, .05, n))
+        self.statuses = np.where(t < 20, 3, rnd.randint(0, 3, n))
+        self.on_engine = (velocities > 5) | (self.accelerations > .1)
+        self.currents = -np.where(self.statuses > 0, 20 + self.powers, 0)
+        self.X = np.column_stack((
+            t, self.soc, self.statuses, self.powers, self.accelerations
+        ))
+
+    def _fit(self, **kwargs):
+        from co2mpas.model.physical.electrics import AlternatorCurrentModel
+        return AlternatorCurrentModel().fit(
+            self.currents, self.on_engine, self.times, self.soc,
+            self.statuses, self.powers, self.accelerations, **kwargs
+        )
+
+    def test_predict(self):
+        for init_time in (0.0, 20.0):
+            model = self._fit(init_time=init_time)
+            self.assertIsNotNone(model.trees)
+            ref = _per_step(model, self.X)
+            np.testing.assert_array_equal(model.predict(self.X), ref)
+            np.testing.assert_array_equal([model(*x) for x in self.X], ref)
+
+            model.trees = model.init_trees = None  # Not compiled.
+            np.testing.assert_array_equal(model.predict(self.X), ref)
+
+    def test_predict_default_model(self):
+        from co2mpas.model.physical.electrics import AlternatorCurrentModel
+        model = AlternatorCurrentModel((-10.0, -2.0))
+        ref = [model(*x) for x in self.X]
+        np.testing.assert_array_equal(model.predict(self.X), ref)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+import unittest
+
+import numpy as np
+
+from co2mpas.model.physical.gear_box.at_gear import CorrectGear
+
+
+def _reference_gears(gsm, correct_gear, times, velocities, motive_powers):
+    # Step-by-step prediction with the gear-shifting matrix as a dict.
+    matrix = gsm._prepare(times, velocities, None, motive_powers, None)
+    valid_gears = np.array(list(gsm))
+    gear, gears = valid_gears.min(), np.zeros_like(times, int)
+    for i in range(times.shape[0]):
+        g = correct_gear(matrix[gear][i], i)
+        gear = gears[i] = valid_gears[np.abs(valid_gears - g).argmin()]
+    return gears
+
+
+def _reference_correct_gear_shifts(
+        times, ratios, gears, velocity_speed_ratios, shift_window=4.0):
+    # Brute force search of each shifting instant.
+    import scipy.optimize as sci_opt
+    from co2mpas.model.physical.gear_box import calculate_gear_shifts
+    shifts = calculate_gear_shifts(gears)
+    vsr = np.vectorize(lambda v: velocity_speed_ratios.get(v, 0))
+    s = len(gears)
+
+    def err(v, r):
+        v = int(v)
+        return np.float32(np.mean(np.abs(ratios[slice(v - 1, v + 1, 1)] - r)))
+
+    k = 0
+    new_gears = np.zeros_like(gears)
+    dt = shift_window / 2
+    for i in np.arange(s)[shifts]:
+        g = gears[slice(i - 1, i + 1, 1)]
+        if g[0] != 0 and g[-1] != 0:
+            t = times[i]
+            n = max(i - (((t - dt) <= times) & (times <= t)).sum(), k)
+            m = min(i + ((t <= times) & (times <= (t + dt))).sum(), s)
+            j = int(sci_opt.brute(err, (slice(n, m, 1),), args=(vsr(g),),
+                                  finish=None))
+        else:
+            j = int(i)
+
+        x = slice(j - 1, j + 1, 1)
+        new_gears[x] = g
+        new_gears[k:x.start] = g[0]
+        k = x.stop
+
+    new_gears[k:] = new_gears[k - 1]
+
+    return new_gears
+
+
+class GearShiftingMatrix(unittest.TestCase):
+    def setUp(self):
+        self.times = np.arange(0, 600, 1.0)
+        self.velocities = 120 * np.sin(self.times / 100) ** 2
+        self.motive_powers = np.cos(self.times / 20) * 30
+        self.vsr = {0: 0.0, 1: 0.01, 2: 0.02, 3: 0.03, 4: 0.04}
+
+    def _check(self, gsm):
+        args = self.times, self.velocities, None, self.motive_powers
+
+        # Corrections that go out of the valid gears.
+        def correct_gear(gear, i, *a):
+            return gear + (i % 7 == 0) * 3 - (i % 11 == 0) * 2
+
+        res = gsm.predict(*args, correct_gear=correct_gear)
+        ref = _reference_gears(
+            gsm, correct_gear, self.times, self.velocities, self.motive_powers
+        )
+        np.testing.assert_array_equal(res, ref)
+        self.assertGreater(len(np.unique(res)), 2)
+
+    def test_cmv(self):
+        from co2mpas.model.physical.gear_box.at_gear import CMV
+        inf = float('inf')
+        self._check(CMV(
+            [(0, (0, 5)), (1, (3, 30)), (2, (25, 60)), (3, (50, inf))],
+            velocity_speed_ratios=self.vsr
+        ))
+
+    def test_gspv(self):
+        from co2mpas.model.physical.gear_box.at_gear import GSPV
+        from co2mpas.model.physical.defaults import dfl
+        inf = dfl.INF
+        self._check(GSPV(cloud={
+            0: [[0.0], [[0.0], [5.0]]],
+            1: [[3.0], [[-10, 0, 10], [25, 30, 35]]],
+            2: [[25.0], [[-10, 0, 10], [55, 60, 65]]],
+            4: [[50.0], [[0, 1], [inf, inf]]]
+        }, velocity_speed_ratios=self.vsr))
+
+    def test_gspv_curves(self):
+        import scipy.interpolate as sci_itp
+        from co2mpas.model.physical.gear_box.at_gear import GSPV, \
+            _PiecewiseLinear
+        rnd = np.random.RandomState(0)
+        x = np.linspace(-10, 10)
+        y = np.sort(rnd.uniform(20, 60, x.shape[0]))
+        p = np.linspace(-20, 20, 1001)
+        spl = sci_itp.InterpolatedUnivariateSpline
+        np.testing.assert_allclose(
+            _PiecewiseLinear(x, y)(p), spl(x, y, k=1, ext=3)(p), rtol=1e-12
+        )
+        np.testing.assert_allclose(
+            _PiecewiseLinear([0], [25.0])(p), spl([0, 1], [25.0] * 2, k=1)(p),
+            rtol=1e-12
+        )
+
+        # The packed tables give the same matrix of the single curves.
+        inf = float('inf')
+        gsm = GSPV(cloud={
+            0: [[0.0], [[0.0], [5.0]]],
+            1: [[3.0], [[-10, -3, 0, 10], [25, 28, 30, 35]]],
+            2: [[25.0], [[-10, 0, 10], [55, 60, 65]]],
+            3: [[45.0], [[5.0], [80.0]]],
+            4: [[70.0], [[0, 1], [inf, inf]]]
+        }, velocity_speed_ratios=self.vsr)
+        res = gsm._prepare(self.times, self.velocities, None,
+                           self.motive_powers, None)
+        keys = sorted(gsm)
+        for i, g in enumerate(keys):
+            down, up = [f(self.motive_powers) for f in gsm[g]]
+            ref = np.tile(g, self.times.shape[0])
+            ref[self.velocities < down] = keys[max(0, i - 1)]
+            ref[self.velocities >= up] = keys[min(i + 1, len(keys) - 1)]
+            np.testing.assert_array_equal(res[g], ref)
+        limits = gsm.limits
+        for g in keys:
+            for f, (y, x) in zip(gsm[g], limits[g]):
+                np.testing.assert_array_equal(y, f(x))
+
+    def test_interp_table(self):
+        from co2mpas.model.physical.gear_box.at_gear import _interp_table
+        rnd = np.random.RandomState(0)
+        x = np.append(rnd.uniform(-15, 15, 1000), [-10, 0, 3, 10])
+        xp = np.sort(rnd.uniform(-10, 10, (6, 8)), 1)
+        xp[:, 0], xp[2, 5:], xp[4, 1:] = -10, xp[2, 4], -10  # Padded rows.
+        fp = rnd.uniform(20, 60, xp.shape)
+        fp[2, 5:], fp[4, 1:] = fp[2, 4], fp[4, 0]
+        ref = []
+        for a, b in zip(xp, fp):
+            n = np.searchsorted(a, a[-1]) + 1  # Without the padding.
+            ref.append(np.interp(x, a[:n], b[:n]))
+        np.testing.assert_allclose(_interp_table(x, xp, fp), ref, rtol=1e-12)
+
+    def test_gspv_spline_curves(self):
+        import scipy.interpolate as sci_itp
+        from co2mpas.model.physical.gear_box.at_gear import GSPV
+        from co2mpas.model.physical.defaults import dfl
+        spl, inf = sci_itp.InterpolatedUnivariateSpline, dfl.INF
+        cloud = {
+            0: [[0.0], [[0.0], [5.0]]],
+            1: [[3.0], [[-10, -3, 0, 10], [25, 28, 30, 35]]],
+            2: [[25.0], [[-10, 0, 10], [55, 60, 65]]],
+            4: [[50.0], [[0, 1], [inf, inf]]]
+        }
+        ref = GSPV(cloud=cloud, velocity_speed_ratios=self.vsr)
+
+        # Model pickled with the spline curves of the previous versions.
+        gsm = GSPV(cloud=cloud, velocity_speed_ratios=self.vsr)
+        for v in gsm.values():
+            v[:] = [spl(c.xp, c.fp, k=1, ext=3) if len(c.xp) > 1 else
+                    spl([0, 1], [c.fp[0]] * 2, k=1) for c in v]
+        del gsm._curves
+
+        args = self.times, self.velocities, None, self.motive_powers, None
+        res = gsm._prepare(*args)
+        for k, v in ref._prepare(*args).items():
+            np.testing.assert_array_equal(res[k], v)
+        for k, v in ref.limits.items():
+            for (y, x), (y_ref, x_ref) in zip(gsm.limits[k], v):
+                np.testing.assert_allclose(y, y_ref, rtol=1e-12)
+
+    def test_correct_gear_shifts(self):
+        from co2mpas.model.physical.gear_box.mechanical import \
+            _correct_gear_shifts
+        rnd = np.random.RandomState(0)
+        times = np.cumsum(rnd.uniform(.5, 1.5, 600))
+        vsr = {0: 0.0, 1: 0.0075, 2: 0.0135, 3: 0.02, 4: 0.027, 5: 0.034}
+        gears = np.repeat(rnd.randint(0, 6, 60), rnd.randint(3, 17, 60))
+        gears = np.append([0], gears)[:times.shape[0]]
+        ratios = np.array([vsr[g] for g in gears])
+        ratios *= rnd.normal(1, .1, ratios.shape[0])
+        for window in (2.0, 4.0, 8.0):
+            np.testing.assert_array_equal(
+                _correct_gear_shifts(times, ratios, gears, vsr, window),
+                _reference_correct_gear_shifts(
+                    times, ratios, gears, vsr, window
+                )
+            )
+
+        # Shift within the window of the first instant.
+        gears = np.array([1, 2, 2, 2, 2, 2])
+        ratios = np.array([vsr[g] for g in gears])
+        np.testing.assert_array_equal(_correct_gear_shifts(
+            np.arange(6.0), ratios, gears, vsr
+        ), gears)
+
+
+class DriveabilityRules(unittest.TestCase):
+    def setUp(self):
+        self.vsr = {0: 0.0, 1: 0.0075, 2: 0.0135, 3: 0.02, 4: 0.027, 5: 0.034}
+
+    def _check(self, proposed, velocities, motive_powers, expected):
+        from co2mpas.model.physical.gear_box.at_gear import CMV
+        n = len(proposed)
+        times = np.arange(n, dtype=float)
+        velocities = np.broadcast_to(velocities, n).astype(float)
+        motive_powers = np.broadcast_to(motive_powers, n).astype(float)
+        # Gear-shifting matrix that proposes the same gears from any gear.
+        gsm = CMV([(g, (0, 0)) for g in self.vsr])
+        gsm._prepare = lambda *args: {g: np.array(proposed) for g in gsm}
+        cg = CorrectGear(self.vsr, (800.0, 50.0))
+        cg.fit_correct_driveability_rules(4000.0)
+        res = gsm.predict(
+            times, velocities, np.gradient(velocities / 3.6, times),
+            motive_powers, correct_gear=cg
+        )
+        self.assertEqual(res.tolist(), expected)
+
+    def test_acceleration_upshifts(self):
+        # 4.a: gears last at least 2 seconds during accelerations.
+        self._check(
+            [1, 1, 3, 3, 3, 3, 3, 3], np.linspace(10, 40, 8), 10,
+            [1, 1, 2, 2, 3, 3, 3, 3]
+        )
+        # 4.b, 4.c: no upshifts when a downshift follows shortly during the
+        # acceleration, but only within 20 seconds.
+        self._check(
+            [2] * 3 + [3] * 7 + [2] * 5, 40, 10, [1] + [2] * 14
+        )
+        self._check(
+            [2] * 3 + [3] * 22 + [2] * 3, 40, 10,
+            [1, 2, 2] + [3] * 22 + [2] * 3
+        )
+
+    def test_deceleration(self):
+        # 4.d: no upshifts during decelerations.
+        self._check(
+            [3, 3, 3, 4, 4, 4, 4, 4], np.linspace(60, 50, 8), -5, [3] * 8
+        )
+        # 4.e: neutral below the minimum drive velocity of the gear.
+        self._check(
+            [2] * 8, [30, 25, 20, 15, 10, 7, 4, 2], -5,
+            [2, 2, 2, 2, 2, 0, 0, 0]
+        )
+        # 4.f: downshift skipping gears through neutral.
+        self._check(
+            [5] * 5 + [4, 3] + [2] * 7, np.linspace(80, 30, 14), -10,
+            [5] * 5 + [0] + [2] * 8
+        )
+
+    def test_start(self):
+        # 3.2: first gear engaged one second before the vehicle starts.
+        self._check(
+            [0, 0, 0, 0, 1, 1, 1, 1], [0, 0, 0, 0, 5, 10, 15, 20],
+            [0, 0, 0, 0, 5, 5, 5, 5], [0, 0, 1, 1, 1, 1, 1, 1]
+        )
+
+
+class VectorizedCorrections(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        n = 600
+        self.times = t = np.arange(n, dtype=float)
+        self.velocities = v = 110 * np.sin(t / 90) ** 2
+        v[rnd.uniform(size=n) < .05] = 0
+        self.accelerations = np.gradient(v / 3.6, t)
+        self.motive_powers = 40 * np.sin(t / 13) + rnd.normal(0, 5, n)
+        self.vsr = {0: 0.0, 1: 0.0075, 2: 0.0135, 3: 0.02, 4: 0.027, 5: 0.034}
+        self.idle = (800.0, 50.0)
+        self.speeds = np.array([
+            v[i] / self.vsr[g] if g else self.idle[0]
+            for i, g in enumerate(np.searchsorted([10, 30, 50, 70], v))
+        ]) * rnd.normal(1, .05, n)
+
+    @staticmethod
+    def full_load_curve(speeds):
+        return np.interp(speeds, [800, 2500, 6000], [10, 60, 45])
+
+    def _correct_gears(self):
+        from co2mpas.model.physical.gear_box.at_gear import MVL, \
+            correct_gear_v2, correct_gear_v3
+        mvl = MVL([(0, (0, 5))] + [
+            (k, (r * 1100, r * 2800 if k < 5 else float('inf')))
+            for k, r in sorted(self.vsr.items()) if k
+        ], velocity_speed_ratios=self.vsr, plateau_acceleration=.1)
+        cg_mvl = CorrectGear(self.vsr, self.idle)
+        cg_mvl.fit_correct_gear_mvl(mvl)
+        cg_mvl.fit_basic_correct_gear()
+        return {
+            'mvl': cg_mvl,
+            'full_load': correct_gear_v2(
+                self.vsr, self.idle, self.full_load_curve, 90.0
+            ),
+            'basic': correct_gear_v3(self.vsr, self.idle)
+        }
+
+    def test_array_correct_gear(self):
+        v, a, p = self.velocities, self.accelerations, self.motive_powers
+        args = None, self.times, v, a, p, None, None
+        for name in ('mvl', 'full_load'):
+            cg = self._correct_gears()[name]
+            func = getattr(cg, 'correct_gear_%s' % name)
+            array_func = getattr(cg, 'array_correct_gear_%s' % name)
+            for g in range(6):
+                ref = [func(g, i, *args) for i in range(v.shape[0])]
+                res = array_func(np.tile(g, v.shape[0]), v, a, p)
+                np.testing.assert_array_equal(res, ref, '%s %d' % (name, g))
+                self.assertEqual(res.shape, v.shape)
+
+    def test_array_speed_error(self):
+        from co2mpas.model.physical.gear_box.at_gear import CMV
+        inf = float('inf')
+        cmv = CMV([
+            (0, (0, 3)), (1, (2, 20)), (2, (15, 40)), (3, (35, 55)),
+            (4, (50, 75)), (5, (70, inf))
+        ], velocity_speed_ratios=self.vsr)
+        args = (
+            self.speeds, self.times, self.velocities, self.accelerations,
+            self.motive_powers, self.vsr, 1.0
+        )
+        for name, cg in sorted(self._correct_gears().items()):
+            ref, res = cmv._speed_error(cg, *args), \
+                cmv._array_speed_error(cg, *args)
+            self.assertIsNotNone(res, name)
+            for dv in (0, 5, -5):
+                cmv.update({g: (dn + dv, up + dv)
+                            for g, (dn, up) in cmv.items() if g})
+                self.assertEqual(res(), ref(), '%s %d' % (name, dv))
+                self.assertGreater(ref(), 0)
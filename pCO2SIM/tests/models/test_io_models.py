@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+import os
+import shutil
+import tempfile
+import unittest
+import collections
+
+import numpy as np
+
+
+def _round_trip(models, allow_pickle=False, load_pickle=None):
+    from co2mpas.io.models import save_models, load_models
+    if load_pickle is None:
+        load_pickle = allow_pickle
+    folder = tempfile.mkdtemp()
+    try:
+        fpath = os.path.join(folder, 'models.npz')
+        save_models(models, fpath, allow_pickle=allow_pickle)
+        return load_models(fpath, allow_pickle=load_pickle)
+    finally:
+        shutil.rmtree(folder)
+
+
+class ModelsFile(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        n = 600
+        self.times = np.arange(n, dtype=float)
+        self.velocities = np.abs(50 * np.sin(self.times / 40))
+        self.accelerations = np.gradient(self.velocities) / 3.6
+        self.powers = 10 * self.accelerations + rnd.normal(size=n)
+        self.speeds = 800 + 30 * self.velocities
+        self.temperatures = 90 - 70 * np.exp(-self.times / 150)
+        self.soc = 70 + np.cumsum(rnd.normal(0, .05, n))
+        self.statuses = np.where(self.times < 20, 3, rnd.randint(0, 3, n))
+        self.on_engine = (self.velocities > 5) | (self.accelerations > .1)
+
+    def test_calibrated_models(self):
+        from co2mpas.model.physical.engine.thermal import ThermalModel
+        from co2mpas.model.physical.engine.start_stop import StartStopModel
+        from co2mpas.model.physical.electrics import AlternatorCurrentModel
+        t, v, a, p = self.times, self.velocities, self.accelerations, \
+            self.powers
+        thermal = ThermalModel().fit(
+            (800.0, 50.0), self.on_engine, np.gradient(self.temperatures),
+            self.temperatures, p, self.speeds, a
+        )
+        start_stop = StartStopModel().fit(
+            self.on_engine, v, a, self.temperatures, self.soc
+        )
+        currents = -np.where(self.statuses > 0, 20 + p, 0)
+        alternator = AlternatorCurrentModel().fit(
+            currents, self.on_engine, t, self.soc, self.statuses, p, a,
+            init_time=20.0
+        )
+        models = {'thermal': thermal, 'start_stop': start_stop,
+                  'alternator': alternator}
+        res = _round_trip(models)
+
+        x = np.column_stack((self.temperatures, p, self.speeds, a))
+        np.testing.assert_array_equal(
+            res['thermal'].deltas(1.0, *x[:, 1:].T,
+                                  prev_temperatures=x[:, 0]),
+            thermal.deltas(1.0, *x[:, 1:].T, prev_temperatures=x[:, 0])
+        )
+        self.assertEqual(res['thermal'].thermostat, thermal.thermostat)
+
+        for basic in (True, False):
+            predict = [m.simple if basic else m.complex
+                       for m in (res['start_stop'], start_stop)]
+            for args in zip(v, a, self.temperatures, self.soc):
+                self.assertEqual(predict[0](*args), predict[1](*args))
+
+        x = np.column_stack((t, self.soc, self.statuses, p, a))
+        np.testing.assert_array_equal(
+            res['alternator'].predict(x), alternator.predict(x)
+        )
+
+    def test_parameters(self):
+        import lmfit
+        from co2mpas.model.physical.engine.cold_start import ColdStartModel
+        from co2mpas.model.physical.gear_box.at_gear import CMV
+        params = lmfit.Parameters()
+        params.add('a', value=0.38, min=0.0)
+        params.add('b', value=-0.002, vary=False)
+        params.add('c', expr='a * 2')
+        models = {
+            'co2_params': [(True, params)],
+            'cold_start': ColdStartModel(ds=120.0, m=5.5, temp_limit=40.0),
+            'CMV': CMV([(0, (0, 2.0)), (1, (1.0, float('inf')))],
+                       velocity_speed_ratios={0: 0.0, 1: 0.0083}),
+            'final_drive_ratios': collections.defaultdict(
+                lambda: 4.35, {1: 4.35}
+            ),
+            'gear_box_ratios': {1: 3.64, 2: 1.88},
+            'electric_load': (-0.09, -0.09),
+            'mask': np.arange(3)
+        }
+        res = _round_trip(models)
+
+        status, p = res['co2_params'][0]
+        self.assertIs(status, True)
+        self.assertEqual(p.valuesdict(), params.valuesdict())
+        self.assertEqual(p['c'].expr, 'a * 2')
+        self.assertFalse(p['b'].vary)
+        self.assertEqual(repr(res['cold_start']), repr(models['cold_start']))
+        self.assertEqual(repr(res['CMV']), repr(models['CMV']))
+        self.assertEqual(res['final_drive_ratios'][3], 4.35)
+        self.assertEqual(res['gear_box_ratios'], models['gear_box_ratios'])
+        self.assertEqual(res['electric_load'], models['electric_load'])
+        np.testing.assert_array_equal(res['mask'], models['mask'])
+
+    def test_pickle(self):
+        import functools
+        models = {'ratios': {1: 3.64}, 'func': functools.partial(max, 0)}
+        with self.assertRaisesRegex(ValueError, 'allow_pickle'):
+            _round_trip(models)
+        with self.assertRaisesRegex(ValueError, 'pickled'):
+            _round_trip(models, allow_pickle=True, load_pickle=False)
+        res = _round_trip(models, allow_pickle=True)
+        self.assertEqual(res['ratios'], models['ratios'])
+        self.assertEqual(res['func'](-1), 0)
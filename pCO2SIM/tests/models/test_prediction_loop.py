@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+import unittest
+
+import numpy as np
+
+
+def _fake_models(n):
+    from co2mpas.model.physical.wheels import \
+        define_fake_wheels_prediction_model
+    from co2mpas.model.physical.final_drive import \
+        define_fake_final_drive_prediction_model
+    from co2mpas.model.physical.gear_box import \
+        define_fake_gear_box_prediction_model
+    from co2mpas.model.physical.engine import define_engine_prediction_model
+    from co2mpas.model.physical.engine.start_stop import \
+        define_fake_engine_start_stop_prediction_model
+    from co2mpas.model.physical.engine.thermal import \
+        define_fake_engine_temperature_prediction_model
+    from co2mpas.model.physical.electrics import \
+        define_fake_electrics_prediction_model
+    rnd = np.random.RandomState(0)
+
+    def _a(k=1, dtype=float):
+        return [rnd.uniform(0, 100, n).astype(dtype) for _ in range(k)]
+
+    on_engine = rnd.uniform(size=n) > .3
+    engine_starts = np.append([False], on_engine[1:] & ~on_engine[:-1])
+    return (
+        define_fake_wheels_prediction_model(*_a(3)),
+        define_fake_final_drive_prediction_model(*_a(6)),
+        define_fake_gear_box_prediction_model(*(_a(1, int) + _a(5))),
+        define_engine_prediction_model(
+            define_fake_engine_start_stop_prediction_model(
+                on_engine, engine_starts
+            ), (800.0, 50.0),
+            define_fake_engine_temperature_prediction_model(*_a())
+        ),
+        define_fake_electrics_prediction_model(
+            *(_a() + _a(1, int) + _a(2))
+        )
+    )
+
+
+class FakeModels(unittest.TestCase):
+    def test_given_outputs_are_adopted(self):
+        from co2mpas.model.physical import _prediction_loop
+        n = 100
+        times = np.arange(n, dtype=float)
+        velocities = accelerations = motive_powers = np.zeros(n)
+        for vectorize in (True, False):
+            models = _fake_models(n)
+            given = {}
+            for m in models[:3] + (models[4],):
+                given.update(m._outputs)
+            given.update(models[3].start_stop_prediction_model._outputs)
+            given.update(
+                models[3].engine_temperature_prediction_model._outputs
+            )
+            ref = {k: v.copy() for k, v in given.items()}
+
+            out = _prediction_loop(
+                models, times, velocities, accelerations, motive_powers,
+                vectorize=vectorize
+            )
+            for k, v in given.items():
+                self.assertIs(out[k], v, k)
+                np.testing.assert_array_equal(v, ref[k], err_msg=k)
+
+            gb_s, on = given['gear_box_speeds_in'], given['on_engine']
+            np.testing.assert_array_equal(
+                out['engine_speeds_out_hot'],
+                np.where(on, np.maximum(gb_s, 800.0), 0)
+            )
+
+
+class Buffers(unittest.TestCase):
+    def test_views(self):
+        from co2mpas.model.physical.buffers import OutputsBuffer, \
+            allocate_outputs
+        outputs = OutputsBuffer({'gears': int, 'wheel_speeds': float}, 10)
+        allocate_outputs(outputs, {'gears', 'wheel_speeds', 'other'}, 10, int)
+        gears = outputs['gears']
+        self.assertIs(gears.base, outputs.buffer)
+        self.assertTrue(gears.flags['C_CONTIGUOUS'])
+        gears[:] = 3
+        np.testing.assert_array_equal(outputs.buffer['gears'], gears)
+
+        # Not in the buffer (or with a different type).
+        self.assertIsNot(outputs['wheel_speeds'].base, outputs.buffer)
+        self.assertIsNot(outputs['other'].base, outputs.buffer)
+
+        rows = OutputsBuffer({'gears': int}, 10, 3)
+        row = rows.row(1)
+        allocate_outputs(row, {'gears'}, 10, int)
+        row['gears'][:] = 1
+        np.testing.assert_array_equal(rows.fields['gears'][1], 1)
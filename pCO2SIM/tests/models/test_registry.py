@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+
+import gc
+import unittest
+
+from co2mpas.model.physical.defaults import dfl
+from co2mpas.model.registry import (
+    get_model, get_plan, SharedSubDispatch, _PLANS
+)
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        self.path = 'co2mpas.model.physical.wheels.wheels'
+        self.stop_velocity = dfl.values.stop_velocity
+
+    def tearDown(self):
+        dfl.values.stop_velocity = self.stop_velocity
+
+    def test_get_model(self):
+        dsp = get_model(self.path)
+        self.assertIs(dsp, get_model(self.path))
+
+        dfl.values.stop_velocity = self.stop_velocity + 1
+        new_dsp = get_model(self.path)
+        self.assertIsNot(dsp, new_dsp)
+        self.assertEqual(
+            new_dsp.default_values['stop_velocity']['value'],
+            self.stop_velocity + 1
+        )
+
+        dfl.values.stop_velocity = self.stop_velocity
+        self.assertIs(dsp, get_model(self.path))
+
+    def test_shared_sub_dispatch(self):
+        dsp = get_model(self.path)
+        solution = dsp.solution
+        sol = SharedSubDispatch(dsp)({'r_wheels': 0.3})
+        self.assertEqual(sol['r_wheels'], 0.3)
+        self.assertIs(dsp.solution, solution)
+
+    def test_get_plan(self):
+        dsp = get_model(self.path)
+        inputs, outputs = {'r_wheels': 0.3, 'velocities': 36.0}, ['wheel_speeds']
+        self.assertIs(get_plan(dsp, inputs), dsp)
+
+        plan = get_plan(dsp, inputs, outputs)
+        self.assertIsNot(plan, dsp)
+        self.assertIs(plan, get_plan(dsp, dict(inputs), outputs))
+        self.assertIsNot(plan, get_plan(dsp, {'r_wheels': 0.3}, outputs))
+
+        func = SharedSubDispatch(dsp, outputs=outputs, output_type='list')
+        self.assertEqual(
+            func(inputs), [dsp.dispatch(inputs, outputs)['wheel_speeds']]
+        )
+
+    def test_get_plan_shrink(self):
+        dsp = get_model(self.path)
+        solution = dsp.solution
+        inputs, outputs = {'r_wheels': 0.3, 'velocities': 36.0}, ['wheel_speeds']
+        plan = get_plan(dsp, inputs, outputs, shrink=True)
+        self.assertIs(dsp.solution, solution)
+        self.assertIsNot(plan, dsp)
+        self.assertIs(plan, get_plan(dsp, inputs, outputs, shrink=True))
+        self.assertIsNot(plan, get_plan(dsp, inputs, outputs))
+        self.assertLess(len(plan.nodes), len(dsp.nodes))
+        self.assertIn('wheel_speeds', plan.nodes)
+
+        ref = dsp.dispatch(inputs, outputs)['wheel_speeds']
+        solution = dsp.solution
+        func = SharedSubDispatch(dsp, outputs=outputs, shrink=True)
+        self.assertEqual(func(inputs)['wheel_speeds'], ref)
+        self.assertIs(dsp.solution, solution)
+
+        plan = get_plan(dsp, inputs, shrink=True)
+        self.assertIs(plan, get_plan(dsp, inputs, shrink=True))
+        self.assertIsNot(plan, dsp)
+
+    def test_plans_are_weakly_referenced(self):
+        from co2mpas.model.physical.wheels import wheels
+        dsp = wheels()
+        get_plan(dsp, {'r_wheels': 0.3}, ['wheel_speeds'], shrink=True)
+        self.assertIn(dsp, _PLANS)
+        n = len(_PLANS)
+        del dsp
+        gc.collect()
+        self.assertEqual(len(_PLANS), n - 1)
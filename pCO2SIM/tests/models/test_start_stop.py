@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+import unittest
+import unittest.mock as mock
+
+import numpy as np
+
+import co2mpas.model.physical.engine.start_stop as start_stop
+
+
+class StartStopModel(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        n = 500
+        self.velocities = rnd.uniform(0, 50, n)
+        self.accelerations = rnd.uniform(-1, 1, n)
+        self.temperatures = rnd.uniform(20, 90, n)
+        self.soc = rnd.uniform(40, 90, n)
+        self.on_engine = (self.velocities > 5) | (self.accelerations > .1) | \
+            (self.temperatures < 30)
+        self.X = np.column_stack((
+            self.velocities, self.accelerations, self.temperatures, self.soc
+        ))
+
+    def _fit(self):
+        return start_stop.StartStopModel().fit(
+            self.on_engine, self.velocities, self.accelerations,
+            self.temperatures, self.soc
+        )
+
+    def test_not_compiled_trees(self):
+        ref = self._fit()
+        self.assertIsNotNone(ref._simple)
+        self.assertIsNotNone(ref._complex)
+
+        func = 'compile_decision_tree'
+        with mock.patch.object(start_stop, func, return_value=None):
+            res = self._fit()
+        self.assertIsNone(res._simple)
+        self.assertIsNone(res._complex)
+
+        for x in self.X[:100]:
+            self.assertEqual(res.simple(*x), ref.simple(*x))
+            self.assertEqual(res.complex(*x), ref.complex(*x))
+        self.assertIsNone(res.predictions(*self.X[:, :2].T))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+import unittest
+import unittest.mock as mock
+
+import numpy as np
+
+import co2mpas.model.physical.trees as trees_mod
+
+
+class CompiledTrees(unittest.TestCase):
+    def test_xgboost(self):
+        import xgboost as xgb
+        from co2mpas.model.physical.trees import compile_xgboost
+        rnd = np.random.RandomState(0)
+        X = rnd.uniform(-100, 100, (1000, 4))
+        y = X[:, 0] * np.abs(X[:, 2]) + rnd.normal(size=1000)
+        X[::7, 2] = np.nan
+        reg = xgb.XGBRegressor(random_state=0, max_depth=2, n_estimators=50)
+        reg.fit(X[:, 1:], y)
+
+        trees, ref = compile_xgboost(reg, [1, 2, 3]), reg.predict(X[:, 1:])
+        np.testing.assert_array_equal(trees.predict(X), ref)
+        res = [trees.predict_one(*x) for x in X[:100]]
+        np.testing.assert_array_equal(res, ref[:100])
+
+        with mock.patch.object(trees_mod, '_compiled', True):  # Kernel path.
+            np.testing.assert_array_equal(trees.predict(X[:100]), ref[:100])
+            np.testing.assert_array_equal(trees.predict_one(*X[0]), ref[0])
+
+        self.assertIsNone(compile_xgboost(object()))
+
+    def test_xgboost_early_stopping(self):
+        import xgboost as xgb
+        from co2mpas.model.physical.trees import compile_xgboost
+        rnd = np.random.RandomState(0)
+        X = rnd.uniform(-100, 100, (1000, 3))
+        y = X[:, 0] * np.abs(X[:, 2]) + rnd.normal(scale=500, size=1000)
+        reg = xgb.XGBRegressor(random_state=0, max_depth=4, n_estimators=500)
+        reg.fit(X[200:], y[200:], eval_set=[(X[:200], y[:200])],
+                early_stopping_rounds=5, verbose=False)
+        self.assertLess(reg.best_iteration, 499)
+        np.testing.assert_array_equal(
+            compile_xgboost(reg).predict(X), reg.predict(X)
+        )
+
+    def test_xgboost_unsupported(self):
+        import xgboost as xgb
+        from co2mpas.model.physical.trees import compile_xgboost
+        rnd = np.random.RandomState(0)
+        X = rnd.uniform(-100, 100, (100, 2))
+        reg = xgb.XGBRegressor(booster='gblinear', n_estimators=5)
+        reg.fit(X, X[:, 0])
+        with self.assertLogs('co2mpas.model.physical.trees', 'WARNING'):
+            self.assertIsNone(compile_xgboost(reg))
+
+    def test_decision_tree(self):
+        import sklearn.tree as sk_tree
+        import sklearn.pipeline as sk_pip
+        import sklearn.feature_selection as sk_fsel
+        from co2mpas.model.physical.trees import compile_decision_tree
+        rnd = np.random.RandomState(0)
+        X = rnd.uniform(-100, 100, (1000, 3))
+        y = (X[:, 0] > 10) | (X[:, 2] < -20) ^ (rnd.uniform(size=1000) > .9)
+        model = sk_tree.DecisionTreeClassifier(random_state=0, max_depth=4)
+        model = sk_pip.Pipeline([
+            ('feature_selection', sk_fsel.SelectFromModel(model)),
+            ('classification', model)
+        ]).fit(X, y)
+        tree = compile_decision_tree(model)
+
+        # Samples close to the thresholds (i.e., float32 rounding).
+        thr = model.steps[-1][-1].tree_.threshold.astype(np.float32)
+        edges = np.concatenate([np.nextafter(thr, -np.inf), thr,
+                                np.nextafter(thr, np.inf)])
+        X = np.concatenate([X] + [np.tile(edges[:, None], 3)])
+        np.testing.assert_array_equal(tree.predict(X), model.predict(X))
+        res = [tree.predict_one(*x) for x in X[:100]]
+        np.testing.assert_array_equal(res, model.predict(X[:100]))
+
+
+class XGBRegressor(unittest.TestCase):
+    def setUp(self):
+        from co2mpas.model.physical.defaults import dfl
+        self.par = par = dfl.functions.XGBRegressor
+        self.settings = par.n_jobs, par.validation_fraction, \
+            par.n_iter_no_change
+        rnd = np.random.RandomState(0)
+        self.X = rnd.uniform(-100, 100, (1000, 3))
+        self.y = self.X[:, 0] * np.abs(self.X[:, 2]) + \
+            rnd.normal(scale=500, size=1000)
+
+    def tearDown(self):
+        par = self.par
+        par.n_jobs, par.validation_fraction, par.n_iter_no_change = \
+            self.settings
+
+    def _fit(self, **kwargs):
+        from co2mpas.model.physical.trees import xgb_regressor
+        reg = xgb_regressor(random_state=0, max_depth=4, n_estimators=300)
+        return reg.fit(self.X, self.y, **kwargs)
+
+    def test_n_jobs(self):
+        import sklearn.base as sk_base
+        self.par.n_jobs = None
+        reg = self._fit()
+        self.assertEqual(reg.n_jobs, -1)
+        self.par.n_jobs = 2
+        reg = self._fit()
+        self.assertEqual(reg.n_jobs, 2)
+        self.assertEqual(sk_base.clone(reg).get_params(), reg.get_params())
+
+    def test_early_stopping(self):
+        from co2mpas.model.physical.trees import compile_xgboost
+        self.par.validation_fraction = 0
+        full = self._fit()
+        self.assertFalse(hasattr(full, 'best_iteration'))
+
+        self.par.validation_fraction, self.par.n_iter_no_change = .2, 5
+        reg = self._fit()
+        self.assertLess(reg.best_iteration, 295)
+        self.assertEqual(reg.get_params()['validation_fraction'], .2)
+        self.assertNotIn('validation_fraction', reg.get_xgb_params())
+        self.assertNotEqual(reg.get_booster().get_dump(),
+                            full.get_booster().get_dump())
+        np.testing.assert_array_equal(
+            compile_xgboost(reg).predict(self.X), reg.predict(self.X)
+        )
+
+        eval_set = [(self.X[:10], self.y[:10])]
+        reg = self._fit(eval_set=eval_set, verbose=False)
+        self.assertFalse(hasattr(reg, 'best_iteration'))
@@ -0,0 +1,91 @@
+#! python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import schedula as sh
+
+from co2mpas import batch
+
+
+def _sleep(*args):
+    time.sleep(.01)
+    return 1
+
+
+def _vehicle_model():
+    model = sh.Dispatcher(name='CO2MPAS model')
+    model.add_function('calibrate_with_wltp_h', _sleep, ['a'], ['b'])
+    model.add_function('predict_nedc_h', _sleep, ['b'], ['c'])
+
+    base = sh.Dispatcher(name='run_base')
+    base.add_function('validate_meta', _sleep, ['x'], ['a'])
+    base.add_dispatcher(model, {'a': 'a'}, {'c': 'c'}, dsp_id='CO2MPAS model')
+    base.add_function('write_outputs', _sleep, ['c'], ['d'])
+
+    dsp = sh.Dispatcher()
+    dsp.add_function('prepare_data', _sleep, ['input_file_name'], ['x'])
+    dsp.add_dispatcher(base, {'x': 'x'}, {'d': 'd'}, dsp_id='run_base')
+    return dsp
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = [{
+            'vehicle_name': 'veh-%d' % i, 'parse_time': 1.0 + i,
+            'calibration_time': 2.0, 'prediction_time': 3.0,
+            'write_time': 4.0, 'total_time': 10.0 + i, 'peak_rss': 100.0,
+            'cache_hits': i
+        } for i in range(2)]
+
+    def test_vehicle_metrics(self):
+        start = time.time()
+        sol = _vehicle_model().dispatch({'input_file_name': 'in/veh.xlsx'})
+        res = batch._vehicle_metrics('in/veh.xlsx', sol, start)
+
+        self.assertEqual(set(res), set(self.metrics[0]))
+        self.assertEqual(res['vehicle_name'], 'veh')
+        self.assertEqual(res['cache_hits'], 0)
+        self.assertGreaterEqual(res['parse_time'], .02)
+        for k in ('calibration_time', 'prediction_time', 'write_time'):
+            self.assertGreaterEqual(res[k], .01)
+            self.assertLess(res[k], res['total_time'])
+        self.assertGreaterEqual(res['total_time'], .05)
+
+    def test_vehicle_metrics_without_model(self):
+        res = batch._vehicle_metrics(
+            'veh.xlsx', sh.Dispatcher().dispatch(), time.time()
+        )
+        self.assertEqual(res['calibration_time'], 0)
+        self.assertEqual(res['prediction_time'], 0)
+        self.assertEqual(res['write_time'], 0)
+        self.assertEqual(res['parse_time'], res['total_time'])
+
+    def test_metrics2df(self):
+        df = batch._metrics2df(self.metrics)
+        self.assertEqual(df.name, 'metrics')
+        self.assertEqual(list(df.index), ['veh-0', 'veh-1'])
+        self.assertEqual(len(df.columns), len(self.metrics[0]) - 1)
+        self.assertIn('total_time', df.columns.get_level_values(0))
+        self.assertEqual(
+            list(df.xs('cache_hits', axis=1, level=0).iloc[:, 0]), [0, 1]
+        )
+
+    def test_save_metrics(self):
+        with tempfile.TemporaryDirectory() as d:
+            fpath = os.path.join(d, 'metrics.json')
+            batch._save_metrics(fpath, ())
+            self.assertFalse(os.path.exists(fpath))
+
+            batch._save_metrics(fpath, iter(self.metrics))
+            with open(fpath) as f:
+                self.assertEqual(json.load(f), self.metrics)
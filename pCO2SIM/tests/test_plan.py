@@ -0,0 +1,65 @@
+#! python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+
+import unittest
+
+import schedula as sh
+
+from co2mpas import plan
+
+
+def _simulate(x):
+    if x < 0:
+        raise ValueError('Negative x!')
+    return {'nedc_h': {'prediction': {'output': {'co2_emission': 2.0 * x}}}}
+
+
+class TestSimulateVariations(unittest.TestCase):
+    def setUp(self):
+        self.run_base = sh.Dispatcher(raises=True)
+        self.run_base.add_function(
+            function=_simulate, inputs=['x'], outputs=['summary']
+        )
+
+    def _jobs(self, *values):
+        return [(
+            {'x': x, 'vehicle_name': 'veh-%d' % i},
+            {('base', 'input', 'prediction', 'nedc_h', 'x'): x},
+            {'output.prediction.nedc_h'},
+            {'vehicle_name': ('veh.xlsx', 'veh-%d' % i, True)}
+        ) for i, x in enumerate(values)]
+
+    def _simulate_variations(self, *values):
+        summary, dsps, jobs = {}, [self.run_base], self._jobs(*values)
+        with self.assertLogs('co2mpas.plan', 'ERROR') as cm:
+            plan._simulate_variations(dsps, jobs, summary)
+        self.assertFalse(jobs)
+        self.assertEqual(len(cm.output), values.count(-1))
+        self.assertEqual(len(dsps), len(values))
+        self.assertEqual(len(set(map(id, dsps))), len(values))
+        return summary
+
+    def assertFailed(self, summary, *names):
+        status = summary['all']['plan']['status']
+        self.assertEqual([r['vehicle_name'][1] for r in status], list(names))
+        for r in status:
+            self.assertIn('Negative x!', r['error'])
+
+    def test_one_failing_variation(self):
+        summary = self._simulate_variations(-1)
+        self.assertEqual(set(summary), {'all'})
+        self.assertFailed(summary, 'veh-0')
+
+    def test_failing_variation_in_batch(self):
+        summary = self._simulate_variations(1, -1, 3)
+        self.assertFailed(summary, 'veh-1')
+        res = summary['nedc_h']['prediction']['output']
+        self.assertEqual(
+            [(r['vehicle_name'][1], r['co2_emission']) for r in res],
+            [('veh-0', 2.0), ('veh-2', 6.0)]
+        )
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+
+import statistics
+import unittest
+
+import numpy as np
+
+import co2mpas.utils as co2_utl
+
+
+def _sliding_window(xy, dx_window):
+    # Reference implementation, it updates the window sample by sample.
+    dx = dx_window / 2
+    it = iter(xy)
+    v = next(it)
+    window = []
+
+    for x, y in xy:
+        x_dn = x - dx
+        x_up = x + dx
+        window = [w for w in window if w[0] >= x_dn]
+        while v and v[0] <= x_up:
+            window.append(v)
+            try:
+                v = next(it)
+            except StopIteration:
+                v = None
+        yield window
+
+
+def _median_filter(x, y, dx_window, filter=statistics.median_high):
+    return np.array([filter(list(zip(*v))[1])
+                     for v in _sliding_window(list(zip(x, y)), dx_window)])
+
+
+def _clear_fluctuations(times, gears, dt_window):
+    xy = [list(v) for v in zip(times, gears)]
+    for samples in _sliding_window(xy, dt_window):
+        up, dn = False, False
+        x, y = zip(*samples)
+        for k, d in enumerate(np.diff(y)):
+            if d > 0:
+                up = True
+            elif d < 0:
+                dn = True
+            if up and dn:
+                m = statistics.median_high(y)
+                for v in samples:
+                    v[1] = m
+                break
+    return np.array([y[1] for y in xy])
+
+
+class TestFilters(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        dt = rnd.uniform(.1, 1.5, 500)
+        dt[rnd.randint(0, 500, 10)] = 7  # Gaps wider than the window.
+        self.times = np.cumsum(dt)
+        self.gears = rnd.randint(0, 6, 500)
+        self.values = rnd.normal(0, 10, 500)
+        self.windows = 0, 1, 4, 10.5
+
+    def test_sliding_window(self):
+        xy = list(zip(self.times, self.gears))
+        for dx in self.windows:
+            start, stop = co2_utl.sliding_window_bounds(self.times, dx)
+            ref = list(_sliding_window(xy, dx))
+            self.assertEqual(list(co2_utl.sliding_window(xy, dx)), ref)
+            for i, w in enumerate(ref):
+                self.assertEqual(w, xy[start[i]:stop[i]])
+
+    def test_median_filter(self):
+        from co2mpas.model.physical.gear_box.mechanical import \
+            _median_filter_gears
+        t, g, v = self.times, self.gears, self.values
+        for dx in self.windows:
+            ref = _median_filter(t, g, dx)
+            np.testing.assert_array_equal(_median_filter_gears(t, g, dx), ref)
+            for y in (g, list(g), g.astype(float)):
+                res = co2_utl.median_filter(t, y, dx)
+                np.testing.assert_array_equal(res, ref)
+                self.assertEqual(res.dtype, np.asarray(y).dtype)
+
+            for f in (statistics.median_high, statistics.median_low, np.mean):
+                np.testing.assert_array_equal(
+                    co2_utl.median_filter(t, v, dx, f),
+                    _median_filter(t, v, dx, f)
+                )
+
+    def test_clear_fluctuations(self):
+        t, g = self.times, self.gears
+        smooth = co2_utl.median_filter(t, g, 4)
+        for dx in self.windows:
+            for y in (g, smooth, list(smooth), smooth.astype(float)):
+                res = co2_utl.clear_fluctuations(t, y, dx)
+                np.testing.assert_array_equal(
+                    res, _clear_fluctuations(t, y, dx)
+                )
+                self.assertEqual(res.dtype, np.asarray(y).dtype)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2015-2018 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+
+import operator
+import unittest
+
+import co2mpas.utils.parallel as co2_par
+
+
+def _allocate(size):
+    # Allocates (and writes) a buffer of the given size [MB].
+    return len(b'x' * int(size * 2 ** 20))
+
+
+class TestParallel(unittest.TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        co2_par.shutdown_executors()
+
+    def test_submit(self):
+        executor = co2_par.get_executor(1)
+        self.assertIs(executor, co2_par.get_executor(1))
+
+        res = co2_par.submit(executor, operator.add, 1, 2)
+        self.assertIsInstance(res, co2_par.AsyncResult)
+        self.assertEqual(co2_par.get_result(res), 3)
+        self.assertEqual(co2_par.get_estimation_result({'f': res}), 3)
+        self.assertEqual(co2_par.get_result(4), 4)
+
+        res = co2_par.submit(executor, operator.truediv, 1, 0)
+        self.assertRaises(ZeroDivisionError, res.get)
+
+    def test_peak_rss(self):
+        co2_par.reset_peak_rss()
+        rss = co2_par.get_peak_rss()
+        if rss is None:
+            self.skipTest('Peak resident set size not available.')
+        size = rss + 64
+        res = co2_par.submit(co2_par.get_executor(1), _allocate, size)
+
+        # The peak of the worker is collected with the result.
+        self.assertLess(co2_par.get_peak_rss(), size)
+        self.assertEqual(res.get(), int(size * 2 ** 20))
+        self.assertGreaterEqual(co2_par.get_peak_rss(), size)
+
+        co2_par.reset_peak_rss()
+        self.assertLess(co2_par.get_peak_rss(), size)